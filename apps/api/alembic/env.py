@@ -1,16 +1,17 @@
 """Alembic environment configuration for async migrations."""
 
 import asyncio
-import ssl
+import logging
 from logging.config import fileConfig
-from typing import Any
 
 from alembic import context
-from sqlalchemy import pool
+from sqlalchemy import pool, text
 from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import create_async_engine
 
 from app.core.config import settings
+from app.core.database import get_connect_args, to_asyncpg_url
+from app.core.migrations import MIGRATION_LOCK_ID
 from app.models import Base  # Import all models via __init__.py
 
 # this is the Alembic Config object
@@ -20,6 +21,8 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+logger = logging.getLogger("alembic.env")
+
 # Model metadata for 'autogenerate' support
 target_metadata = Base.metadata
 
@@ -29,34 +32,7 @@ def get_url() -> str:
     url = settings.DATABASE_URL
     if not url:
         raise ValueError("DATABASE_URL environment variable is not set")
-    
-    # Convert to asyncpg format
-    if url.startswith("postgresql://"):
-        url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
-    elif url.startswith("postgres://"):
-        url = url.replace("postgres://", "postgresql+asyncpg://", 1)
-    
-    # Remove sslmode and channel_binding params (asyncpg handles SSL differently)
-    if "?" in url:
-        base_url, params = url.split("?", 1)
-        filtered_params = "&".join(
-            p for p in params.split("&") 
-            if not p.startswith("sslmode=") and not p.startswith("channel_binding=")
-        )
-        url = f"{base_url}?{filtered_params}" if filtered_params else base_url
-    
-    return url
-
-
-def get_connect_args() -> dict[str, Any]:
-    """Get connection arguments for SSL if using Neon/Supabase."""
-    url = settings.DATABASE_URL or ""
-    if "neon.tech" in url or "supabase" in url:
-        ssl_context = ssl.create_default_context()
-        ssl_context.check_hostname = False
-        ssl_context.verify_mode = ssl.CERT_NONE
-        return {"ssl": ssl_context}
-    return {}
+    return to_asyncpg_url(url)
 
 
 def run_migrations_offline() -> None:
@@ -80,11 +56,31 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    """Run migrations with the given connection."""
-    context.configure(connection=connection, target_metadata=target_metadata)
+    """
+    Run migrations with the given connection.
 
-    with context.begin_transaction():
-        context.run_migrations()
+    Holds a session-level advisory lock for the duration, so replicas that
+    start together do not migrate concurrently; the losers skip the run.
+    """
+    params = {"lock_id": MIGRATION_LOCK_ID}
+    locked = connection.execute(
+        text("SELECT pg_try_advisory_lock(:lock_id)"), params
+    ).scalar()
+    # Session-level locks survive commit; end the autobegun transaction so
+    # Alembic manages its own.
+    connection.commit()
+    if not locked:
+        logger.info("Another process is running migrations, skipping")
+        return
+
+    try:
+        context.configure(connection=connection, target_metadata=target_metadata)
+
+        with context.begin_transaction():
+            context.run_migrations()
+    finally:
+        connection.execute(text("SELECT pg_advisory_unlock(:lock_id)"), params)
+        connection.commit()
 
 
 async def run_async_migrations() -> None:
@@ -92,7 +88,7 @@ async def run_async_migrations() -> None:
     connectable = create_async_engine(
         get_url(),
         poolclass=pool.NullPool,
-        connect_args=get_connect_args(),
+        connect_args=get_connect_args(settings.DATABASE_URL),
     )
 
     async with connectable.connect() as connection:
@@ -0,0 +1,43 @@
+"""server_default_timestamps
+
+Revision ID: 5b6c7d8e9f0a
+Revises: 4a5b6c7d8e9f
+Create Date: 2026-10-16 09:00:00.000000+00:00
+
+Lets Postgres stamp created_at/updated_at with DEFAULT now() instead of the
+application sending timestamps. Setting a column default is a catalog-only
+change and does not rewrite the tables.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b6c7d8e9f0a"
+down_revision: Union[str, None] = "4a5b6c7d8e9f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("cached_locations", "solar_analyses", "api_keys")
+
+
+def upgrade() -> None:
+    """Add DEFAULT now() to the timestamp columns."""
+    for table in TABLES:
+        op.execute(
+            f"ALTER TABLE {table} "
+            "ALTER COLUMN created_at SET DEFAULT now(), "
+            "ALTER COLUMN updated_at SET DEFAULT now()"
+        )
+
+
+def downgrade() -> None:
+    """Drop the timestamp column defaults."""
+    for table in TABLES:
+        op.execute(
+            f"ALTER TABLE {table} "
+            "ALTER COLUMN created_at DROP DEFAULT, "
+            "ALTER COLUMN updated_at DROP DEFAULT"
+        )
@@ -0,0 +1,43 @@
+"""api_key_hash
+
+Revision ID: 6c7d8e9f0a1b
+Revises: 5b6c7d8e9f0a
+Create Date: 2026-10-16 09:15:00.000000+00:00
+
+Adds api_keys.key_hash (SHA-256 of key) with a hash index, so auth looks
+keys up by a 32-byte digest instead of comparing 64-character strings. The
+index is built CONCURRENTLY so api_keys stays writable during the deploy.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6c7d8e9f0a1b"
+down_revision: Union[str, None] = "5b6c7d8e9f0a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add and backfill key_hash, then index it."""
+    op.add_column("api_keys", sa.Column("key_hash", sa.LargeBinary(length=32), nullable=True))
+    op.execute("UPDATE api_keys SET key_hash = sha256(convert_to(key, 'UTF8'))")
+    op.alter_column("api_keys", "key_hash", nullable=False)
+
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_api_keys_key_hash "
+            "ON api_keys USING hash (key_hash)"
+        )
+
+
+def downgrade() -> None:
+    """Drop key_hash and its index."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_api_keys_key_hash")
+    op.drop_column("api_keys", "key_hash")
@@ -0,0 +1,36 @@
+"""api_keys_active_created_index
+
+Revision ID: 7d8e9f0a1b2c
+Revises: 6c7d8e9f0a1b
+Create Date: 2026-10-16 09:30:00.000000+00:00
+
+Partial index serving the paginated admin listing of active keys (newest
+first). Built CONCURRENTLY so api_keys stays writable during the deploy.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7d8e9f0a1b2c"
+down_revision: Union[str, None] = "6c7d8e9f0a1b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create ix_api_keys_active_created."""
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_api_keys_active_created "
+            "ON api_keys (created_at DESC) WHERE is_active"
+        )
+
+
+def downgrade() -> None:
+    """Drop ix_api_keys_active_created."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_api_keys_active_created")
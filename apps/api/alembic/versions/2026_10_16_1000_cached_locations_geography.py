@@ -0,0 +1,42 @@
+"""cached_locations_geography
+
+Revision ID: 8e9f0a1b2c3d
+Revises: 7d8e9f0a1b2c
+Create Date: 2026-10-16 10:00:00.000000+00:00
+
+Store cached_locations.geom as geography(Point, 4326). Proximity lookups
+measure in meters on the spheroid, so they no longer cast every row to
+geography and the GIST index on geom serves ST_DWithin directly. The type
+change rebuilds idx_cached_locations_geom with the geography operator class.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8e9f0a1b2c3d"
+down_revision: Union[str, None] = "7d8e9f0a1b2c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Convert geom to geography and make sure it is GIST indexed."""
+    op.execute(
+        "ALTER TABLE cached_locations "
+        "ALTER COLUMN geom TYPE geography(Point, 4326) USING geom::geography"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_cached_locations_geom "
+        "ON cached_locations USING GIST (geom)"
+    )
+
+
+def downgrade() -> None:
+    """Convert geom back to geometry."""
+    op.execute(
+        "ALTER TABLE cached_locations "
+        "ALTER COLUMN geom TYPE geometry(Point, 4326) USING geom::geometry"
+    )
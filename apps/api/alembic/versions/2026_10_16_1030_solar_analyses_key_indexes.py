@@ -0,0 +1,48 @@
+"""solar_analyses_key_indexes
+
+Revision ID: 9f0a1b2c3d4e
+Revises: 8e9f0a1b2c3d
+Create Date: 2026-10-16 10:30:00.000000+00:00
+
+Composite indexes for the per-API-key analyses history: newest-first pages
+(optionally filtered by status) are read in index order without a sort, and
+the most-common-country stat groups from a partial index. Built CONCURRENTLY
+so solar_analyses stays writable during the deploy.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9f0a1b2c3d4e"
+down_revision: Union[str, None] = "8e9f0a1b2c3d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    "ix_solar_analyses_key_created": "(api_key_id, created_at DESC)",
+    "ix_solar_analyses_key_status_created": "(api_key_id, status, created_at DESC)",
+    "ix_solar_analyses_key_country": (
+        "(api_key_id, country_code) WHERE country_code IS NOT NULL"
+    ),
+}
+
+
+def upgrade() -> None:
+    """Create the per-API-key indexes on solar_analyses."""
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES.items():
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON solar_analyses {definition}"
+            )
+
+
+def downgrade() -> None:
+    """Drop the per-API-key indexes."""
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
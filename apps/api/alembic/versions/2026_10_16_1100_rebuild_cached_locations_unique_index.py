@@ -0,0 +1,60 @@
+"""rebuild_cached_locations_unique_index
+
+Revision ID: 0a1b2c3d4e5f
+Revises: 9f0a1b2c3d4e
+Create Date: 2026-10-16 11:00:00.000000+00:00
+
+Rebuilds the index behind uq_cached_locations_lat_lon CONCURRENTLY and swaps
+it in with ADD CONSTRAINT ... USING INDEX, which only needs a brief lock.
+Also drops ix_cached_locations_lat_lon, a second unique index on the same
+columns that 4a5b6c7d8e9f created and every write had to maintain.
+
+A failed CREATE INDEX CONCURRENTLY leaves an INVALID index behind, so the
+replacement is always dropped before it is built; a retry starts clean.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0a1b2c3d4e5f"
+down_revision: Union[str, None] = "9f0a1b2c3d4e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NEW_INDEX = "uq_cached_locations_lat_lon_new"
+
+
+def upgrade() -> None:
+    """Rebuild the unique constraint's index and drop the duplicate index."""
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        # Leftover from an interrupted run, INVALID if its build failed
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {NEW_INDEX}")
+        op.execute(
+            f"CREATE UNIQUE INDEX CONCURRENTLY {NEW_INDEX} "
+            "ON cached_locations (latitude, longitude)"
+        )
+
+    # Swap the constraint onto the new index (renamed to the constraint name)
+    op.execute("ALTER TABLE cached_locations DROP CONSTRAINT uq_cached_locations_lat_lon")
+    op.execute(
+        "ALTER TABLE cached_locations "
+        "ADD CONSTRAINT uq_cached_locations_lat_lon "
+        f"UNIQUE USING INDEX {NEW_INDEX}"
+    )
+
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_cached_locations_lat_lon")
+
+
+def downgrade() -> None:
+    """Recreate the duplicate unique index."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_cached_locations_lat_lon")
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY ix_cached_locations_lat_lon "
+            "ON cached_locations (latitude, longitude)"
+        )
@@ -0,0 +1,48 @@
+"""api_keys_active_created_id_index
+
+Revision ID: 1b2c3d4e5f6a
+Revises: 0a1b2c3d4e5f
+Create Date: 2026-10-16 11:30:00.000000+00:00
+
+Replaces ix_api_keys_active_created with a partial index on
+(created_at DESC, id DESC): the admin listing now pages on a
+(created_at, id) cursor so keys sharing a created_at are not skipped, and
+the index serves that order and tuple comparison without a sort.
+
+Built CONCURRENTLY under a new name before the old index is dropped; any
+INVALID leftover of an interrupted run is dropped first.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "1b2c3d4e5f6a"
+down_revision: Union[str, None] = "0a1b2c3d4e5f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create ix_api_keys_active_created_id and drop ix_api_keys_active_created."""
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_api_keys_active_created_id")
+        op.execute(
+            "CREATE INDEX CONCURRENTLY ix_api_keys_active_created_id "
+            "ON api_keys (created_at DESC, id DESC) WHERE is_active"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_api_keys_active_created")
+
+
+def downgrade() -> None:
+    """Restore ix_api_keys_active_created."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_api_keys_active_created")
+        op.execute(
+            "CREATE INDEX CONCURRENTLY ix_api_keys_active_created "
+            "ON api_keys (created_at DESC) WHERE is_active"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_api_keys_active_created_id")
@@ -5,26 +5,44 @@ Provides a two-tier caching strategy:
 1. Redis (hot cache): Fast, short-lived, exact matches
 2. PostgreSQL (warm cache): Slower, long-lived, proximity matches
 
-Uses Upstash Redis REST API for serverless-friendly caching.
+Uses redis-py's asyncio client (RESP over a pooled TCP connection), which
+works with Upstash and any other Redis server.
 """
 
-import json
+import asyncio
+import base64
+import functools
+import hashlib
 import logging
+import secrets
 import time
-from typing import Any
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+import msgpack
+import orjson
 
 from app.core.config import settings
 from app.core.metrics import log_cache_operation, metrics
 
+try:
+    from redis.exceptions import NoScriptError
+except ImportError:  # redis is optional; without it there is no client to raise this
+    class NoScriptError(Exception):  # type: ignore[no-redef]
+        """Placeholder when redis is not installed."""
+
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class CacheManager:
     """
     Redis cache manager for storing and retrieving solar data.
 
     Features:
-    - Serverless-friendly (Upstash Redis REST API)
+    - Non-blocking async client with a shared connection pool
     - Configurable TTL per cache type
     - Metrics collection for monitoring
     - Graceful degradation when Redis unavailable
@@ -33,13 +51,13 @@ class CacheManager:
     def __init__(self) -> None:
         self._client: Any | None = None
         self._initialized = False
+        # SHA1s of Lua scripts the server has already compiled
+        self._loaded_scripts: set[str] = set()
 
     @property
     def is_configured(self) -> bool:
         """Check if Redis is configured."""
-        return bool(
-            settings.UPSTASH_REDIS_REST_URL and settings.UPSTASH_REDIS_REST_TOKEN
-        )
+        return bool(settings.REDIS_URL)
 
     @property
     def is_initialized(self) -> bool:
@@ -49,26 +67,43 @@ class CacheManager:
     def init(self) -> None:
         """Initialize the Redis client."""
         if not self.is_configured:
-            logger.warning("Redis not configured, caching disabled")
+            if settings.UPSTASH_REDIS_REST_URL:
+                logger.warning(
+                    "UPSTASH_REDIS_REST_URL is set but REDIS_URL is not. The REST client "
+                    "was removed: set REDIS_URL to the Upstash rediss:// URL. "
+                    "Caching disabled"
+                )
+            else:
+                logger.warning("Redis not configured, caching disabled")
             return
 
         try:
-            from upstash_redis import Redis
+            from redis.asyncio import ConnectionPool, Redis
 
-            self._client = Redis(
-                url=settings.UPSTASH_REDIS_REST_URL,
-                token=settings.UPSTASH_REDIS_REST_TOKEN,
+            pool = ConnectionPool.from_url(
+                settings.REDIS_URL,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                decode_responses=False,  # values are bytes (msgpack models)
             )
+            self._client = Redis(connection_pool=pool)
             self._initialized = True
             logger.info("Redis cache initialized successfully")
         except ImportError:
-            logger.warning("upstash-redis not installed, caching disabled")
+            logger.warning("redis not installed, caching disabled")
             self._initialized = False
         except Exception as e:
             logger.error(f"Redis initialization failed: {e}")
             self._initialized = False
 
-    async def get(self, key: str) -> str | None:
+    async def close(self) -> None:
+        """Close the Redis client and its connection pool."""
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+        self._loaded_scripts.clear()
+        self._initialized = False
+
+    async def get(self, key: str) -> bytes | None:
         """
         Get a value from cache.
 
@@ -79,7 +114,7 @@ class CacheManager:
 
         start_time = time.perf_counter()
         try:
-            result = self._client.get(key)
+            result = await self._client.get(key)
             latency_ms = (time.perf_counter() - start_time) * 1000
 
             hit = result is not None
@@ -94,7 +129,7 @@ class CacheManager:
     async def set(
         self,
         key: str,
-        value: str,
+        value: str | bytes,
         ex: int | None = None,
     ) -> bool:
         """
@@ -113,24 +148,60 @@ class CacheManager:
 
         start_time = time.perf_counter()
         try:
-            self._client.setex(key, ex, value)
-            latency_ms = (time.perf_counter() - start_time) * 1000
-
-            logger.debug(
-                f"Cache SET: key={key[:50]} ttl={ex}s latency={latency_ms:.2f}ms"
-            )
+            await self._client.setex(key, ex, value)
+
+            # Skip the slicing and formatting entirely unless DEBUG is on
+            if logger.isEnabledFor(logging.DEBUG):
+                latency_ms = (time.perf_counter() - start_time) * 1000
+                logger.debug(
+                    "Cache SET: key=%s ttl=%ds latency=%.2fms", key[:50], ex, latency_ms
+                )
             return True
         except Exception as e:
             logger.error(f"Cache set error for key '{key[:50]}': {e}")
             return False
 
+    async def eval(self, script: str, keys: list[str], args: list[Any]) -> Any:
+        """
+        Run a Lua script atomically on the Redis server.
+
+        The first call sends the source with EVAL; later calls send only its
+        SHA1 with EVALSHA, falling back to EVAL if the server lost its script
+        cache (restart or failover).
+
+        Args:
+            script: Lua source
+            keys: Keys the script touches (KEYS[1..n])
+            args: Extra arguments (ARGV[1..n])
+
+        Returns:
+            The script's reply, or None if Redis is unavailable
+        """
+        if not self._initialized or not self._client:
+            return None
+        sha = _script_sha(script)
+        try:
+            if sha in self._loaded_scripts:
+                try:
+                    return await self._client.evalsha(sha, len(keys), *keys, *args)
+                except NoScriptError:
+                    self._loaded_scripts.discard(sha)
+            result = await self._client.eval(script, len(keys), *keys, *args)
+            self._loaded_scripts.add(sha)
+            return result
+        except Exception as e:
+            logger.error(f"Cache eval error for key '{keys[0][:50]}': {e}")
+            return None
+
     async def delete(self, key: str) -> bool:
         """Delete a value from cache."""
         if not self._initialized or not self._client:
             return False
+        _L0.pop(key, None)
         try:
-            self._client.delete(key)
-            logger.debug(f"Cache DELETE: key={key[:50]}")
+            await self._client.delete(key)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Cache DELETE: key=%s", key[:50])
             return True
         except Exception as e:
             logger.error(f"Cache delete error for key '{key[:50]}': {e}")
@@ -141,7 +212,7 @@ class CacheManager:
         if not self._initialized or not self._client:
             return False
         try:
-            return bool(self._client.exists(key))
+            return bool(await self._client.exists(key))
         except Exception as e:
             logger.error(f"Cache exists error: {e}")
             return False
@@ -151,7 +222,7 @@ class CacheManager:
         if not self._initialized or not self._client:
             return -1
         try:
-            return self._client.ttl(key)
+            return await self._client.ttl(key)
         except Exception as e:
             logger.error(f"Cache TTL error: {e}")
             return -1
@@ -180,9 +251,7 @@ class CacheManager:
         Returns:
             Cache key string
         """
-        rounded_lat = round(lat, precision)
-        rounded_lon = round(lon, precision)
-        return f"{prefix}:{rounded_lat}:{rounded_lon}"
+        return _grid_key(prefix, lat, lon, precision)
 
     def get_status(self) -> dict[str, Any]:
         """Get cache status for health checks."""
@@ -197,61 +266,220 @@ class CacheManager:
 # Cache Key Generators
 # ===========================================
 
+_GRID_SCALES = {0: 1, 1: 10, 2: 100, 3: 1000, 4: 10000}
+
+
+def _grid_key(prefix: str, lat: float, lon: float, precision: int) -> str:
+    """
+    Build a grid-cell key from coordinates scaled to integers.
+
+    `round(x * 10**p)` is an int round, much cheaper than `round(x, p)` and
+    its float formatting. The precision is part of the prefix so cells of
+    different grids never collide (e.g. "model2:-3345:-7065").
+    """
+    scale = _GRID_SCALES[precision]
+    return f"{prefix}{precision}:{round(lat * scale)}:{round(lon * scale)}"
+
+
 def make_solar_key(lat: float, lon: float, year: int = 2023) -> str:
     """Generate cache key for solar radiation data."""
-    return f"solar:{round(lat, 2)}:{round(lon, 2)}:{year}"
+    return f"{_grid_key('solar', lat, lon, 2)}:{year}"
 
 
 def make_model_key(lat: float, lon: float) -> str:
     """Generate cache key for interpolation model."""
-    return f"model:{round(lat, 2)}:{round(lon, 2)}"
+    return _grid_key("model", lat, lon, 2)
+
+
+@functools.lru_cache(maxsize=16)
+def _script_sha(script: str) -> str:
+    """SHA1 of a Lua script, as Redis identifies it for EVALSHA."""
+    return hashlib.sha1(script.encode()).hexdigest()
+
+
+def _hash_key(prefix: str, text: str) -> str:
+    """
+    Build a fixed-length key from a 64-bit BLAKE2b digest of free text.
+
+    64 bits keeps collisions negligible at millions of keys (a 32-bit CRC
+    would not), and the 11-character base64 digest bounds key size.
+    """
+    digest = hashlib.blake2b(text.encode(), digest_size=8).digest()
+    return f"{prefix}:{base64.urlsafe_b64encode(digest).decode().rstrip('=')}"
 
 
 def make_geosearch_key(query: str) -> str:
     """Generate cache key for geosearch results."""
-    # Normalize query for caching
-    normalized = query.lower().strip()[:100]
-    return f"geo:{normalized}"
+    # Normalize query for caching; hashing bounds the key length
+    return _hash_key("geo", query.lower().strip())
+
+
+# ===========================================
+# In-process L0 cache
+# ===========================================
+
+# Raw cached values for the hottest grid cells, kept briefly so repeated lookups
+# for the same cell skip the Redis round-trip. Access is never interleaved with
+# an await, so the event loop serializes it without a lock.
+_L0_MAX = 1024
+_L0_TTL_SECONDS = 30.0
+_L0: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+
+def _l0_get(key: str) -> bytes | None:
+    """Return a fresh L0 value and mark it recently used."""
+    entry = _L0.get(key)
+    if entry is None:
+        return None
+    stored_at, value = entry
+    if time.monotonic() - stored_at >= _L0_TTL_SECONDS:
+        del _L0[key]
+        return None
+    _L0.move_to_end(key)
+    return value
+
+
+def _l0_put(key: str, value: bytes) -> None:
+    """Store a value in L0, evicting the least recently used entries."""
+    _L0[key] = (time.monotonic(), value)
+    _L0.move_to_end(key)
+    while len(_L0) > _L0_MAX:
+        _L0.popitem(last=False)
+
+
+# ===========================================
+# Request coalescing
+# ===========================================
+
+# In-flight lookups by key. Check-and-insert never awaits, so the event loop
+# makes it atomic without a lock.
+_inflight: dict[str, asyncio.Task[Any]] = {}
+
+
+async def single_flight(key: str, fetch: Callable[[], Awaitable[T]]) -> T:
+    """
+    Coalesce concurrent calls for the same key into one fetch.
+
+    The first caller starts `fetch` as a task; callers arriving before it
+    finishes await the same task. The task is shielded, so a cancelled caller
+    does not cancel the fetch for the others.
+
+    Args:
+        key: Identity of the work being coalesced
+        fetch: Zero-argument coroutine function producing the result
+
+    Returns:
+        The shared result (or raises the shared exception)
+    """
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fetch())
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task)
 
 
 # ===========================================
 # Helper Functions
 # ===========================================
 
-async def get_cached_model(
+# Returns the cached value on a hit. On a miss, claims the fill lock with the
+# caller's token and returns 1, or returns 0 if another caller holds it.
+_GET_OR_LOCK_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if value then
+    return value
+end
+if redis.call('SET', KEYS[2], ARGV[1], 'EX', ARGV[2], 'NX') then
+    return 1
+end
+return 0
+"""
+
+# Deletes the fill lock only if it still holds the caller's token, so a filler
+# that overran its lock cannot release the next holder's.
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Tokens of the fill locks this process holds, by model key. A cell's lock
+# has one holder at a time, so one token per key is enough.
+_fill_tokens: dict[str, str] = {}
+
+
+async def get_model_or_lock(
     lat: float,
     lon: float,
-    radius_km: float = 5.0,
+    lock_ttl_seconds: int | None = None,
 ) -> dict[str, Any] | None:
     """
-    Get cached interpolation model for a location.
+    Get the fine-grid cached model, coordinating cache fills across workers.
 
-    Uses coordinate rounding to find cache hits within approximate radius.
+    The Redis read and the fill-lock claim happen in one EVAL round-trip. The
+    first caller to miss gets None and is expected to fill the cache, then
+    call release_model_lock(). Callers that miss while the lock is held poll
+    by re-running the same script: they return the model once it lands, or
+    claim the lock themselves if the filler released it without writing.
+
+    Within one process, concurrent callers for a cell should share a single
+    call through single_flight(), so only other workers ever poll.
 
     Args:
         lat: Latitude
         lon: Longitude
-        radius_km: Search radius (approximated by rounding precision)
+        lock_ttl_seconds: Lifetime of the fill lock and longest wait for
+            another filler (default MODEL_FILL_LOCK_SECONDS)
 
     Returns:
-        Cached interpolation model or None
+        Cached interpolation model, or None if the caller should fill it
     """
-    # Determine precision based on radius
-    # precision 2 ≈ 1.11km at equator
-    # precision 1 ≈ 11.1km at equator
-    precision = 2 if radius_km <= 5 else 1
+    if lock_ttl_seconds is None:
+        lock_ttl_seconds = settings.MODEL_FILL_LOCK_SECONDS
+
+    cache_key = make_model_key(lat, lon)
+    cached = _l0_get(cache_key)
+    if cached is not None:
+        return _unpack_model(cached)
+
+    lock_key = f"lock:{cache_key}"
+    token = secrets.token_hex(8)
+    deadline = time.monotonic() + lock_ttl_seconds
+    delay = 0.05
+    while True:
+        start_time = time.perf_counter()
+        result = await cache.eval(
+            _GET_OR_LOCK_SCRIPT, [cache_key, lock_key], [token, lock_ttl_seconds]
+        )
+        latency_ms = (time.perf_counter() - start_time) * 1000
+        hit = isinstance(result, bytes)
+        log_cache_operation("redis", "get_or_lock", cache_key, hit, latency_ms)
+
+        if hit:
+            model = _unpack_model(result)
+            if model is not None:
+                _l0_put(cache_key, result)
+            return model
+        if result == 1:
+            _fill_tokens[cache_key] = token
+            return None
+        if result != 0 or time.monotonic() >= deadline:
+            # Redis is unavailable, or the holder outlived its lock: fill unlocked
+            return None
 
-    cache_key = cache._make_cache_key(lat, lon, precision, prefix="model")
-    cached = await cache.get(cache_key)
+        # Another worker is filling this cell; wait for its write to land
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 0.5)
 
-    if cached:
-        try:
-            return json.loads(cached)
-        except json.JSONDecodeError:
-            logger.warning(f"Invalid JSON in cache for key: {cache_key}")
-            return None
 
-    return None
+async def release_model_lock(lat: float, lon: float) -> None:
+    """Release the fill lock claimed by get_model_or_lock(), if this process holds it."""
+    cache_key = make_model_key(lat, lon)
+    token = _fill_tokens.pop(cache_key, None)
+    if token is not None:
+        await cache.eval(_RELEASE_LOCK_SCRIPT, [f"lock:{cache_key}"], [token])
 
 
 async def set_cached_model(
@@ -263,6 +491,8 @@ async def set_cached_model(
     """
     Cache an interpolation model for a location.
 
+    Writes the fine-grid key read by `get_model_or_lock`.
+
     Args:
         lat: Latitude
         lon: Longitude
@@ -275,11 +505,11 @@ async def set_cached_model(
     if ttl_days is None:
         ttl_days = settings.DB_CACHE_TTL_DAYS
 
-    cache_key = cache._make_cache_key(lat, lon, precision=2, prefix="model")
-    model_json = json.dumps(model)
-    ttl_seconds = ttl_days * 86400
+    packed = _pack_model(model)
+    cache_key = make_model_key(lat, lon)
+    _l0_put(cache_key, packed)
 
-    return await cache.set(cache_key, model_json, ex=ttl_seconds)
+    return await cache.set(cache_key, packed, ex=ttl_days * 86400)
 
 
 async def get_cached_solar_data(
@@ -289,15 +519,55 @@ async def get_cached_solar_data(
 ) -> dict[str, Any] | None:
     """Get cached solar radiation data."""
     cache_key = make_solar_key(lat, lon, year)
+    cached = _l0_get(cache_key)
+    if cached is None:
+        return await single_flight(cache_key, lambda: _lookup_solar_data(cache_key))
+    return _loads_or_none(cached)
+
+
+async def _lookup_solar_data(cache_key: str) -> dict[str, Any] | None:
+    """Read solar data from Redis, remembering hits in L0."""
     cached = await cache.get(cache_key)
+    data = _loads_or_none(cached)
+    if data is not None:
+        _l0_put(cache_key, cached)
+    return data
+
+
+def _pack_model(model: dict[str, Any]) -> bytes:
+    """
+    Serialize an interpolation model to MessagePack.
+
+    Models are thousands of floats; MessagePack stores each in 9 bytes
+    instead of JSON's ~18 characters, roughly halving the payload.
+    """
+    return msgpack.packb(model, use_bin_type=True)
+
+
+def _unpack_model(cached: bytes) -> dict[str, Any] | None:
+    """Decode a cached model, accepting JSON written before MessagePack."""
+    try:
+        if cached[:1] == b"{":
+            return orjson.loads(cached)
+        return msgpack.unpackb(cached, raw=False)
+    except ValueError:
+        # msgpack and orjson decode errors both subclass ValueError
+        return None
+
+
+def _dumps(value: dict[str, Any]) -> bytes:
+    """Serialize a cache value to compact JSON."""
+    return orjson.dumps(value, default=str)
 
-    if cached:
-        try:
-            return json.loads(cached)
-        except json.JSONDecodeError:
-            return None
 
-    return None
+def _loads_or_none(cached: bytes | None) -> dict[str, Any] | None:
+    """Decode a cached JSON value, treating empty or invalid values as misses."""
+    if not cached:
+        return None
+    try:
+        return orjson.loads(cached)
+    except orjson.JSONDecodeError:
+        return None
 
 
 async def set_cached_solar_data(
@@ -312,7 +582,8 @@ async def set_cached_solar_data(
         ttl_seconds = settings.REDIS_TTL_SECONDS
 
     cache_key = make_solar_key(lat, lon, year)
-    data_json = json.dumps(data, default=str)
+    data_json = _dumps(data)
+    _l0_put(cache_key, data_json)
 
     return await cache.set(cache_key, data_json, ex=ttl_seconds)
 
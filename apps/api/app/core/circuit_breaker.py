@@ -19,9 +19,11 @@ Usage:
 
 import asyncio
 import logging
+import math
+import time
 from collections.abc import Callable
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import datetime
 from enum import Enum
 from typing import Any, TypeVar
 
@@ -31,6 +33,18 @@ logger = logging.getLogger(__name__)
 
 T = TypeVar("T")
 
+# Wall-clock/monotonic reference pair, used to render monotonic timestamps
+# as ISO datetimes only when status is requested.
+_WALL_REF = time.time()
+_MONO_REF = time.monotonic()
+
+
+def _monotonic_to_iso(timestamp: float | None) -> str | None:
+    """Convert a time.monotonic() timestamp to an ISO wall-clock string."""
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(_WALL_REF + (timestamp - _MONO_REF)).isoformat()
+
 
 class CircuitState(Enum):
     """Circuit breaker states."""
@@ -50,18 +64,22 @@ class CircuitOpenError(Exception):
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class CircuitBreakerMetrics:
-    """Metrics for circuit breaker monitoring."""
+    """
+    Metrics for circuit breaker monitoring.
+
+    Timestamps are time.monotonic() values; to_dict() renders them as ISO.
+    """
 
     total_requests: int = 0
     successful_requests: int = 0
     failed_requests: int = 0
     rejected_requests: int = 0  # Rejected due to open circuit
     state_changes: int = 0
-    last_state_change: datetime | None = None
-    last_failure: datetime | None = None
-    last_success: datetime | None = None
+    last_state_change: float | None = None
+    last_failure: float | None = None
+    last_success: float | None = None
 
     @property
     def success_rate(self) -> float:
@@ -79,12 +97,12 @@ class CircuitBreakerMetrics:
             "rejected_requests": self.rejected_requests,
             "success_rate": round(self.success_rate * 100, 2),
             "state_changes": self.state_changes,
-            "last_failure": self.last_failure.isoformat() if self.last_failure else None,
-            "last_success": self.last_success.isoformat() if self.last_success else None,
+            "last_failure": _monotonic_to_iso(self.last_failure),
+            "last_success": _monotonic_to_iso(self.last_success),
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class CircuitBreaker:
     """
     Circuit Breaker implementation for protecting external service calls.
@@ -93,7 +111,8 @@ class CircuitBreaker:
     - Automatic state transitions based on failure threshold
     - Recovery timeout for testing service availability
     - Metrics collection for monitoring
-    - Thread-safe operation using asyncio locks
+    - Lock-free fast path; the lock is only taken while the circuit is OPEN
+    - Slotted attributes for cheap access on every call
 
     Attributes:
         name: Identifier for this circuit breaker
@@ -103,26 +122,42 @@ class CircuitBreaker:
     """
 
     name: str
-    failure_threshold: int = field(
-        default_factory=lambda: settings.CIRCUIT_FAILURE_THRESHOLD
-    )
-    recovery_timeout: int = field(
-        default_factory=lambda: settings.CIRCUIT_RECOVERY_TIMEOUT
-    )
-    half_open_max_calls: int = field(
-        default_factory=lambda: settings.CIRCUIT_HALF_OPEN_MAX_CALLS
-    )
+    # Settings are read once, when the class is defined; services registered
+    # in _SERVICE_CONFIG pass their own values through for_service()
+    failure_threshold: int = settings.CIRCUIT_FAILURE_THRESHOLD
+    recovery_timeout: int = settings.CIRCUIT_RECOVERY_TIMEOUT
+    half_open_max_calls: int = settings.CIRCUIT_HALF_OPEN_MAX_CALLS
 
     # Internal state
     _state: CircuitState = field(default=CircuitState.CLOSED, init=False)
     _failure_count: int = field(default=0, init=False)
-    _last_failure_time: datetime | None = field(default=None, init=False)
+    _last_failure_time: float | None = field(default=None, init=False)  # monotonic
+    _recovery_deadline: float = field(default=0.0, init=False)  # monotonic
     _half_open_calls: int = field(default=0, init=False)
-    _lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False)
+    _lock: asyncio.Lock | None = field(default=None, init=False)  # created on first use
     _metrics: CircuitBreakerMetrics = field(
         default_factory=CircuitBreakerMetrics, init=False
     )
 
+    @classmethod
+    def for_service(cls, name: str) -> "CircuitBreaker":
+        """
+        Create a breaker using the thresholds registered for a service.
+
+        Args:
+            name: Service name, a key of _SERVICE_CONFIG
+
+        Returns:
+            CircuitBreaker configured for that service
+        """
+        failure_threshold, recovery_timeout, half_open_max_calls = _SERVICE_CONFIG[name]
+        return cls(
+            name=name,
+            failure_threshold=failure_threshold,
+            recovery_timeout=recovery_timeout,
+            half_open_max_calls=half_open_max_calls,
+        )
+
     @property
     def state(self) -> CircuitState:
         """Current circuit state."""
@@ -145,11 +180,7 @@ class CircuitBreaker:
 
     def _should_attempt_reset(self) -> bool:
         """Check if enough time has passed to attempt reset."""
-        if self._last_failure_time is None:
-            return True
-
-        elapsed = datetime.now() - self._last_failure_time
-        return elapsed > timedelta(seconds=self.recovery_timeout)
+        return time.monotonic() > self._recovery_deadline
 
     def _transition_to(self, new_state: CircuitState) -> None:
         """Transition to a new state with logging."""
@@ -157,7 +188,7 @@ class CircuitBreaker:
             old_state = self._state
             self._state = new_state
             self._metrics.state_changes += 1
-            self._metrics.last_state_change = datetime.now()
+            self._metrics.last_state_change = time.monotonic()
 
             logger.warning(
                 f"Circuit breaker '{self.name}' transitioned: "
@@ -168,7 +199,7 @@ class CircuitBreaker:
         """Handle successful call."""
         self._metrics.total_requests += 1
         self._metrics.successful_requests += 1
-        self._metrics.last_success = datetime.now()
+        self._metrics.last_success = time.monotonic()
 
         if self._state == CircuitState.HALF_OPEN:
             self._half_open_calls += 1
@@ -188,11 +219,13 @@ class CircuitBreaker:
         self._metrics.total_requests += 1
         self._metrics.failed_requests += 1
         self._failure_count += 1
-        self._last_failure_time = datetime.now()
+        self._last_failure_time = time.monotonic()
+        self._recovery_deadline = self._last_failure_time + self.recovery_timeout
         self._metrics.last_failure = self._last_failure_time
 
+        # Lazy %-formatting: only rendered if a handler accepts the record
         logger.warning(
-            f"Circuit breaker '{self.name}' failure #{self._failure_count}: {error}"
+            "Circuit breaker '%s' failure #%d: %s", self.name, self._failure_count, error
         )
 
         if self._state == CircuitState.HALF_OPEN:
@@ -229,23 +262,13 @@ class CircuitBreaker:
             CircuitOpenError: If circuit is open
             Exception: Original exception if func fails
         """
-        async with self._lock:
-            # Check if circuit is open
-            if self._state == CircuitState.OPEN:
-                if self._should_attempt_reset():
-                    # Try to recover
-                    self._transition_to(CircuitState.HALF_OPEN)
-                    self._half_open_calls = 0
-                    logger.info(
-                        f"Circuit breaker '{self.name}' attempting recovery (HALF_OPEN)"
-                    )
-                else:
-                    # Still in cooldown
-                    self._metrics.rejected_requests += 1
-                    retry_after = self.recovery_timeout - int(
-                        (datetime.now() - self._last_failure_time).total_seconds()
-                    )
-                    raise CircuitOpenError(self.name, max(1, retry_after))
+        # Fast path: CLOSED/HALF_OPEN calls go straight through. The state
+        # hooks below never await, so they run atomically on the event loop.
+        if self._state == CircuitState.OPEN:
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                self._check_open()
 
         # Execute the function
         try:
@@ -253,23 +276,37 @@ class CircuitBreaker:
                 result = await func(*args, **kwargs)
             else:
                 result = func(*args, **kwargs)
-
-            async with self._lock:
-                self._on_success()
-
-            return result
-
         except Exception as e:
-            async with self._lock:
-                self._on_failure(e)
+            self._on_failure(e)
             raise
 
+        self._on_success()
+        return result
+
+    def _check_open(self) -> None:
+        """Move an OPEN circuit to HALF_OPEN, or reject the call if cooling down."""
+        # Re-check under the lock: another task may have transitioned already
+        if self._state == CircuitState.OPEN:
+            if self._should_attempt_reset():
+                # Try to recover
+                self._transition_to(CircuitState.HALF_OPEN)
+                self._half_open_calls = 0
+                logger.info(
+                    f"Circuit breaker '{self.name}' attempting recovery (HALF_OPEN)"
+                )
+            else:
+                # Still in cooldown
+                self._metrics.rejected_requests += 1
+                retry_after = math.ceil(self._recovery_deadline - time.monotonic())
+                raise CircuitOpenError(self.name, max(1, retry_after))
+
     def reset(self) -> None:
         """Manually reset the circuit breaker to closed state."""
         self._state = CircuitState.CLOSED
         self._failure_count = 0
         self._half_open_calls = 0
         self._last_failure_time = None
+        self._recovery_deadline = 0.0
         logger.info(f"Circuit breaker '{self.name}' manually reset to CLOSED")
 
     def get_status(self) -> dict[str, Any]:
@@ -288,36 +325,22 @@ class CircuitBreaker:
 # Pre-configured Circuit Breakers
 # ===========================================
 
-# Circuit breaker for Copernicus API
-copernicus_breaker = CircuitBreaker(
-    name="copernicus",
-    failure_threshold=5,
-    recovery_timeout=60,
-    half_open_max_calls=2,
-)
-
-# Circuit breaker for PVGIS API
-pvgis_breaker = CircuitBreaker(
-    name="pvgis",
-    failure_threshold=3,
-    recovery_timeout=30,
-    half_open_max_calls=3,
-)
-
-# Circuit breaker for Gemini AI
-gemini_breaker = CircuitBreaker(
-    name="gemini",
-    failure_threshold=5,
-    recovery_timeout=30,
-    half_open_max_calls=2,
-)
+# (failure_threshold, recovery_timeout, half_open_max_calls) per service
+_SERVICE_CONFIG: dict[str, tuple[int, int, int]] = {
+    "copernicus": (5, 60, 2),  # Copernicus API
+    "pvgis": (3, 30, 3),       # PVGIS API
+    "gemini": (5, 30, 2),      # Gemini AI
+}
+
+_BREAKERS: dict[str, CircuitBreaker] = {
+    name: CircuitBreaker.for_service(name) for name in _SERVICE_CONFIG
+}
+
+copernicus_breaker = _BREAKERS["copernicus"]
+pvgis_breaker = _BREAKERS["pvgis"]
+gemini_breaker = _BREAKERS["gemini"]
 
 
 def get_all_breakers() -> dict[str, CircuitBreaker]:
     """Get all circuit breakers for monitoring."""
-    return {
-        "copernicus": copernicus_breaker,
-        "pvgis": pvgis_breaker,
-        "gemini": gemini_breaker,
-    }
-
+    return _BREAKERS
@@ -18,10 +18,21 @@ class Settings(BaseSettings):
     VERSION: str = "0.1.0"
     ENVIRONMENT: str = "development"
     DEBUG: bool = True
+    # Log output: "json" (one object per line) or "text"
+    LOG_FORMAT: str = "json"
+    # Share of successful requests logged individually (errors are always
+    # logged); unset means every request in DEBUG and none otherwise
+    REQUEST_LOG_SAMPLE_RATE: float | None = None
+    # Seconds between aggregate metrics log lines (0 disables)
+    METRICS_LOG_INTERVAL_SECONDS: int = 60
+    # Semaphore waits longer than this (ms) are logged as warnings
+    SEMAPHORE_WAIT_LOG_MS: int = 1000
 
     # Server
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    # Each worker keeps its own rate limiters, breakers and L0 cache
+    UVICORN_WORKERS: int = 1
 
     # CORS - Can be set as comma-separated string in env vars
     # Example: CORS_ORIGINS="https://sunny-2.vercel.app,https://*.vercel.app,http://localhost:3000"
@@ -41,8 +52,33 @@ class Settings(BaseSettings):
 
     # Database (PostgreSQL + PostGIS)
     DATABASE_URL: str = ""
+    # Startup migrations: "sync" (block startup), "async" (background), "skip" (CLI only)
+    MIGRATION_MODE: str = "skip"
+    # Connection pool; each in-flight request may hold one connection
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 30
+    DB_POOL_TIMEOUT: int = 10             # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800           # Seconds before a connection is replaced
+    DB_USE_NULL_POOL: bool = False        # For an upstream pooler (e.g. Neon pgbouncer)
+    # Stale connections are found by a background ping of idle connections
+    # instead of a SELECT 1 before every checkout (0 disables the ping)
+    DB_POOL_PRE_PING: bool = False
+    DB_PING_INTERVAL_SECONDS: int = 30
+    # Prepared statements kept per connection (0 for pgbouncer transaction mode)
+    DB_STATEMENT_CACHE_SIZE: int = 1024
+    # API key usage (last_used_at/total_requests) is written in batches
+    API_KEY_USAGE_FLUSH_SECONDS: float = 1.0
+    API_KEY_USAGE_FLUSH_EVENTS: int = 100
+    # Seconds an API key auth result is cached per worker (0 disables)
+    API_KEY_CACHE_TTL_SECONDS: float = 30.0
+    # Further seconds an expired auth result is still served while the DB is down
+    API_KEY_STALE_WHILE_ERROR_SECONDS: float = 600.0
 
     # Cache (Redis/Upstash)
+    # Example: REDIS_URL="rediss://default:<token>@xxx.upstash.io:6379"
+    REDIS_URL: str = ""
+    REDIS_MAX_CONNECTIONS: int = 20
+    # Deprecated: Upstash REST credentials, no longer used (only checked to warn)
     UPSTASH_REDIS_REST_URL: str = ""
     UPSTASH_REDIS_REST_TOKEN: str = ""
 
@@ -67,6 +103,7 @@ class Settings(BaseSettings):
     REDIS_TTL_SECONDS: int = 3600         # Hot cache: 1 hour
     DB_CACHE_TTL_DAYS: int = 30           # Warm cache: 30 days
     CACHE_RADIUS_KM: float = 5.0          # Geospatial cache radius
+    MODEL_FILL_LOCK_SECONDS: int = 60     # Cross-worker fill lock; outlasts a slow external fetch
 
     # ===========================================
     # Circuit Breaker Configuration
@@ -81,6 +118,9 @@ class Settings(BaseSettings):
     MAX_CONCURRENT_COPERNICUS: int = 5    # Parallel requests to Copernicus
     MAX_CONCURRENT_PVGIS: int = 10        # Parallel requests to PVGIS
     MAX_CONCURRENT_DB: int = 20           # Parallel database queries
+    # Latency targets for adaptive (AIMD) concurrency; 0 keeps the limit fixed
+    COPERNICUS_LATENCY_TARGET_MS: int = 60000
+    PVGIS_LATENCY_TARGET_MS: int = 10000
 
     # ===========================================
     # Cron Job Configuration
@@ -1,19 +1,72 @@
 """Database connection and session management."""
 
+import asyncio
+import functools
+import logging
 import ssl
 from collections.abc import AsyncGenerator
-from contextlib import asynccontextmanager
+from contextlib import AbstractAsyncContextManager, asynccontextmanager, nullcontext
 from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+# asyncpg rejects libpq-only params; SSL is configured via connect_args instead
+_DROPPED_PARAMS = frozenset({"sslmode", "channel_binding"})
+
+# URL schemes rewritten to the async driver; anything else passes through
+_SCHEME_MAP = {
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+@functools.lru_cache(maxsize=8)
+def to_asyncpg_url(url: str) -> str:
+    """
+    Convert a standard postgres:// URL to the asyncpg dialect.
+
+    Drops query params asyncpg does not understand (sslmode, channel_binding).
+    Results are cached, so the app and alembic parse each URL only once.
+    """
+    parts = urlsplit(url)
+    scheme = _SCHEME_MAP.get(parts.scheme, parts.scheme)
+    query = urlencode([
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in _DROPPED_PARAMS
+    ])
+    return urlunsplit(parts._replace(scheme=scheme, query=query))
+
+
+@functools.lru_cache(maxsize=1)
+def _relaxed_ssl_context() -> ssl.SSLContext:
+    """SSL context for Neon/Supabase, built once (loading the CA bundle is slow)."""
+    ssl_context = ssl.create_default_context()
+    ssl_context.check_hostname = False
+    ssl_context.verify_mode = ssl.CERT_NONE
+    return ssl_context
+
+
+def get_connect_args(url: str) -> dict[str, Any]:
+    """Get asyncpg connection arguments, enabling SSL for Neon/Supabase."""
+    if "neon.tech" in url or "supabase" in url:
+        return {"ssl": _relaxed_ssl_context()}
+    return {}
+
 
 class DatabaseManager:
     """Manages database connections and sessions."""
@@ -32,38 +85,33 @@ class DatabaseManager:
         if not self.is_configured:
             return
 
-        # Convert standard postgres:// URL to asyncpg format
-        db_url = settings.DATABASE_URL
-        if db_url.startswith("postgresql://"):
-            db_url = db_url.replace("postgresql://", "postgresql+asyncpg://", 1)
-        elif db_url.startswith("postgres://"):
-            db_url = db_url.replace("postgres://", "postgresql+asyncpg://", 1)
-
-        # Remove sslmode from URL (asyncpg handles SSL differently)
-        if "?" in db_url:
-            base_url, params = db_url.split("?", 1)
-            # Filter out sslmode and channel_binding params
-            filtered_params = "&".join(
-                p for p in params.split("&")
-                if not p.startswith("sslmode=") and not p.startswith("channel_binding=")
-            )
-            db_url = f"{base_url}?{filtered_params}" if filtered_params else base_url
-
-        # Configure SSL for Neon/Supabase connections
-        connect_args: dict[str, Any] = {}
-        if "neon.tech" in db_url or "supabase" in db_url:
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
-            connect_args["ssl"] = ssl_context
+        db_url = to_asyncpg_url(settings.DATABASE_URL)
+        connect_args = {
+            **get_connect_args(db_url),
+            # Hot queries are parsed and planned once per connection
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+
+        pool_args: dict[str, Any]
+        if settings.DB_USE_NULL_POOL:
+            # The platform pools upstream; open a connection per checkout
+            pool_args = {"poolclass": NullPool}
+        else:
+            pool_args = {
+                "poolclass": AsyncAdaptedQueuePool,
+                "pool_size": settings.DB_POOL_SIZE,
+                "max_overflow": settings.DB_MAX_OVERFLOW,
+                "pool_timeout": settings.DB_POOL_TIMEOUT,
+                "pool_recycle": settings.DB_POOL_RECYCLE,
+                "pool_pre_ping": settings.DB_POOL_PRE_PING,
+            }
 
         self._engine = create_async_engine(
             db_url,
             echo=settings.DEBUG,
-            pool_size=5,
-            max_overflow=10,
-            pool_pre_ping=True,
             connect_args=connect_args,
+            **pool_args,
         )
 
         self._session_factory = async_sessionmaker(
@@ -73,6 +121,57 @@ class DatabaseManager:
             autoflush=False,
         )
 
+    async def warm_up(self) -> int:
+        """
+        Open the pool's connections eagerly so first requests skip the handshake.
+
+        Runs one `SELECT 1` per pooled connection concurrently, forcing each to
+        be established. Failures are logged and do not abort startup.
+
+        Returns:
+            Number of connections that were established
+        """
+        if not self._engine or settings.DB_USE_NULL_POOL:
+            return 0
+        return await self._ping_connections(settings.DB_POOL_SIZE, "warm-up")
+
+    async def ping_idle(self) -> int:
+        """
+        Ping the pool's idle connections so dead ones are evicted off the request path.
+
+        A connection whose ping fails is invalidated by SQLAlchemy and replaced
+        on next use. Busy connections are left alone.
+
+        Returns:
+            Number of connections that answered
+        """
+        if not self._engine or settings.DB_USE_NULL_POOL:
+            return 0
+        idle = self._engine.pool.checkedin()  # type: ignore[attr-defined]
+        return await self._ping_connections(min(idle, settings.DB_POOL_SIZE), "keep-alive")
+
+    async def keep_alive(self, interval_seconds: float) -> None:
+        """Ping idle connections every `interval_seconds` (run as a background task)."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            await self.ping_idle()
+
+    async def _ping_connections(self, count: int, purpose: str) -> int:
+        """Run `count` concurrent `SELECT 1` checkouts; returns how many succeeded."""
+
+        async def _ping() -> None:
+            async with self._engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        results = await asyncio.gather(
+            *(_ping() for _ in range(count)),
+            return_exceptions=True,
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            logger.warning(f"Database {purpose}: {len(errors)} connections failed: {errors[0]}")
+        return len(results) - len(errors)
+
     async def close(self) -> None:
         """Close the database engine."""
         if self._engine:
@@ -92,6 +191,19 @@ class DatabaseManager:
                 await session.rollback()
                 raise
 
+    def session_scope(
+        self, session: AsyncSession | None = None
+    ) -> AbstractAsyncContextManager[AsyncSession]:
+        """
+        Use the caller's session, or open a new one for the block.
+
+        A caller's session is handed back as is (its owner commits); without
+        one this is session(), committing when the block exits.
+        """
+        if session is not None:
+            return nullcontext(session)
+        return self.session()
+
 
 # Global database manager instance
 db = DatabaseManager()
@@ -0,0 +1,35 @@
+"""
+Geographic helpers for proximity filters.
+
+Bounding boxes around a search radius are built in degrees: a degree of
+latitude is ~111 km everywhere, while a degree of longitude shrinks with
+cos(latitude).
+"""
+
+import math
+
+# Kilometres per degree of latitude (and of longitude at the equator)
+KM_PER_DEGREE = 111.0
+
+# Floor for cos(latitude) so boxes at the poles widen instead of dividing by zero
+_MIN_COS_LAT = 1e-6
+
+
+def cos_lat(lat: float) -> float:
+    """Longitude scale at a latitude: km per degree of longitude / KM_PER_DEGREE."""
+    return max(math.cos(math.radians(lat)), _MIN_COS_LAT)
+
+
+def bbox_offsets(lat: float, radius_km: float) -> tuple[float, float]:
+    """
+    Half-widths in degrees of a box enclosing a circle of `radius_km`.
+
+    Args:
+        lat: Latitude of the circle's centre
+        radius_km: Circle radius in kilometres
+
+    Returns:
+        Tuple of (latitude offset, longitude offset)
+    """
+    lat_offset = radius_km / KM_PER_DEGREE
+    return lat_offset, lat_offset / cos_lat(lat)
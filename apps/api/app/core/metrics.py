@@ -15,23 +15,131 @@ For production, these metrics can be exported to:
 - Any other observability platform
 """
 
+import asyncio
+import heapq
 import logging
+import queue
+import random
+import sys
+import threading
 import time
-from collections import defaultdict
+from collections import defaultdict, deque
+from collections.abc import AsyncIterator, Collection
 from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import UTC, datetime
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any
 
-# Configure structured logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s | %(levelname)s | %(name)s | %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+import orjson
+
+from app.core.config import settings
+
+# Optional: semaphore waits are added to the active span when installed
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None  # type: ignore[assignment]
+
+# ===========================================
+# Structured Logging
+# ===========================================
+
+_LOG_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+_LOG_DATEFMT = "%Y-%m-%d %H:%M:%S"
+
+# Attributes every LogRecord has; anything else was passed via `extra`
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message",
+    "asctime",
+}
+
+
+class JsonFormatter(logging.Formatter):
+    """Render each record as one JSON object, including its `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queue records unformatted so rendering happens on the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue never leaves the process, so the record needs no pickling prep
+        return record
+
+
+_log_listener: QueueListener | None = None
+_queue_handler: QueueHandler | None = None
+
+
+def configure_logging(log_format: str | None = None) -> None:
+    """
+    Route root logging through a queue drained by a background thread.
+
+    Request handlers only enqueue records; formatting and stream writes
+    happen on the listener thread. Like logging.basicConfig, this leaves an
+    already-configured root logger alone.
+
+    Args:
+        log_format: "json" or "text" (defaults to settings.LOG_FORMAT)
+    """
+    global _log_listener, _queue_handler
+
+    root = logging.getLogger()
+    if root.handlers:
+        return
+
+    stream_handler = logging.StreamHandler()
+    if (log_format or settings.LOG_FORMAT) == "text":
+        stream_handler.setFormatter(logging.Formatter(_LOG_FORMAT, _LOG_DATEFMT))
+    else:
+        stream_handler.setFormatter(JsonFormatter(datefmt=_LOG_DATEFMT))
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    _queue_handler = _DeferredQueueHandler(log_queue)
+    root.addHandler(_queue_handler)
+    root.setLevel(logging.INFO)
+
+    _log_listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _log_listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and log directly to the stream from then on."""
+    global _log_listener, _queue_handler
+
+    if _log_listener is None or _queue_handler is None:
+        return
+    _log_listener.stop()
+
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    for handler in _log_listener.handlers:
+        root.addHandler(handler)
+    _log_listener = None
+    _queue_handler = None
+
+
+configure_logging()
 
 logger = logging.getLogger("sunny2.metrics")
 
+# Number of counter lock shards (power of two)
+_LOCK_SHARDS = 16
+
 
 @dataclass
 class MetricsCollector:
@@ -44,14 +152,16 @@ class MetricsCollector:
     - Cache performance
     - Error rates
 
-    Thread-safe using simple counters (for MVP).
-    For production, use prometheus_client or similar.
+    Thread-safe: each metric key maps to one of a fixed set of locks, so
+    writes to different keys rarely contend (and free-threaded builds do
+    not lose updates). For production, use prometheus_client or similar.
     """
 
     # Request counters
     _request_counts: dict[str, int] = field(default_factory=lambda: defaultdict(int))
-    _request_latencies: dict[str, list[float]] = field(
-        default_factory=lambda: defaultdict(list)
+    # Bounded ring buffers: the oldest latencies drop off automatically
+    _request_latencies: dict[str, deque[float]] = field(
+        default_factory=lambda: defaultdict(lambda: deque(maxlen=1000))
     )
     _error_counts: dict[str, int] = field(default_factory=lambda: defaultdict(int))
 
@@ -59,19 +169,32 @@ class MetricsCollector:
     _external_calls: dict[str, dict[str, int]] = field(
         default_factory=lambda: defaultdict(lambda: {"success": 0, "error": 0})
     )
-    _external_latencies: dict[str, list[float]] = field(
-        default_factory=lambda: defaultdict(list)
+    _external_latencies: dict[str, deque[float]] = field(
+        default_factory=lambda: defaultdict(lambda: deque(maxlen=100))
     )
 
     # Cache metrics
     _cache_hits: dict[str, int] = field(default_factory=lambda: defaultdict(int))
     _cache_misses: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    # API key auth answered from the stale cache while the database failed
+    _stale_auth_served: int = field(default=0)
 
     # Rate limit metrics
     _rate_limit_hits: int = field(default=0)
 
-    # Start time for uptime calculation
-    _start_time: datetime = field(default_factory=datetime.now)
+    # time.monotonic() at startup for uptime; wall-clock copy for display only
+    _start_time: float = field(default_factory=time.monotonic)
+    _started_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+
+    # Sharded locks guarding the counters above, picked by key hash
+    _locks: tuple[threading.Lock, ...] = field(
+        default_factory=lambda: tuple(threading.Lock() for _ in range(_LOCK_SHARDS)),
+        repr=False,
+    )
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        """Get the lock shard guarding a metric key."""
+        return self._locks[hash(key) & (_LOCK_SHARDS - 1)]
 
     def record_request(
         self,
@@ -81,22 +204,29 @@ class MetricsCollector:
         latency_ms: float,
     ) -> None:
         """Record an API request."""
-        key = f"{method}:{endpoint}"
-        self._request_counts[key] += 1
-        self._request_latencies[key].append(latency_ms)
-
-        if status_code >= 400:
-            self._error_counts[key] += 1
+        key = _request_key(method, endpoint)
+        with self._lock_for(key):
+            self._request_counts[key] += 1
+            self._request_latencies[key].append(latency_ms)
+            if status_code >= 400:
+                self._error_counts[key] += 1
 
-        # Keep only last 1000 latencies to prevent memory growth
-        if len(self._request_latencies[key]) > 1000:
-            self._request_latencies[key] = self._request_latencies[key][-1000:]
+        # Counters above stay exact; successful requests are only sampled into logs
+        if status_code < 400 and not _sample_request_log():
+            return
 
-        # Log request
         log_level = logging.WARNING if status_code >= 400 else logging.INFO
         logger.log(
             log_level,
-            f"REQUEST | {method} {endpoint} | status={status_code} | latency={latency_ms:.2f}ms"
+            "REQUEST | %s %s | status=%d | latency=%.2fms",
+            method, endpoint, status_code, latency_ms,
+            extra={
+                "event": "request",
+                "method": method,
+                "endpoint": endpoint,
+                "status_code": status_code,
+                "latency_ms": latency_ms,
+            },
         )
 
     def record_external_call(
@@ -107,44 +237,131 @@ class MetricsCollector:
         error: str | None = None,
     ) -> None:
         """Record a call to an external service."""
-        if success:
-            self._external_calls[service]["success"] += 1
-        else:
-            self._external_calls[service]["error"] += 1
-
-        self._external_latencies[service].append(latency_ms)
-
-        # Keep only last 100 latencies per service
-        if len(self._external_latencies[service]) > 100:
-            self._external_latencies[service] = self._external_latencies[service][-100:]
+        with self._lock_for(service):
+            self._external_calls[service]["success" if success else "error"] += 1
+            self._external_latencies[service].append(latency_ms)
 
         # Log external call
         log_level = logging.INFO if success else logging.WARNING
-        message = f"EXTERNAL | {service} | success={success} | latency={latency_ms:.2f}ms"
+        extra = {
+            "event": "external_call",
+            "service": service,
+            "success": success,
+            "latency_ms": latency_ms,
+            "error": error,
+        }
         if error:
-            message += f" | error={error}"
-        logger.log(log_level, message)
+            logger.log(
+                log_level,
+                "EXTERNAL | %s | success=%s | latency=%.2fms | error=%s",
+                service, success, latency_ms, error,
+                extra=extra,
+            )
+        else:
+            logger.log(
+                log_level,
+                "EXTERNAL | %s | success=%s | latency=%.2fms",
+                service, success, latency_ms,
+                extra=extra,
+            )
 
     def record_cache_hit(self, layer: str) -> None:
         """Record a cache hit."""
-        self._cache_hits[layer] += 1
-        logger.debug(f"CACHE | HIT | layer={layer}")
+        with self._lock_for(layer):
+            self._cache_hits[layer] += 1
+        logger.debug("CACHE | HIT | layer=%s", layer)
 
     def record_cache_miss(self, layer: str) -> None:
         """Record a cache miss."""
-        self._cache_misses[layer] += 1
-        logger.debug(f"CACHE | MISS | layer={layer}")
+        with self._lock_for(layer):
+            self._cache_misses[layer] += 1
+        logger.debug("CACHE | MISS | layer=%s", layer)
 
     def record_cache_error(self, layer: str) -> None:
         """Record a cache error (counts as miss)."""
-        self._cache_misses[layer] += 1
-        self._error_counts[f"cache:{layer}"] += 1
-        logger.warning(f"CACHE | ERROR | layer={layer}")
+        with self._lock_for(layer):
+            self._cache_misses[layer] += 1
+        error_key = f"cache:{layer}"
+        with self._lock_for(error_key):
+            self._error_counts[error_key] += 1
+        logger.warning("CACHE | ERROR | layer=%s", layer)
+
+    def record_stale_auth(self) -> None:
+        """Record an API key auth served from the stale cache."""
+        with self._locks[0]:
+            self._stale_auth_served += 1
+        logger.warning(
+            "AUTH | STALE | database unavailable, serving cached API key",
+            extra={"event": "stale_auth"},
+        )
 
     def record_rate_limit(self, identifier: str) -> None:
         """Record a rate limit hit."""
-        self._rate_limit_hits += 1
-        logger.warning(f"RATE_LIMIT | identifier={identifier}")
+        with self._locks[0]:
+            self._rate_limit_hits += 1
+        logger.warning(
+            "RATE_LIMIT | identifier=%s", identifier,
+            extra={"event": "rate_limit", "identifier": identifier},
+        )
+
+    async def render_prometheus(self) -> AsyncIterator[bytes]:
+        """
+        Stream counters in the Prometheus text exposition format.
+
+        Yields one chunk per metric family straight from the live counters,
+        so a scrape never builds the nested summary dict.
+        """
+        yield _prometheus_family(
+            "sunny2_uptime_seconds", "gauge", "Seconds since the process started",
+            [("", int(time.monotonic() - self._start_time))],
+        )
+
+        request_keys = [
+            (key, *key.split(":", 1)) for key in list(self._request_counts)
+        ]
+        yield _prometheus_family(
+            "sunny2_requests_total", "counter", "API requests by route",
+            [
+                (_labels(method=method, endpoint=endpoint), self._request_counts[key])
+                for key, method, endpoint in request_keys
+            ],
+        )
+        yield _prometheus_family(
+            "sunny2_request_errors_total", "counter", "API responses with status >= 400",
+            [
+                (_labels(method=method, endpoint=endpoint), self._error_counts.get(key, 0))
+                for key, method, endpoint in request_keys
+            ],
+        )
+
+        yield _prometheus_family(
+            "sunny2_external_calls_total", "counter", "External API calls by outcome",
+            [
+                (_labels(service=service, outcome=outcome), count)
+                for service, counts in list(self._external_calls.items())
+                for outcome, count in list(counts.items())
+            ],
+        )
+
+        yield _prometheus_family(
+            "sunny2_cache_hits_total", "counter", "Cache hits by layer",
+            [(_labels(layer=layer), n) for layer, n in list(self._cache_hits.items())],
+        )
+        yield _prometheus_family(
+            "sunny2_cache_misses_total", "counter", "Cache misses by layer",
+            [(_labels(layer=layer), n) for layer, n in list(self._cache_misses.items())],
+        )
+
+        yield _prometheus_family(
+            "sunny2_api_key_auth_stale_served_total", "counter",
+            "API key auths served from cache during a database outage",
+            [("", self._stale_auth_served)],
+        )
+
+        yield _prometheus_family(
+            "sunny2_rate_limits_triggered_total", "counter", "Requests rejected by rate limiting",
+            [("", self._rate_limit_hits)],
+        )
 
     def get_metrics_summary(self) -> dict[str, Any]:
         """Get summary of all collected metrics."""
@@ -162,25 +379,26 @@ class MetricsCollector:
 
         # Calculate external service stats
         external_stats = {}
-        for service, counts in self._external_calls.items():
+        for service, live_counts in list(self._external_calls.items()):
+            with self._lock_for(service):
+                counts = dict(live_counts)
+                latencies = list(self._external_latencies.get(service, ()))
             total = counts["success"] + counts["error"]
-            latencies = self._external_latencies.get(service, [])
             external_stats[service] = {
                 "total_calls": total,
                 "success": counts["success"],
                 "errors": counts["error"],
                 "success_rate": round(counts["success"] / total * 100, 2) if total > 0 else 0,
                 "avg_latency_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0,
-                "p95_latency_ms": round(
-                    sorted(latencies)[int(len(latencies) * 0.95)] if latencies else 0, 2
-                ),
+                "p95_latency_ms": round(_percentile(latencies, 0.95), 2),
             }
 
         # Calculate request stats
         request_stats = {}
-        for endpoint, count in self._request_counts.items():
-            latencies = self._request_latencies.get(endpoint, [])
-            errors = self._error_counts.get(endpoint, 0)
+        for endpoint, count in list(self._request_counts.items()):
+            with self._lock_for(endpoint):
+                latencies = list(self._request_latencies.get(endpoint, ()))
+                errors = self._error_counts.get(endpoint, 0)
             request_stats[endpoint] = {
                 "total": count,
                 "errors": errors,
@@ -188,17 +406,70 @@ class MetricsCollector:
                 "avg_latency_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0,
             }
 
-        uptime = datetime.now() - self._start_time
-
         return {
-            "uptime_seconds": int(uptime.total_seconds()),
+            "started_at": self._started_at.isoformat(),
+            "uptime_seconds": int(time.monotonic() - self._start_time),
             "requests": request_stats,
             "external_services": external_stats,
             "cache": cache_stats,
+            "api_key_auth_stale_served": self._stale_auth_served,
             "rate_limits_triggered": self._rate_limit_hits,
         }
 
 
+# Interned "METHOD:endpoint" keys; endpoints are route templates, so this stays small
+_REQUEST_KEYS: dict[tuple[str, str], str] = {}
+
+
+_LABEL_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n"})
+
+
+def _labels(**labels: str) -> str:
+    """Render a Prometheus label set, escaping values."""
+    rendered = ",".join(
+        f'{name}="{value.translate(_LABEL_ESCAPES)}"' for name, value in labels.items()
+    )
+    return "{" + rendered + "}"
+
+
+def _prometheus_family(
+    name: str, kind: str, help_text: str, samples: list[tuple[str, int]]
+) -> bytes:
+    """Render one metric family (HELP, TYPE and its samples) as bytes."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{labels} {value}" for labels, value in samples)
+    return ("\n".join(lines) + "\n").encode()
+
+
+def _request_key(method: str, endpoint: str) -> str:
+    """Get the interned counter key for a route, building it on first use."""
+    key = _REQUEST_KEYS.get((method, endpoint))
+    if key is None:
+        key = _REQUEST_KEYS[(method, endpoint)] = sys.intern(f"{method}:{endpoint}")
+    return key
+
+
+def _sample_request_log() -> bool:
+    """Decide whether a successful request gets its own log line."""
+    rate = settings.REQUEST_LOG_SAMPLE_RATE
+    if rate is None:
+        return settings.DEBUG
+    return rate >= 1.0 or random.random() < rate
+
+
+def _percentile(values: Collection[float], quantile: float) -> float:
+    """
+    Nearest-rank percentile, same rank as `sorted(values)[int(n * quantile)]`.
+
+    Selects only the top (n - rank) values with a heap instead of sorting
+    all of them, which for high percentiles is a small fraction of n.
+    """
+    if not values:
+        return 0
+    rank = int(len(values) * quantile)
+    return heapq.nlargest(len(values) - rank, values)[-1]
+
+
 # Global metrics instance
 metrics = MetricsCollector()
 
@@ -257,6 +528,46 @@ async def track_external_call(service: str):
         metrics.record_external_call(service, success, latency_ms, error_msg)
 
 
+def record_semaphore_wait(name: str, wait_ms: float) -> None:
+    """
+    Report time spent queued for a semaphore permit.
+
+    The wait is recorded as an event on the active OpenTelemetry span (and so
+    on the request's trace) when opentelemetry is installed, and logged once
+    it exceeds SEMAPHORE_WAIT_LOG_MS.
+    """
+    if otel_trace is not None:
+        otel_trace.get_current_span().add_event(
+            f"semaphore.{name}.wait", {"wait_ms": wait_ms}
+        )
+    if wait_ms > settings.SEMAPHORE_WAIT_LOG_MS:
+        logger.warning(
+            "Slow semaphore wait | %s | %.0fms", name, wait_ms,
+            extra={"event": "semaphore_wait", "semaphore": name, "wait_ms": round(wait_ms, 1)},
+        )
+
+
+async def log_metrics_periodically(interval_seconds: float) -> None:
+    """
+    Log an aggregate metrics summary every `interval_seconds`.
+
+    Stands in for per-request lines when request logs are sampled; run it
+    as a background task and cancel it at shutdown.
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        summary = metrics.get_metrics_summary()
+        requests = summary["requests"].values()
+        logger.info(
+            "METRICS | requests=%d | errors=%d | rate_limits=%d | uptime=%ds",
+            sum(r["total"] for r in requests),
+            sum(r["errors"] for r in requests),
+            summary["rate_limits_triggered"],
+            summary["uptime_seconds"],
+            extra={"event": "metrics_summary", **summary},
+        )
+
+
 def log_solar_request(
     lat: float,
     lon: float,
@@ -266,8 +577,16 @@ def log_solar_request(
 ) -> None:
     """Log a solar data request with structured data."""
     logger.info(
-        f"SOLAR_REQUEST | lat={lat:.4f} lon={lon:.4f} | "
-        f"source={source} | cache_hit={cache_hit} | latency={latency_ms:.2f}ms"
+        "SOLAR_REQUEST | lat=%.4f lon=%.4f | source=%s | cache_hit=%s | latency=%.2fms",
+        lat, lon, source, cache_hit, latency_ms,
+        extra={
+            "event": "solar_request",
+            "lat": lat,
+            "lon": lon,
+            "source": source,
+            "cache_hit": cache_hit,
+            "latency_ms": latency_ms,
+        },
     )
 
 
@@ -275,7 +594,8 @@ def log_rate_limit_exceeded(identifier: str, limit: str) -> None:
     """Log when rate limit is exceeded."""
     metrics.record_rate_limit(identifier)
     logger.warning(
-        f"RATE_LIMIT_EXCEEDED | identifier={identifier} | limit={limit}"
+        "RATE_LIMIT_EXCEEDED | identifier=%s | limit=%s", identifier, limit,
+        extra={"event": "rate_limit_exceeded", "identifier": identifier, "limit": limit},
     )
 
 
@@ -285,9 +605,15 @@ def log_circuit_breaker_event(
     details: dict | None = None,
 ) -> None:
     """Log circuit breaker state changes."""
-    details_str = f" | details={details}" if details else ""
     logger.warning(
-        f"CIRCUIT_BREAKER | name={breaker_name} | event={event}{details_str}"
+        "CIRCUIT_BREAKER | name=%s | event=%s%s",
+        breaker_name, event, f" | details={details}" if details else "",
+        extra={
+            "event": "circuit_breaker",
+            "breaker": breaker_name,
+            "breaker_event": event,
+            "details": details,
+        },
     )
 
 
@@ -298,14 +624,23 @@ def log_cache_operation(
     hit: bool,
     latency_ms: float | None = None,
 ) -> None:
-    """Log cache operations."""
+    """
+    Log cache operations.
+
+    Hit/miss counters are always exact; the per-operation line is only
+    formatted when DEBUG is enabled, keeping cache hits cheap in production.
+    """
     if hit:
         metrics.record_cache_hit(layer)
     else:
         metrics.record_cache_miss(layer)
 
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+
     latency_str = f" | latency={latency_ms:.2f}ms" if latency_ms else ""
     logger.debug(
-        f"CACHE | layer={layer} | op={operation} | key={key[:50]} | hit={hit}{latency_str}"
+        "CACHE | layer=%s | op=%s | key=%.50s | hit=%s%s",
+        layer, operation, key, hit, latency_str,
     )
 
@@ -0,0 +1,101 @@
+"""
+Startup database migrations.
+
+Runs Alembic's `upgrade head` from the application lifespan according to
+MIGRATION_MODE:
+- sync: block startup until migrations finish
+- async: serve requests immediately and migrate in a background task
+- skip: leave migrations to the alembic CLI
+
+The current status is kept in `migration_state` and reported by /api/health.
+"""
+
+import asyncio
+import logging
+from enum import Enum
+from pathlib import Path
+from typing import Any
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Key for pg_try_advisory_lock so only one replica migrates at a time
+MIGRATION_LOCK_ID = 0x73756E6E79  # "sunny"
+
+_API_ROOT = Path(__file__).resolve().parents[2]
+
+
+class MigrationStatus(str, Enum):
+    """Startup migration states."""
+
+    SKIPPED = "skipped"
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+migration_state: dict[str, Any] = {
+    "status": (
+        MigrationStatus.SKIPPED if settings.MIGRATION_MODE == "skip"
+        else MigrationStatus.PENDING
+    ),
+    "error": None,
+}
+
+# Strong reference to the background task so it is not garbage collected
+_migration_task: asyncio.Task[None] | None = None
+
+
+def _upgrade_head() -> None:
+    """Run `alembic upgrade head` against the configured database."""
+    from alembic import command
+    from alembic.config import Config
+
+    # No ini file: env.py then leaves the application's logging config alone
+    config = Config()
+    config.set_main_option("script_location", str(_API_ROOT / "alembic"))
+    command.upgrade(config, "head")
+
+
+async def run_migrations() -> None:
+    """
+    Upgrade the database to head, recording progress in `migration_state`.
+
+    Alembic's env.py drives its own event loop, so the upgrade runs in a
+    worker thread. Failures are logged and recorded, never raised.
+    """
+    migration_state["status"] = MigrationStatus.RUNNING
+    migration_state["error"] = None
+    try:
+        await asyncio.to_thread(_upgrade_head)
+    except Exception as e:
+        migration_state["status"] = MigrationStatus.FAILED
+        migration_state["error"] = str(e)[:200]
+        logger.error(f"Database migration failed: {e}")
+        return
+    migration_state["status"] = MigrationStatus.SUCCEEDED
+    logger.info("Database migrations applied")
+
+
+async def start_migrations(mode: str | None = None) -> None:
+    """
+    Run startup migrations according to MIGRATION_MODE.
+
+    Args:
+        mode: Override for settings.MIGRATION_MODE (sync, async or skip)
+    """
+    global _migration_task
+
+    mode = mode or settings.MIGRATION_MODE
+    if mode == "skip":
+        migration_state["status"] = MigrationStatus.SKIPPED
+        return
+    if mode == "async":
+        migration_state["status"] = MigrationStatus.PENDING
+        _migration_task = asyncio.create_task(run_migrations())
+        return
+    if mode != "sync":
+        logger.warning(f"Unknown MIGRATION_MODE '{mode}', running migrations synchronously")
+    await run_migrations()
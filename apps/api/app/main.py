@@ -4,57 +4,100 @@ sunny-2 API - Solar Generation Estimator
 High-precision solar diagnostics powered by Copernicus CDSE and Gemini 2.0
 """
 
+import asyncio
+import logging
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
+import orjson
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 from slowapi.errors import RateLimitExceeded
 
 from app.core.config import settings
 from app.middleware.rate_limit import limiter, rate_limit_exceeded_handler
 from app.routers import analyses, api_keys, cron, estimate, geosearch, health, progress
 
+logger = logging.getLogger("sunny2.lifespan")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Application lifespan handler for startup/shutdown events."""
     from app.core.cache import cache
     from app.core.database import db
+    from app.core.metrics import log_metrics_periodically, shutdown_logging
+    from app.core.migrations import start_migrations
+    from app.repositories.api_keys_repository import api_keys_repository
+    from app.repositories.cache_repository import cache_repository
     from app.services.ai_consultant import ai_consultant
 
     # Startup
-    print(f"🌞 Starting sunny-2 API v{settings.VERSION}")
-    print(f"📡 Environment: {settings.ENVIRONMENT}")
+    logger.info(
+        "Starting sunny-2 API v%s (%s)", settings.VERSION, settings.ENVIRONMENT,
+        extra={"event": "startup", "version": settings.VERSION, "env": settings.ENVIRONMENT},
+    )
 
     # Initialize database connection
     if db.is_configured:
         db.init()
-        print("🗄️ Database connection initialized")
+        warmed = await db.warm_up()
+        logger.info("Database connection initialized (%d pooled connections warmed)", warmed)
+        await start_migrations()
+        logger.info("Migrations: %s", settings.MIGRATION_MODE)
+        has_postgis = await cache_repository.detect_postgis()
+        logger.info("PostGIS %s", "available" if has_postgis else "not installed, using bbox")
     else:
-        print("⚠️ Database not configured (set DATABASE_URL)")
+        logger.warning("Database not configured (set DATABASE_URL)")
 
-    # Initialize Redis cache
+    # Initialize Redis cache (init() also warns about legacy Upstash REST settings)
+    cache.init()
     if cache.is_configured:
-        cache.init()
-        print("📦 Redis cache initialized")
+        logger.info("Redis cache initialized")
     else:
-        print("⚠️ Redis not configured (set UPSTASH_REDIS_REST_URL)")
+        logger.warning("Redis not configured (set REDIS_URL)")
 
     # Initialize AI consultant (Gemini)
     if ai_consultant.is_configured:
         ai_consultant.init()
-        print("🤖 AI Consultant (Gemini 2.0) initialized")
+        logger.info("AI Consultant (Gemini 2.0) initialized")
     else:
-        print("⚠️ AI Consultant not configured (set GEMINI_API_KEY)")
+        logger.warning("AI Consultant not configured (set GEMINI_API_KEY)")
+
+    # Aggregate metrics log line (request logs may be sampled)
+    background_tasks: list[asyncio.Task[None]] = []
+    if settings.METRICS_LOG_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(
+            log_metrics_periodically(settings.METRICS_LOG_INTERVAL_SECONDS)
+        ))
+
+    # Keep pooled connections alive off the request path (replaces pool_pre_ping)
+    if db.is_configured and settings.DB_PING_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(
+            db.keep_alive(settings.DB_PING_INTERVAL_SECONDS)
+        ))
+
+    # Batch API key usage writes instead of an UPDATE per request
+    if db.is_configured:
+        background_tasks.append(asyncio.create_task(
+            api_keys_repository.flush_usage_periodically(settings.API_KEY_USAGE_FLUSH_SECONDS)
+        ))
 
     yield
 
-    # Shutdown
+    # Shutdown: let cancelled tasks unwind before the final flush closes the pool
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
     if db.is_configured:
+        await api_keys_repository.flush_usage()
         await db.close()
-    print("🌙 Shutting down sunny-2 API")
+    if cache.is_configured:
+        await cache.close()
+    logger.info("Shutting down sunny-2 API", extra={"event": "shutdown"})
+    # Flush the log queue last so the shutdown line is written
+    shutdown_logging()
 
 
 app = FastAPI(
@@ -83,16 +126,20 @@ High-precision solar diagnostics powered by:
 # CORS Configuration
 # CORS_ORIGINS can be set as comma-separated string: "https://domain1.com,https://domain2.com"
 # FRONTEND_URL is automatically added if set
-cors_origins = settings.cors_origins_list.copy()
-if settings.FRONTEND_URL:
-    cors_origins.append(settings.FRONTEND_URL)
+# Frozen at import so the middleware never copies or rebuilds it per request
+cors_origins = tuple(
+    settings.cors_origins_list + ([settings.FRONTEND_URL] if settings.FRONTEND_URL else [])
+)
+# Explicit lists let preflight use a set lookup instead of echoing every request header
+CORS_ALLOW_METHODS = ("GET", "POST", "PATCH", "DELETE", "OPTIONS")
+CORS_ALLOW_HEADERS = ("content-type", "authorization", "x-api-key", "x-admin-key", "x-request-id")
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=cors_origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=CORS_ALLOW_METHODS,
+    allow_headers=CORS_ALLOW_HEADERS,
     allow_origin_regex=r"https://.*\.vercel\.app",  # Allow all Vercel preview deploys
 )
 
@@ -110,28 +157,37 @@ app.include_router(analyses.router)
 app.include_router(cron.router)
 
 
+# Static payload, serialized once
+_ROOT_BODY = orjson.dumps({
+    "name": "sunny-2 API",
+    "version": settings.VERSION,
+    "description": "Solar Generation Estimator - Powered by Copernicus & Gemini 2.0",
+    "docs": "/docs",
+    "health": "/api/health",
+})
+
+
 @app.get("/", include_in_schema=False)
-async def root() -> JSONResponse:
+async def root() -> Response:
     """Root endpoint - API information."""
-    return JSONResponse(
-        content={
-            "name": "sunny-2 API",
-            "version": settings.VERSION,
-            "description": "Solar Generation Estimator - Powered by Copernicus & Gemini 2.0",
-            "docs": "/docs",
-            "health": "/api/health",
-        }
-    )
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 
 def main() -> None:
     """Entry point for running the API server."""
+    import sys
+
     import uvicorn
 
     uvicorn.run(
         "app.main:app",
         host=settings.HOST,
         port=settings.PORT,
+        # uvloop is POSIX-only; "auto" falls back to the stdlib loop on Windows
+        loop="auto" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        # Workers are separate processes (SO_REUSEPORT); reload needs a single one
+        workers=1 if settings.DEBUG else settings.UVICORN_WORKERS,
         reload=settings.DEBUG,
         log_level="debug" if settings.DEBUG else "info",
     )
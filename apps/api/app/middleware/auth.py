@@ -5,6 +5,8 @@ import secrets
 from fastapi import Request
 from fastapi.security import APIKeyHeader
 
+from app.models.api_keys import hash_api_key
+
 # API Key header configuration
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
@@ -35,19 +37,26 @@ def get_api_key_or_ip(request: Request) -> str:
     """
     Get identifier for rate limiting.
 
-    Uses API key if present, otherwise falls back to IP address.
+    Uses the API key's SHA-256 digest if a key is present, so raw keys never
+    reach the limiter's Redis storage, otherwise falls back to IP address.
+    The result is cached on request.state, since the limiter, the 429 handler
+    and logging may all ask for it during one request.
     """
+    cached: str | None = getattr(request.state, "rate_limit_identifier", None)
+    if cached is not None:
+        return cached
+
     api_key = request.headers.get("X-API-Key")
     if api_key:
-        return f"key:{api_key}"
-
-    # Fallback to IP
-    forwarded = request.headers.get("X-Forwarded-For")
-    if forwarded:
-        return f"ip:{forwarded.split(',')[0].strip()}"
-
-    client_host = request.client.host if request.client else "unknown"
-    return f"ip:{client_host}"
+        identifier = f"key:{hash_api_key(api_key).hex()}"
+    elif forwarded := request.headers.get("X-Forwarded-For"):
+        # Fallback to IP
+        identifier = f"ip:{forwarded.split(',', 1)[0].strip()}"
+    else:
+        identifier = f"ip:{request.client.host if request.client else 'unknown'}"
+
+    request.state.rate_limit_identifier = identifier
+    return identifier
 
 
 def generate_api_key() -> str:
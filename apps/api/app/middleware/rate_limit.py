@@ -10,63 +10,91 @@ Also includes internal rate limiters for external API calls.
 """
 
 import asyncio
+import time
+import uuid
+from collections import deque
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
 
-from fastapi import Request
-from fastapi.responses import JSONResponse
+import orjson
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
 from slowapi import Limiter
 from slowapi.errors import RateLimitExceeded
 
+from app.core.cache import cache
 from app.core.config import settings
-from app.core.metrics import log_rate_limit_exceeded
+from app.core.metrics import log_rate_limit_exceeded, record_semaphore_wait
 from app.middleware.auth import get_api_key_or_ip
 
 # ===========================================
 # API Rate Limiter (SlowAPI)
 # ===========================================
 
-# Create limiter with custom key function
-limiter = Limiter(key_func=get_api_key_or_ip)
+# Counters live in Redis when configured so every worker and replica shares
+# one quota; fixed-window costs a single INCR+EXPIRE per check. If Redis is
+# unreachable SlowAPI falls back to per-process memory instead of failing.
+limiter = Limiter(
+    key_func=get_api_key_or_ip,
+    storage_uri=settings.REDIS_URL or "memory://",
+    strategy="fixed-window",
+    key_prefix="rl",
+    in_memory_fallback_enabled=bool(settings.REDIS_URL),
+)
 
 
-def get_rate_limit_string(request: Request) -> str:
-    """
-    Get appropriate rate limit based on request authentication.
+# Limit strings are fixed at startup, so build them once
+_ANONYMOUS_LIMIT = f"{settings.RATE_LIMIT_ANONYMOUS}/minute"
+_API_KEY_LIMIT = f"{settings.RATE_LIMIT_PER_MINUTE}/minute"
 
-    Returns rate limit string for SlowAPI.
+
+def get_rate_limit_for_key(key: str) -> str:
     """
-    api_key = request.headers.get("X-API-Key")
+    Get the rate limit for an identifier from get_api_key_or_ip.
 
-    if not api_key:
+    SlowAPI passes the limiter key to providers that take a `key` argument,
+    so use as `@limiter.limit(get_rate_limit_for_key)`; no headers are read.
+    """
+    if key.startswith("ip:"):
         # Anonymous - strictest limits
-        return f"{settings.RATE_LIMIT_ANONYMOUS}/minute"
+        return _ANONYMOUS_LIMIT
 
     # TODO: Check database for API key tier
     # For MVP, all authenticated users get standard limit
-    return f"{settings.RATE_LIMIT_PER_MINUTE}/minute"
+    return _API_KEY_LIMIT
+
+
+def get_rate_limit_string(request: Request) -> str:
+    """
+    Get appropriate rate limit based on request authentication.
+
+    Returns rate limit string for SlowAPI.
+    """
+    return get_rate_limit_for_key(get_api_key_or_ip(request))
 
 
 async def rate_limit_exceeded_handler(
     request: Request,
     exc: RateLimitExceeded,
-) -> JSONResponse:
+) -> Response:
     """Handle rate limit exceeded errors with RFC 7807 format."""
     identifier = get_api_key_or_ip(request)
     log_rate_limit_exceeded(identifier, str(exc.detail))
 
     retry_after = getattr(exc, "retry_after", 60)
 
-    return JSONResponse(
+    return Response(
         status_code=429,
-        content={
+        content=orjson.dumps({
             "type": "https://api.sunny-2.com/errors/rate-limit-exceeded",
             "title": "Too Many Requests",
             "status": 429,
             "detail": f"Rate limit exceeded: {exc.detail}. Please wait before retrying.",
             "instance": str(request.url),
             "retry_after": retry_after,
-        },
+        }),
+        media_type="application/json",
         headers={
             "Retry-After": str(retry_after),
             "X-RateLimit-Limit": str(settings.RATE_LIMIT_PER_MINUTE),
@@ -79,13 +107,41 @@ async def rate_limit_exceeded_handler(
 # Internal Rate Limiter for External APIs
 # ===========================================
 
+def parse_retry_after(value: str | None, default: float) -> float:
+    """
+    Parse a Retry-After header into seconds.
+
+    Args:
+        value: Header value, either delay-seconds or an HTTP date
+        default: Seconds to use when the header is missing or malformed
+
+    Returns:
+        Non-negative delay in seconds
+    """
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    return max(0.0, (retry_at - datetime.now(UTC)).total_seconds())
+
+
 @dataclass
 class InternalRateLimiter:
     """
     Rate limiter for internal use (external API calls).
 
-    Uses a simple token bucket algorithm with sliding window.
-    Thread-safe using asyncio locks.
+    Uses a sliding window of recent call timestamps, kept in a fixed ring of
+    `max_calls` slots: a call is admitted when the slot it would overwrite
+    (the oldest call) has left the window, so admission is O(1) and never
+    allocates. Admission checks never await, so within one event loop they
+    are atomic without a lock; the asyncio condition only orders callers that
+    have to wait. Not safe to share across threads or event loops.
 
     Usage:
         limiter = InternalRateLimiter(name="copernicus", max_calls=10, window_seconds=60)
@@ -97,85 +153,313 @@ class InternalRateLimiter:
     max_calls: int
     window_seconds: int
 
-    # Internal state
-    _calls: list[datetime] = field(default_factory=list, init=False)
-    _lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False)
+    # Internal state: time.monotonic() of the last max_calls calls; _oldest
+    # indexes the earliest, which the next admitted call overwrites
+    _slots: list[float] = field(default_factory=list, init=False)
+    _oldest: int = field(default=0, init=False)
+    _cond: asyncio.Condition = field(default_factory=asyncio.Condition, init=False)
     _waiting: int = field(default=0, init=False)
+    _admitted_waiters: int = field(default=0, init=False)
+
+    # Upstream throttling: monotonic deadline from the last 429's Retry-After
+    # (0 when clear). While set, callers pass the retry gate one at a time.
+    _throttled_until: float = field(default=0.0, init=False)
+    _retry_gate: asyncio.Lock = field(default_factory=asyncio.Lock, init=False)
+    _probe_outcome: asyncio.Event = field(default_factory=asyncio.Event, init=False)
+    _probe_pending: bool = field(default=False, init=False)
+
+    def __post_init__(self) -> None:
+        self._slots = [float("-inf")] * self.max_calls
+
+    def _has_room(self, now: float) -> bool:
+        """Whether the oldest recorded call has left the sliding window."""
+        return now - self._slots[self._oldest] >= self.window_seconds
+
+    def _record(self, now: float) -> None:
+        """Record a call in place of the oldest one."""
+        self._slots[self._oldest] = now
+        self._oldest = (self._oldest + 1) % self.max_calls
+
+    @property
+    def retry_after(self) -> float:
+        """Seconds until the upstream asked us to retry (0 when not throttled)."""
+        if not self._throttled_until:
+            return 0.0
+        return max(0.0, self._throttled_until - time.monotonic())
+
+    def throttle(self, retry_after: float) -> None:
+        """
+        Record an upstream 429.
+
+        Until a call succeeds, callers wait out `retry_after` and then go
+        through one at a time, each probing the upstream for the next.
+
+        Args:
+            retry_after: Seconds from the Retry-After header
+        """
+        deadline = time.monotonic() + max(0.0, retry_after)
+        self._throttled_until = max(self._throttled_until, deadline)
+        self._probe_outcome.set()
+
+    def report_success(self) -> None:
+        """Clear throttling after a successful upstream call."""
+        if self._throttled_until:
+            self._throttled_until = 0.0
+            self._probe_outcome.set()
+
+    async def _pass_retry_gate(self) -> None:
+        """
+        Wait while the upstream is throttled, letting one probe through at a time.
+
+        The caller that leaves the gate still throttled is the probe; the next
+        caller waits for its outcome (bounded by the window, in case it is never
+        reported). Once a success clears the throttle, gated peers drain
+        without waiting again.
+        """
+        async with self._retry_gate:
+            if self._probe_pending:
+                try:
+                    await asyncio.wait_for(
+                        self._probe_outcome.wait(), timeout=self.window_seconds
+                    )
+                except TimeoutError:
+                    pass
+                self._probe_pending = False
+
+            if not self._throttled_until:
+                return
+            delay = self._throttled_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if self._throttled_until:
+                self._probe_pending = True
+                self._probe_outcome.clear()
 
     async def acquire(self) -> None:
         """
         Acquire permission to make a call.
 
-        Blocks if rate limit is exceeded until window resets.
+        Passes the retry gate first while the upstream is throttled, then
+        waits for room in the window.
         """
-        async with self._lock:
-            now = datetime.now()
-            window_start = now - timedelta(seconds=self.window_seconds)
+        if self._throttled_until:
+            await self._pass_retry_gate()
+        await self._acquire_window()
 
-            # Clean old entries
-            self._calls = [t for t in self._calls if t > window_start]
+    async def _acquire_window(self) -> None:
+        """
+        Wait for room in the sliding window and record the call.
 
-            if len(self._calls) < self.max_calls:
-                # Under limit, allow immediately
-                self._calls.append(now)
+        Blocks if rate limit is exceeded until window resets. Each call is
+        checked and recorded without an intervening await, so the limit is
+        never exceeded.
+        Waiters sleep until the slot they are queued for frees up, which
+        avoids waking every waiter for each freed slot.
+        """
+        # Under limit, allow immediately without touching the condition
+        if self._try_admit():
+            return
+
+        async with self._cond:
+            now = time.monotonic()
+            if self._has_room(now):
+                self._record(now)
                 return
 
-            # Calculate wait time
-            oldest_call = min(self._calls)
-            wait_seconds = (oldest_call + timedelta(seconds=self.window_seconds) - now).total_seconds()
-
-            if wait_seconds > 0:
-                self._waiting += 1
-                # Release lock while waiting
-                self._lock.release()
-                try:
-                    await asyncio.sleep(wait_seconds)
-                finally:
-                    await self._lock.acquire()
-                    self._waiting -= 1
-
-            # Re-check after waiting
-            now = datetime.now()
-            window_start = now - timedelta(seconds=self.window_seconds)
-            self._calls = [t for t in self._calls if t > window_start]
-            self._calls.append(now)
+            ahead = self._waiting
+            admitted_at_start = self._admitted_waiters
+            self._waiting += 1
+            try:
+                while True:
+                    # Earlier waiters take the earliest freed slots
+                    position = max(0, ahead - (self._admitted_waiters - admitted_at_start))
+                    index = (self._oldest + min(position, self.max_calls - 1)) % self.max_calls
+                    wait_seconds = self._slots[index] + self.window_seconds - now
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), timeout=wait_seconds)
+                    except TimeoutError:
+                        pass
+
+                    now = time.monotonic()
+                    if self._has_room(now):
+                        self._record(now)
+                        self._admitted_waiters += 1
+                        return
+            finally:
+                self._waiting -= 1
 
     async def try_acquire(self) -> bool:
         """
         Try to acquire permission without blocking.
 
         Returns:
-            True if acquired, False if rate limit exceeded
+            True if acquired, False if rate limited or the upstream is throttled
         """
-        async with self._lock:
-            now = datetime.now()
-            window_start = now - timedelta(seconds=self.window_seconds)
+        if self._throttled_until:
+            return False
+        return await self._try_acquire_window()
 
-            # Clean old entries
-            self._calls = [t for t in self._calls if t > window_start]
+    async def _try_acquire_window(self) -> bool:
+        """Record a call if the window has room."""
+        return self._try_admit()
 
-            if len(self._calls) < self.max_calls:
-                self._calls.append(now)
-                return True
+    def _try_admit(self) -> bool:
+        """Record a call if the window has room; runs without awaiting."""
+        now = time.monotonic()
+        if self._has_room(now):
+            self._record(now)
+            return True
 
-            return False
+        return False
 
     def get_status(self) -> dict:
         """Get current rate limiter status."""
-        now = datetime.now()
-        window_start = now - timedelta(seconds=self.window_seconds)
-        recent_calls = [t for t in self._calls if t > window_start]
+        window_start = time.monotonic() - self.window_seconds
+        current_calls = sum(1 for called_at in self._slots if called_at > window_start)
 
         return {
             "name": self.name,
             "max_calls": self.max_calls,
             "window_seconds": self.window_seconds,
-            "current_calls": len(recent_calls),
-            "remaining": max(0, self.max_calls - len(recent_calls)),
+            "current_calls": current_calls,
+            "remaining": max(0, self.max_calls - current_calls),
             "waiting": self._waiting,
+            "retry_after": round(self.retry_after, 1),
         }
 
 
+# Sliding window log in a sorted set scored by Redis server time (ms), the
+# shared counterpart of InternalRateLimiter's timestamp ring. Returns 0 if the
+# call was recorded, otherwise milliseconds until the oldest call leaves the
+# window.
+_SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window_ms)
+if redis.call('ZCARD', KEYS[1]) < limit then
+    redis.call('ZADD', KEYS[1], now, ARGV[3])
+    redis.call('PEXPIRE', KEYS[1], window_ms)
+    return 0
+end
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return math.max(1, tonumber(oldest[2]) + window_ms - now)
+"""
+
+# Calls in each window, for monitoring: one round trip for all limiters.
+# KEYS are the window keys, ARGV the matching window lengths in ms.
+_WINDOW_USAGE_SCRIPT = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local counts = {}
+for i, key in ipairs(KEYS) do
+    counts[i] = redis.call('ZCOUNT', key, '(' .. (now - tonumber(ARGV[i])), '+inf')
+end
+return counts
+"""
+
+
+@dataclass
+class SharedRateLimiter(InternalRateLimiter):
+    """
+    Rate limiter whose budget is shared by every worker through Redis.
+
+    Keeps the sliding window of calls in a Redis sorted set, trimmed and
+    checked atomically by a Lua script, so all processes draw from the same
+    external API quota. Falls back to the local sliding window when Redis
+    is unavailable.
+    """
+
+    @property
+    def redis_key(self) -> str:
+        """Redis key holding this limiter's window."""
+        return f"ratelimit:window:{self.name}"
+
+    async def _claim_shared_slot(self) -> int | None:
+        """Record a call in the shared window; returns ms to wait, or None."""
+        wait_ms = await cache.eval(
+            _SLIDING_WINDOW_SCRIPT,
+            keys=[self.redis_key],
+            args=[self.max_calls, self.window_seconds * 1000, uuid.uuid4().hex],
+        )
+        return None if wait_ms is None else int(wait_ms)
+
+    async def _acquire_window(self) -> None:
+        """Wait for room in the shared window and record the call."""
+        while True:
+            wait_ms = await self._claim_shared_slot()
+            if wait_ms is None:
+                await super()._acquire_window()
+                return
+            if wait_ms == 0:
+                self._record_shared_call()
+                return
+            self._waiting += 1
+            try:
+                await asyncio.sleep(wait_ms / 1000)
+            finally:
+                self._waiting -= 1
+
+    async def _try_acquire_window(self) -> bool:
+        """Try to record a call in the shared window without blocking."""
+        wait_ms = await self._claim_shared_slot()
+        if wait_ms is None:
+            return await super()._try_acquire_window()
+        if wait_ms == 0:
+            self._record_shared_call()
+            return True
+        return False
+
+    def _record_shared_call(self) -> None:
+        """Track this worker's calls so get_status reflects local usage."""
+        self._record(time.monotonic())
+
+
+# ===========================================
+# Per-API-Key Limits
+# ===========================================
+
+# One-minute fixed window per API key, counted and checked in a single
+# atomic call. Returns {count, seconds until the window resets}.
+_API_KEY_WINDOW_SCRIPT = """
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return {count, redis.call('TTL', KEYS[1])}
+"""
+
+
+async def enforce_api_key_limit(key_id: int, limit_per_minute: int) -> None:
+    """
+    Count a request against an API key's own rate_limit_per_minute.
+
+    The increment and limit check are one Redis round trip, so concurrent
+    requests cannot both slip under the limit. Without Redis only the
+    global slowapi limits apply.
+
+    Args:
+        key_id: ApiKey.id
+        limit_per_minute: ApiKey.rate_limit_per_minute
+
+    Raises:
+        HTTPException: 429 with Retry-After when the key is over its limit
+    """
+    result = await cache.eval(
+        _API_KEY_WINDOW_SCRIPT, keys=[f"ratelimit:apikey:{key_id}"], args=[60]
+    )
+    if result is None:
+        return
+    count, ttl = result
+    if int(count) > limit_per_minute:
+        raise HTTPException(
+            status_code=429,
+            detail=f"API key rate limit exceeded ({limit_per_minute}/minute)",
+            headers={"Retry-After": str(max(1, int(ttl)))},
+        )
+
+
 # ===========================================
 # Semaphore Manager for Concurrency Control
 # ===========================================
@@ -185,74 +469,198 @@ class SemaphoreManager:
     """
     Manages semaphores for limiting concurrent operations.
 
+    Permits are a plain counter: when one is free and nobody is queued, entry
+    is fully synchronous. Otherwise callers wait on a future in FIFO order,
+    and release hands the permit straight to the oldest waiter. Counters are
+    only touched between awaits, which is atomic within one event loop.
+    Time spent queued is reported through record_semaphore_wait().
+
+    With a latency target set, the limit adapts (AIMD): each call reported
+    within target raises it by 0.5 up to max_concurrent, while a slow call, a
+    429 or an unreachable service halves it, down to min_concurrent.
+
     Usage:
         manager = SemaphoreManager(name="copernicus", max_concurrent=5)
-        async with manager.acquire():
+        async with manager:
             await external_api.call()
     """
 
     name: str
     max_concurrent: int
+    min_concurrent: int = 1
+    latency_target_ms: float = 0  # 0 keeps the limit fixed at max_concurrent
 
-    _semaphore: asyncio.Semaphore = field(init=False)
+    _limit: float = field(init=False)
+    _waiters: deque[asyncio.Future[None]] = field(default_factory=deque, init=False)
     _active: int = field(default=0, init=False)
     _waiting: int = field(default=0, init=False)
-    _lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False)
 
     def __post_init__(self):
-        self._semaphore = asyncio.Semaphore(self.max_concurrent)
-
-    async def acquire(self):
-        """Acquire semaphore for concurrent operation."""
-        async with self._lock:
-            self._waiting += 1
+        self._limit = float(self.max_concurrent)
 
-        await self._semaphore.acquire()
+    @property
+    def current_limit(self) -> int:
+        """Permits currently allowed to be held at once."""
+        return int(self._limit)
 
-        async with self._lock:
-            self._waiting -= 1
+    async def __aenter__(self):
+        """Acquire a permit; the counter updates are inlined for the hot path."""
+        # Uncontended: no future, no await
+        if self._active < int(self._limit) and not self._waiters:
             self._active += 1
-
+            return self
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._waiting += 1
+        started = time.perf_counter()
+        try:
+            # The releaser counts the permit as ours before waking us
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.cancelled():
+                # A release may already have popped our cancelled future
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            else:
+                # The permit was handed over just before cancellation; pass it on
+                self._active -= 1
+                self._wake_waiters()
+            raise
+        finally:
+            self._waiting -= 1
+        record_semaphore_wait(self.name, (time.perf_counter() - started) * 1000)
         return self
 
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self._active -= 1
+        self._wake_waiters()
+        return False
+
+    # Explicit acquire/release for callers that cannot use `async with`
+    acquire = __aenter__
+
     async def release(self):
         """Release semaphore."""
-        async with self._lock:
-            self._active -= 1
-        self._semaphore.release()
+        self._active -= 1
+        self._wake_waiters()
 
-    async def __aenter__(self):
-        await self.acquire()
-        return self
+    def _wake_waiters(self) -> None:
+        """
+        Hand free permits to the oldest live waiters.
 
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.release()
-        return False
+        Every waiter that fits is readied here, synchronously, rather than one
+        per event-loop iteration as stock asyncio.Semaphore did before Python
+        3.11.1. set_result() schedules wake-ups with call_soon, so waiters
+        resume in FIFO order.
+        """
+        while self._waiters and self._active < int(self._limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._active += 1
+                waiter.set_result(None)
+
+    def report_latency(self, latency_ms: float) -> None:
+        """Feed a completed call's latency into the adaptive limit."""
+        if not self.latency_target_ms:
+            return
+        if latency_ms <= self.latency_target_ms:
+            self._limit = min(float(self.max_concurrent), self._limit + 0.5)
+            self._wake_waiters()
+        else:
+            self._limit = max(float(self.min_concurrent), self._limit * 0.5)
+
+    def report_error(self, status_code: int | None) -> None:
+        """
+        Halve the adaptive limit when the service throttles (HTTP 429) or
+        cannot be reached at all (no status: connect error, timeout, DNS).
+        """
+        if self.latency_target_ms and status_code in (None, 429):
+            self._limit = max(float(self.min_concurrent), self._limit * 0.5)
 
     def get_status(self) -> dict:
-        """Get current semaphore status."""
+        """Get a momentary snapshot of semaphore status."""
         return {
             "name": self.name,
             "max_concurrent": self.max_concurrent,
+            "current_limit": self.current_limit,
             "active": self._active,
             "waiting": self._waiting,
-            "available": self.max_concurrent - self._active,
+            "available": max(0, self.current_limit - self._active),
         }
 
 
+@dataclass
+class CombinedGate:
+    """
+    Rate limiter and semaphore of one external service, entered together.
+
+    Entering records the call in the rate window and only then waits for a
+    concurrency permit, so a call never holds a permit while rate limited.
+    Exiting releases the permit; window entries expire on their own.
+    Outcome reports feed both limits: latency drives the adaptive
+    concurrency, and a 429 halves it and throttles the rate limiter until
+    Retry-After.
+
+    Usage:
+        async with copernicus_gate:
+            result = await external_api.call()
+            copernicus_gate.report_success(latency_ms)
+    """
+
+    rate_limiter: InternalRateLimiter
+    semaphore: SemaphoreManager
+
+    async def __aenter__(self):
+        await self.rate_limiter.acquire()
+        await self.semaphore.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.semaphore.release()
+        return False
+
+    def report_success(self, latency_ms: float) -> None:
+        """Report a successful call and its latency."""
+        self.semaphore.report_latency(latency_ms)
+        self.rate_limiter.report_success()
+
+    def report_failure(
+        self,
+        status_code: int | None = None,
+        retry_after: str | None = None,
+    ) -> None:
+        """
+        Report a failed call.
+
+        Failures are never latency samples: a fast connection refusal would
+        otherwise raise the adaptive limit during an outage.
+
+        Args:
+            status_code: HTTP status of an error response, or None if the
+                service could not be reached
+            retry_after: Retry-After header of the error response
+        """
+        self.semaphore.report_error(status_code)
+        if status_code == 429:
+            self.rate_limiter.throttle(
+                parse_retry_after(retry_after, default=self.rate_limiter.window_seconds)
+            )
+
+
 # ===========================================
 # Pre-configured Rate Limiters and Semaphores
 # ===========================================
 
 # Rate limiter for Copernicus API (10 calls/minute)
-copernicus_rate_limiter = InternalRateLimiter(
+copernicus_rate_limiter = SharedRateLimiter(
     name="copernicus",
     max_calls=settings.RATE_LIMIT_COPERNICUS,
     window_seconds=60,
 )
 
 # Rate limiter for PVGIS API (20 calls/minute)
-pvgis_rate_limiter = InternalRateLimiter(
+pvgis_rate_limiter = SharedRateLimiter(
     name="pvgis",
     max_calls=settings.RATE_LIMIT_PVGIS,
     window_seconds=60,
@@ -262,14 +670,20 @@ pvgis_rate_limiter = InternalRateLimiter(
 copernicus_semaphore = SemaphoreManager(
     name="copernicus",
     max_concurrent=settings.MAX_CONCURRENT_COPERNICUS,
+    latency_target_ms=settings.COPERNICUS_LATENCY_TARGET_MS,
 )
 
 # Semaphore for PVGIS concurrent calls
 pvgis_semaphore = SemaphoreManager(
     name="pvgis",
     max_concurrent=settings.MAX_CONCURRENT_PVGIS,
+    latency_target_ms=settings.PVGIS_LATENCY_TARGET_MS,
 )
 
+# Gates the external API clients enter for each call
+copernicus_gate = CombinedGate(copernicus_rate_limiter, copernicus_semaphore)
+pvgis_gate = CombinedGate(pvgis_rate_limiter, pvgis_semaphore)
+
 # Semaphore for database concurrent queries
 db_semaphore = SemaphoreManager(
     name="database",
@@ -277,12 +691,25 @@ db_semaphore = SemaphoreManager(
 )
 
 
-def get_all_rate_limiters() -> dict:
-    """Get all rate limiters for monitoring."""
-    return {
-        "copernicus": copernicus_rate_limiter.get_status(),
-        "pvgis": pvgis_rate_limiter.get_status(),
-    }
+async def get_all_rate_limiters() -> dict:
+    """
+    Get all rate limiters for monitoring.
+
+    Local status per worker, plus `shared_calls` across all workers when
+    Redis is available.
+    """
+    limiters = (copernicus_rate_limiter, pvgis_rate_limiter)
+    status = {limiter.name: limiter.get_status() for limiter in limiters}
+
+    counts = await cache.eval(
+        _WINDOW_USAGE_SCRIPT,
+        keys=[limiter.redis_key for limiter in limiters],
+        args=[limiter.window_seconds * 1000 for limiter in limiters],
+    )
+    if counts is not None:
+        for limiter, count in zip(limiters, counts, strict=True):
+            status[limiter.name]["shared_calls"] = int(count)
+    return status
 
 
 def get_all_semaphores() -> dict:
@@ -1,11 +1,18 @@
 """API Key model for authentication."""
 
-from datetime import UTC, datetime
+import hashlib
+import time
+from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, Integer, String
+from sqlalchemy import Boolean, DateTime, Index, Integer, LargeBinary, String, text
 from sqlalchemy.orm import Mapped, mapped_column
 
-from app.models.base import Base
+from app.models.base import Base, utc_now
+
+
+def hash_api_key(key: str) -> bytes:
+    """SHA-256 digest of an API key, which auth lookups match on."""
+    return hashlib.sha256(key.encode()).digest()
 
 
 class ApiKey(Base):
@@ -16,6 +23,16 @@ class ApiKey(Base):
     """
 
     __tablename__ = "api_keys"
+    __table_args__ = (
+        Index("ix_api_keys_key_hash", "key_hash", postgresql_using="hash"),
+        # Admin listing: active keys, newest first, without a sort step
+        Index(
+            "ix_api_keys_active_created_id",
+            text("created_at DESC"),
+            text("id DESC"),
+            postgresql_where=text("is_active"),
+        ),
+    )
 
     # Key identification
     key: Mapped[str] = mapped_column(
@@ -24,6 +41,8 @@ class ApiKey(Base):
         nullable=False,
         index=True,
     )
+    # Fixed-size digest of `key` for auth lookups (hash index, equality only)
+    key_hash: Mapped[bytes] = mapped_column(LargeBinary(32), nullable=False)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
     description: Mapped[str | None] = mapped_column(String(500), nullable=True)
 
@@ -54,12 +73,19 @@ class ApiKey(Base):
         """Check if the API key is valid and not expired."""
         if not self.is_active:
             return False
-        if self.expires_at and datetime.now(UTC) > self.expires_at:
-            return False
-        return True
+        expires_at = self.expires_at
+        return expires_at is None or time.time() <= self._expires_at_ts(expires_at)
+
+    def _expires_at_ts(self, expires_at: datetime) -> float:
+        """POSIX timestamp of expires_at, recomputed only when it changes."""
+        cached = getattr(self, "_expires_at_cache", None)
+        if cached is None or cached[0] is not expires_at:
+            cached = (expires_at, expires_at.timestamp())
+            self._expires_at_cache = cached
+        return cached[1]
 
     def record_usage(self) -> None:
         """Record a usage of this API key."""
-        self.last_used_at = datetime.now(UTC)
+        self.last_used_at = utc_now()
         self.total_requests += 1
 
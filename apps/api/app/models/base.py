@@ -1,9 +1,12 @@
 """SQLAlchemy Base model and common utilities."""
 
+from collections.abc import Callable
 from datetime import UTC, datetime
+from functools import cache, partial
+from operator import attrgetter
 from typing import Any
 
-from sqlalchemy import DateTime, MetaData
+from sqlalchemy import DateTime, MetaData, func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 # Naming convention for constraints (important for Alembic migrations)
@@ -15,25 +18,46 @@ convention = {
     "pk": "pk_%(table_name)s",
 }
 
+# Current UTC time for timestamps set in Python
+utc_now = partial(datetime.now, UTC)
+
 
 class Base(DeclarativeBase):
     """Base class for all SQLAlchemy models."""
 
     metadata = MetaData(naming_convention=convention)
 
-    # Common columns for all models
+    # Fetch server-generated timestamps with RETURNING at flush, so they can
+    # be read afterwards without a lazy load (not possible on AsyncSession)
+    __mapper_args__ = {"eager_defaults": True}
+
+    # Common columns for all models, stamped by the database
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
-        default=lambda: datetime.now(UTC),
+        server_default=func.now(),
     )
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
-        default=lambda: datetime.now(UTC),
-        onupdate=lambda: datetime.now(UTC),
+        server_default=func.now(),
+        onupdate=func.now(),
     )
 
     def to_dict(self) -> dict[str, Any]:
         """Convert model to dictionary."""
-        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+        names, read_columns = _column_reader(type(self))
+        return dict(zip(names, read_columns(self), strict=True))
+
+
+@cache
+def _column_reader(model: type[Base]) -> tuple[tuple[str, ...], Callable[[Any], tuple[Any, ...]]]:
+    """
+    Column names of a model and one attrgetter that reads all of them.
+
+    Built once per class, so to_dict() does not walk the table's columns
+    for every row.
+    """
+    names = tuple(c.name for c in model.__table__.columns)
+    # Every model has id, created_at and updated_at, so attrgetter returns a tuple
+    return names, attrgetter(*names)
 
@@ -1,22 +1,33 @@
 """Solar analysis and cached location models."""
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Any
 
-from sqlalchemy import Float, Index, String, Text
+from sqlalchemy import (
+    ColumnElement,
+    Float,
+    Index,
+    String,
+    Text,
+    UniqueConstraint,
+    func,
+    literal_column,
+    text,
+)
 from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import Base
 
 # Note: GeoAlchemy2 import is conditional to allow running without PostGIS
 try:
-    from geoalchemy2 import Geometry
+    from geoalchemy2 import Geography
 
     HAS_POSTGIS = True
 except ImportError:
     HAS_POSTGIS = False
-    Geometry = None  # type: ignore
+    Geography = None  # type: ignore
 
 
 class CachedLocation(Base):
@@ -29,11 +40,11 @@ class CachedLocation(Base):
 
     __tablename__ = "cached_locations"
 
-    # Geographic location - using PostGIS POINT geometry
+    # Geographic location - PostGIS POINT geography (distances in meters)
     # If PostGIS not available, falls back to lat/lon columns
     if HAS_POSTGIS:
         geom: Mapped[Any] = mapped_column(
-            Geometry("POINT", srid=4326),
+            Geography("POINT", srid=4326),
             nullable=True,
             index=True,
         )
@@ -71,17 +82,26 @@ class CachedLocation(Base):
 
     # Indexes for efficient querying
     __table_args__ = (
-        Index("ix_cached_locations_lat_lon", "latitude", "longitude"),
+        UniqueConstraint("latitude", "longitude", name="uq_cached_locations_lat_lon"),
         Index("ix_cached_locations_data_tier", "data_tier"),
     )
 
-    def is_expired(self) -> bool:
-        """Check if the cached data has expired."""
-        from datetime import timedelta
+    @hybrid_property
+    def expired(self) -> bool:
+        """
+        Whether the cached data has outlived its TTL.
 
+        In queries this is a SQL predicate, so `.where(~CachedLocation.expired)`
+        lets Postgres drop stale rows instead of loading them.
+        """
         expiry = self.created_at + timedelta(days=self.cache_ttl_days)
         return datetime.now(self.created_at.tzinfo) > expiry
 
+    @expired.inplace.expression
+    @classmethod
+    def _expired_expression(cls) -> ColumnElement[bool]:
+        return cls.created_at < func.now() - literal_column("INTERVAL '1 day'") * cls.cache_ttl_days
+
 
 class SolarAnalysis(Base):
     """
@@ -138,3 +158,20 @@ class SolarAnalysis(Base):
     # Error information if status is 'error'
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
 
+    # Per-API-key history: newest-first pages, status filters, country stats
+    __table_args__ = (
+        Index("ix_solar_analyses_key_created", "api_key_id", text("created_at DESC")),
+        Index(
+            "ix_solar_analyses_key_status_created",
+            "api_key_id",
+            "status",
+            text("created_at DESC"),
+        ),
+        Index(
+            "ix_solar_analyses_key_country",
+            "api_key_id",
+            "country_code",
+            postgresql_where=text("country_code IS NOT NULL"),
+        ),
+    )
+
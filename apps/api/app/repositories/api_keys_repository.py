@@ -4,23 +4,67 @@ API Keys Repository.
 Provides CRUD operations for API key management.
 """
 
+import asyncio
+import base64
 import logging
+import re
 import secrets
-from datetime import UTC, datetime
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from datetime import datetime
 from typing import Any
 
-from sqlalchemy import delete, select, update
+from sqlalchemy import (
+    DateTime,
+    Integer,
+    LargeBinary,
+    Row,
+    bindparam,
+    column,
+    delete,
+    func,
+    insert,
+    select,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.database import db
-from app.models.api_keys import ApiKey
+from app.core.metrics import metrics
+from app.models.api_keys import ApiKey, hash_api_key
+from app.models.base import utc_now
 
 logger = logging.getLogger(__name__)
 
 
+# Most authenticate() results kept in process
+_AUTH_CACHE_MAX = 10_000
+
+# Columns read when authenticating a request
+_AUTH_COLUMNS = (
+    ApiKey.id,
+    ApiKey.name,
+    ApiKey.rate_limit_per_minute,
+    ApiKey.is_active,
+    ApiKey.expires_at,
+)
+
+# Built once: the per-request auth lookup reuses one statement object
+_AUTH_QUERY = select(*_AUTH_COLUMNS).where(ApiKey.key_hash == bindparam("key_hash"))
+
+# Shape of every key generate_api_key() issues; anything else cannot exist
+_is_key_format = re.compile(r"sk_[A-Za-z0-9_-]{43}").fullmatch
+
+
 def generate_api_key() -> str:
-    """Generate a secure random API key."""
-    return f"sk_{secrets.token_urlsafe(32)}"
+    """Generate a secure random API key (sk_ + 43 url-safe base64 chars)."""
+    encoded = base64.urlsafe_b64encode(secrets.token_bytes(32)).rstrip(b"=")
+    return (b"sk_" + encoded).decode("ascii")
 
 
 class ApiKeysRepository:
@@ -35,6 +79,20 @@ class ApiKeysRepository:
     - Usage tracking
     """
 
+    def __init__(self) -> None:
+        # Pending usage by key digest: (uses, last use), written by flush_usage()
+        self._pending_usage: dict[bytes, tuple[int, datetime]] = {}
+        self._pending_events = 0
+        self._flush_requested = asyncio.Event()
+        # authenticate() results by key digest: (cached at, info, expiry timestamp)
+        self._auth_cache: OrderedDict[bytes, tuple[float, dict[str, Any] | None, float | None]] = (
+            OrderedDict()
+        )
+
+    def clear_cache(self) -> None:
+        """Forget cached authenticate() results."""
+        self._auth_cache.clear()
+
     async def create(
         self,
         name: str,
@@ -61,42 +119,40 @@ class ApiKeysRepository:
             Dict with key details (including the raw key - only shown once!)
         """
         raw_key = generate_api_key()
+        fields = {
+            "key": raw_key,
+            "key_hash": hash_api_key(raw_key),
+            "name": name,
+            "description": description,
+            "owner_email": owner_email,
+            "rate_limit_per_minute": rate_limit_per_minute,
+            "rate_limit_per_day": rate_limit_per_day,
+            "expires_at": expires_at,
+            "is_active": True,
+            "total_requests": 0,
+        }
 
-        async def _create(s: AsyncSession) -> dict[str, Any]:
-            api_key = ApiKey(
-                key=raw_key,
-                name=name,
-                description=description,
-                owner_email=owner_email,
-                rate_limit_per_minute=rate_limit_per_minute,
-                rate_limit_per_day=rate_limit_per_day,
-                expires_at=expires_at,
-                is_active=True,
-                total_requests=0,
-            )
-            s.add(api_key)
-            await s.flush()
+        async with db.session_scope(session) as s:
+            # Core INSERT: the generated columns come back in the same statement
+            query = insert(ApiKey).values(**fields).returning(ApiKey.id, ApiKey.created_at)
+            key_id, created_at = (await s.execute(query)).one()
+            self.clear_cache()
 
-            logger.info(f"Created API key '{name}' (id={api_key.id})")
+            logger.info(f"Created API key '{name}' (id={key_id})")
 
             return {
-                "id": api_key.id,
+                "id": key_id,
                 "key": raw_key,  # Only returned on creation!
-                "name": api_key.name,
-                "description": api_key.description,
-                "owner_email": api_key.owner_email,
-                "rate_limit_per_minute": api_key.rate_limit_per_minute,
-                "rate_limit_per_day": api_key.rate_limit_per_day,
-                "is_active": api_key.is_active,
-                "expires_at": api_key.expires_at.isoformat() if api_key.expires_at else None,
-                "created_at": api_key.created_at.isoformat() if api_key.created_at else None,
+                "name": name,
+                "description": description,
+                "owner_email": owner_email,
+                "rate_limit_per_minute": rate_limit_per_minute,
+                "rate_limit_per_day": rate_limit_per_day,
+                "is_active": True,
+                "expires_at": expires_at.isoformat() if expires_at else None,
+                "created_at": created_at.isoformat() if created_at else None,
             }
 
-        if session:
-            return await _create(session)
-        async with db.session() as s:
-            return await _create(s)
-
     async def get_by_key(
         self,
         key: str,
@@ -112,8 +168,11 @@ class ApiKeysRepository:
         Returns:
             Dict with key details (excluding the raw key) or None
         """
-        async def _get(s: AsyncSession) -> dict[str, Any] | None:
-            query = select(ApiKey).where(ApiKey.key == key)
+        if not _is_key_format(key):
+            return None
+
+        async with db.session_scope(session) as s:
+            query = select(ApiKey).where(ApiKey.key_hash == hash_api_key(key))
             result = await s.execute(query)
             api_key = result.scalar_one_or_none()
 
@@ -121,18 +180,13 @@ class ApiKeysRepository:
                 return self._to_dict(api_key)
             return None
 
-        if session:
-            return await _get(session)
-        async with db.session() as s:
-            return await _get(s)
-
     async def get_by_id(
         self,
         key_id: int,
         session: AsyncSession | None = None,
     ) -> dict[str, Any] | None:
         """Get API key by ID."""
-        async def _get(s: AsyncSession) -> dict[str, Any] | None:
+        async with db.session_scope(session) as s:
             query = select(ApiKey).where(ApiKey.id == key_id)
             result = await s.execute(query)
             api_key = result.scalar_one_or_none()
@@ -141,41 +195,153 @@ class ApiKeysRepository:
                 return self._to_dict(api_key)
             return None
 
-        if session:
-            return await _get(session)
-        async with db.session() as s:
-            return await _get(s)
+    async def get_many_by_ids(
+        self,
+        key_ids: Iterable[int],
+        session: AsyncSession | None = None,
+    ) -> dict[int, dict[str, Any]]:
+        """
+        Get several API keys by ID with one query.
+
+        Args:
+            key_ids: IDs to look up
+            session: Optional existing database session
+
+        Returns:
+            Dict of key dicts by ID; unknown IDs are absent
+        """
+        key_ids = set(key_ids)
+        if not key_ids:
+            return {}
+
+        async with db.session_scope(session) as s:
+            query = select(*ApiKey.__table__.columns).where(ApiKey.id.in_(key_ids))
+            result = await s.execute(query)
+            now = time.time()
+
+            return {row.id: self._to_dict(row, now) for row in result}
 
     async def list_all(
         self,
         include_inactive: bool = False,
+        limit: int = 100,
+        after: tuple[datetime, int] | None = None,
         session: AsyncSession | None = None,
     ) -> list[dict[str, Any]]:
         """
-        List all API keys.
+        List API keys, newest first, one page at a time.
+
+        Ties on created_at (e.g. keys created in one transaction) are ordered
+        by id, so a page boundary never skips part of a tie.
 
         Args:
             include_inactive: Whether to include deactivated keys
+            limit: Maximum number of keys to return
+            after: Keyset cursor, (created_at, id) of the last key on the
+                previous page
             session: Optional existing database session
 
         Returns:
             List of API key dicts
         """
-        async def _list(s: AsyncSession) -> list[dict[str, Any]]:
-            query = select(ApiKey)
+        async with db.session_scope(session) as s:
+            # Plain rows: no ORM objects are built for a bulk listing
+            query = select(*ApiKey.__table__.columns)
             if not include_inactive:
                 query = query.where(ApiKey.is_active)
-            query = query.order_by(ApiKey.created_at.desc())
+            if after is not None:
+                query = query.where(tuple_(ApiKey.created_at, ApiKey.id) < tuple_(*after))
+            query = query.order_by(ApiKey.created_at.desc(), ApiKey.id.desc()).limit(limit)
 
             result = await s.execute(query)
-            keys = result.scalars().all()
+            now = time.time()
 
-            return [self._to_dict(k) for k in keys]
+            return [self._to_dict(row, now) for row in result]
 
-        if session:
-            return await _list(session)
-        async with db.session() as s:
-            return await _list(s)
+    async def authenticate(
+        self,
+        key: str,
+        session: AsyncSession | None = None,
+    ) -> dict[str, Any] | None:
+        """
+        Look up what request auth needs for a valid API key.
+
+        Malformed keys are rejected without touching the database or cache.
+        Unlike validate(), reads only the auth columns as a plain row: the
+        descriptive columns are not fetched and no ORM object is built.
+        Results, including unknown keys, are cached in process for
+        API_KEY_CACHE_TTL_SECONDS under the key's digest, so raw keys are
+        never held. Changes made through this repository clear the cache;
+        other workers see them once their entries expire. If the database is
+        unreachable, an expired entry is still served for up to
+        API_KEY_STALE_WHILE_ERROR_SECONDS rather than failing the request.
+
+        Args:
+            key: The API key to check
+            session: Optional existing database session
+
+        Returns:
+            Dict with id, name and rate_limit_per_minute, or None if the key
+            is unknown, inactive or expired
+        """
+        if not _is_key_format(key):
+            return None
+
+        digest = hash_api_key(key)
+        entry = self._auth_cache.get(digest)
+        if entry is not None:
+            cached_at, info, expires_ts = entry
+            age = time.monotonic() - cached_at
+            if age < settings.API_KEY_CACHE_TTL_SECONDS:
+                self._auth_cache.move_to_end(digest)
+                if expires_ts is not None and time.time() > expires_ts:
+                    return None
+                return info
+            if age >= (
+                settings.API_KEY_CACHE_TTL_SECONDS + settings.API_KEY_STALE_WHILE_ERROR_SECONDS
+            ):
+                del self._auth_cache[digest]
+                entry = None
+
+        try:
+            async with db.session_scope(session) as s:
+                row = (await s.execute(_AUTH_QUERY, {"key_hash": digest})).one_or_none()
+
+                info = None
+                expires_ts = None
+                if row is not None and row.is_active:
+                    info = {
+                        "id": row.id,
+                        "name": row.name,
+                        "rate_limit_per_minute": row.rate_limit_per_minute,
+                    }
+                    if row.expires_at is not None:
+                        expires_ts = row.expires_at.timestamp()
+                self._cache_auth(digest, info, expires_ts)
+
+                if expires_ts is not None and time.time() > expires_ts:
+                    return None
+                return info
+        except (DBAPIError, OSError):
+            if entry is None:
+                raise
+            # Last known good answer beats failing every request in an outage
+            metrics.record_stale_auth()
+            _, info, expires_ts = entry
+            if expires_ts is not None and time.time() > expires_ts:
+                return None
+            return info
+
+    def _cache_auth(
+        self, digest: bytes, info: dict[str, Any] | None, expires_ts: float | None
+    ) -> None:
+        """Store an authenticate() result, evicting the least recently used."""
+        if settings.API_KEY_CACHE_TTL_SECONDS <= 0:
+            return
+        self._auth_cache[digest] = (time.monotonic(), info, expires_ts)
+        self._auth_cache.move_to_end(digest)
+        while len(self._auth_cache) > _AUTH_CACHE_MAX:
+            self._auth_cache.popitem(last=False)
 
     async def validate(
         self,
@@ -192,8 +358,11 @@ class ApiKeysRepository:
         Returns:
             Tuple of (is_valid, key_details or None)
         """
-        async def _validate(s: AsyncSession) -> tuple[bool, dict[str, Any] | None]:
-            query = select(ApiKey).where(ApiKey.key == key)
+        if not _is_key_format(key):
+            return False, None
+
+        async with db.session_scope(session) as s:
+            query = select(ApiKey).where(ApiKey.key_hash == hash_api_key(key))
             result = await s.execute(query)
             api_key = result.scalar_one_or_none()
 
@@ -205,42 +374,117 @@ class ApiKeysRepository:
 
             return True, self._to_dict(api_key)
 
-        if session:
-            return await _validate(session)
-        async with db.session() as s:
-            return await _validate(s)
-
-    async def record_usage(
+    async def validate_many(
         self,
-        key: str,
+        keys: Iterable[str],
         session: AsyncSession | None = None,
-    ) -> bool:
+    ) -> dict[str, tuple[bool, dict[str, Any] | None]]:
         """
-        Record a usage of the API key.
+        Validate several API keys with one query.
 
         Args:
-            key: The API key
+            keys: The API keys to validate
             session: Optional existing database session
 
         Returns:
-            True if successful
+            Dict of (is_valid, key_details or None) by input key, as validate()
+            would return for each
         """
-        async def _record(s: AsyncSession) -> bool:
-            query = (
-                update(ApiKey)
-                .where(ApiKey.key == key)
-                .values(
-                    last_used_at=datetime.now(UTC),
-                    total_requests=ApiKey.total_requests + 1,
-                )
-            )
+        results: dict[str, tuple[bool, dict[str, Any] | None]] = {}
+        digests: dict[bytes, str] = {}
+        for key in keys:
+            results[key] = (False, None)
+            if _is_key_format(key):
+                digests[hash_api_key(key)] = key
+        if not digests:
+            return results
+
+        async with db.session_scope(session) as s:
+            query = select(*ApiKey.__table__.columns).where(ApiKey.key_hash.in_(digests))
             result = await s.execute(query)
-            return result.rowcount > 0
+            now = time.time()
+
+            for row in result:
+                details = self._to_dict(row, now)
+                results[digests[row.key_hash]] = (details["is_valid"], details)
+        return results
+
+    def record_usage(self, key: str) -> None:
+        """
+        Record a usage of the API key.
 
-        if session:
-            return await _record(session)
-        async with db.session() as s:
-            return await _record(s)
+        Uses are aggregated in memory and written by flush_usage(), so
+        authenticated requests do not each issue an UPDATE on api_keys.
+
+        Args:
+            key: The API key
+        """
+        digest = hash_api_key(key)
+        count, _ = self._pending_usage.get(digest, (0, None))
+        self._pending_usage[digest] = (count + 1, utc_now())
+        self._pending_events += 1
+        if self._pending_events >= settings.API_KEY_USAGE_FLUSH_EVENTS:
+            self._flush_requested.set()
+
+    async def flush_usage(self) -> int:
+        """
+        Write aggregated usage with one UPDATE joined to all pending keys.
+
+        Counts from a failed or cancelled write are kept for the next flush.
+
+        Returns:
+            Number of keys updated
+        """
+        if not self._pending_usage:
+            return 0
+        pending, self._pending_usage = self._pending_usage, {}
+        self._pending_events = 0
+
+        # UPDATE ... FROM (VALUES ...): one joined statement for all keys
+        usage = values(
+            column("key_hash", LargeBinary),
+            column("uses", Integer),
+            column("used_at", DateTime(timezone=True)),
+            name="usage",
+        ).data([(digest, count, used_at) for digest, (count, used_at) in pending.items()])
+        query = (
+            update(ApiKey)
+            .where(ApiKey.key_hash == usage.c.key_hash)
+            .values(
+                total_requests=ApiKey.total_requests + usage.c.uses,
+                last_used_at=usage.c.used_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        try:
+            async with db.session() as s:
+                result = await s.execute(query)
+        except Exception as e:
+            logger.warning(f"API key usage flush failed, retrying later: {e}")
+            self._restore_usage(pending)
+            return 0
+        except BaseException:
+            # Cancelled mid-write (e.g. at shutdown): the final flush retries these
+            self._restore_usage(pending)
+            raise
+        return result.rowcount
+
+    def _restore_usage(self, pending: dict[bytes, tuple[int, datetime]]) -> None:
+        """Merge unwritten usage back into the buffer, alongside newer uses."""
+        for digest, (count, used_at) in pending.items():
+            newer_count, newer_used_at = self._pending_usage.get(digest, (0, used_at))
+            self._pending_usage[digest] = (count + newer_count, max(used_at, newer_used_at))
+            self._pending_events += count
+
+    async def flush_usage_periodically(self, interval_seconds: float) -> None:
+        """Flush usage every `interval_seconds`, or sooner once enough uses queue up."""
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=interval_seconds)
+            except TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await self.flush_usage()
 
     async def update(
         self,
@@ -264,7 +508,7 @@ class ApiKeysRepository:
         Returns:
             Updated key details or None if not found
         """
-        async def _update(s: AsyncSession) -> dict[str, Any] | None:
+        async with db.session_scope(session) as s:
             # Build update values
             values = {}
             if name is not None:
@@ -284,22 +528,21 @@ class ApiKeysRepository:
                 # Nothing to update, just return current state
                 return await self.get_by_id(key_id, s)
 
-            values["updated_at"] = datetime.now(UTC)
-
+            # RETURNING hands back the updated row, no follow-up SELECT
             query = (
                 update(ApiKey)
                 .where(ApiKey.id == key_id)
                 .values(**values)
+                .returning(ApiKey)
+                .execution_options(populate_existing=True)
             )
-            await s.execute(query)
+            api_key = (await s.execute(query)).scalar_one_or_none()
+            self.clear_cache()
 
+            if api_key is None:
+                return None
             logger.info(f"Updated API key id={key_id}")
-            return await self.get_by_id(key_id, s)
-
-        if session:
-            return await _update(session)
-        async with db.session() as s:
-            return await _update(s)
+            return self._to_dict(api_key)
 
     async def deactivate(
         self,
@@ -325,34 +568,30 @@ class ApiKeysRepository:
         Returns:
             True if deleted
         """
-        async def _delete(s: AsyncSession) -> bool:
+        async with db.session_scope(session) as s:
             query = delete(ApiKey).where(ApiKey.id == key_id)
             result = await s.execute(query)
+            self.clear_cache()
 
             if result.rowcount > 0:
                 logger.info(f"Deleted API key id={key_id}")
                 return True
             return False
 
-        if session:
-            return await _delete(session)
-        async with db.session() as s:
-            return await _delete(s)
-
     async def get_stats(
         self,
         session: AsyncSession | None = None,
     ) -> dict[str, Any]:
         """Get API key statistics."""
-        async def _stats(s: AsyncSession) -> dict[str, Any]:
-            # Get all keys
-            result = await s.execute(select(ApiKey))
-            keys = result.scalars().all()
-
-            total = len(keys)
-            active = sum(1 for k in keys if k.is_active)
-            expired = sum(1 for k in keys if k.expires_at and datetime.now(UTC) > k.expires_at)
-            total_requests = sum(k.total_requests for k in keys)
+        async with db.session_scope(session) as s:
+            # Aggregate in one statement instead of loading every key
+            query = select(
+                func.count(),
+                func.count().filter(ApiKey.is_active),
+                func.count().filter(ApiKey.expires_at < func.now()),
+                func.coalesce(func.sum(ApiKey.total_requests), 0),
+            ).select_from(ApiKey)
+            total, active, expired, total_requests = (await s.execute(query)).one()
 
             return {
                 "total_keys": total,
@@ -362,13 +601,23 @@ class ApiKeysRepository:
                 "total_requests": total_requests,
             }
 
-        if session:
-            return await _stats(session)
-        async with db.session() as s:
-            return await _stats(s)
+    def _to_dict(self, api_key: ApiKey | Row[Any], now: float | None = None) -> dict[str, Any]:
+        """
+        Convert an ApiKey, or a row of its columns, to a dict without exposing the key.
 
-    def _to_dict(self, api_key: ApiKey) -> dict[str, Any]:
-        """Convert ApiKey model to dict (without exposing the key)."""
+        Args:
+            api_key: ORM object or Core row with the api_keys columns
+            now: time.time() shared across a batch of rows
+        """
+        if now is None:
+            now = time.time()
+        expires_at = api_key.expires_at
+        last_used_at = api_key.last_used_at
+        created_at = api_key.created_at
+        updated_at = api_key.updated_at
+        is_valid = bool(api_key.is_active) and (
+            expires_at is None or now <= expires_at.timestamp()
+        )
         return {
             "id": api_key.id,
             "key_prefix": api_key.key[:12] + "...",  # Only show prefix
@@ -378,12 +627,12 @@ class ApiKeysRepository:
             "rate_limit_per_minute": api_key.rate_limit_per_minute,
             "rate_limit_per_day": api_key.rate_limit_per_day,
             "is_active": api_key.is_active,
-            "is_valid": api_key.is_valid(),
-            "last_used_at": api_key.last_used_at.isoformat() if api_key.last_used_at else None,
+            "is_valid": is_valid,
+            "last_used_at": last_used_at.isoformat() if last_used_at else None,
             "total_requests": api_key.total_requests,
-            "expires_at": api_key.expires_at.isoformat() if api_key.expires_at else None,
-            "created_at": api_key.created_at.isoformat() if api_key.created_at else None,
-            "updated_at": api_key.updated_at.isoformat() if api_key.updated_at else None,
+            "expires_at": expires_at.isoformat() if expires_at else None,
+            "created_at": created_at.isoformat() if created_at else None,
+            "updated_at": updated_at.isoformat() if updated_at else None,
         }
 
 
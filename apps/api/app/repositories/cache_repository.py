@@ -13,19 +13,119 @@ Cache Strategy:
 """
 
 import logging
+import math
 import time
+from collections import OrderedDict
 from typing import Any
 
+import orjson
 from sqlalchemy import func, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.core.database import db
+from app.core.geo import KM_PER_DEGREE, bbox_offsets, cos_lat
 from app.core.metrics import log_cache_operation, metrics
 from app.models.solar_analysis import CachedLocation
 
 logger = logging.getLogger(__name__)
 
+# find_by_id() results kept in process: most entries, and seconds each is served
+_ID_CACHE_MAX = 10_000
+_ID_CACHE_TTL_SECONDS = 60.0
+
+# Statements built once at import; each call only binds parameters
+_POSTGIS_INSTALLED_QUERY = text(
+    "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'postgis')"
+)
+
+_FIND_NEARBY_QUERY = text("""
+    SELECT
+        id,
+        latitude,
+        longitude,
+        interpolation_model,
+        data_tier,
+        source_dataset,
+        country_code,
+        cache_ttl_days,
+        created_at,
+        ST_Distance(
+            geom,
+            ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography
+        ) / 1000 as distance_km
+    FROM cached_locations
+    -- geom is geography, so the GIST index on it serves ST_DWithin directly
+    WHERE ST_DWithin(
+        geom,
+        ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography,
+        :radius_m
+    )
+    AND created_at > NOW() - INTERVAL '1 day' * :ttl_days
+    ORDER BY distance_km ASC
+    LIMIT 1
+""")
+
+_UPSERT_QUERY = text("""
+    INSERT INTO cached_locations
+        (latitude, longitude, geom, interpolation_model,
+         source_dataset, data_tier, country_code, cache_ttl_days,
+         created_at, updated_at)
+    VALUES
+        (:lat, :lon, ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography,
+         CAST(:model AS jsonb), :source, :tier, :country, :ttl,
+         NOW(), NOW())
+    ON CONFLICT (latitude, longitude)
+    DO UPDATE SET
+        interpolation_model = CAST(EXCLUDED.interpolation_model AS jsonb),
+        source_dataset = EXCLUDED.source_dataset,
+        data_tier = EXCLUDED.data_tier,
+        updated_at = NOW()
+    RETURNING id
+""")
+
+# Fallback without PostGIS geometry
+_UPSERT_WITHOUT_GEOM_QUERY = text("""
+    INSERT INTO cached_locations
+        (latitude, longitude, interpolation_model,
+         source_dataset, data_tier, country_code, cache_ttl_days,
+         created_at, updated_at)
+    VALUES
+        (:lat, :lon, CAST(:model AS jsonb), :source, :tier, :country, :ttl,
+         NOW(), NOW())
+    ON CONFLICT (latitude, longitude)
+    DO UPDATE SET
+        interpolation_model = CAST(EXCLUDED.interpolation_model AS jsonb),
+        source_dataset = EXCLUDED.source_dataset,
+        data_tier = EXCLUDED.data_tier,
+        updated_at = NOW()
+    RETURNING id
+""")
+
+_DELETE_EXPIRED_QUERY = text("""
+    DELETE FROM cached_locations
+    WHERE created_at < NOW() - INTERVAL '1 day' * cache_ttl_days
+    RETURNING id
+""")
+
+# One scan answers every stats figure: a row per source, a row per tier,
+# and the grand total (both GROUPING() flags set)
+_STATS_QUERY = text("""
+    SELECT
+        GROUPING(source_dataset) AS all_sources,
+        GROUPING(data_tier) AS all_tiers,
+        source_dataset,
+        data_tier,
+        COUNT(*) AS total,
+        MIN(created_at) AS oldest,
+        MAX(created_at) AS newest,
+        COUNT(*) FILTER (
+            WHERE created_at < NOW() - INTERVAL '1 day' * cache_ttl_days
+        ) AS expired
+    FROM cached_locations
+    GROUP BY GROUPING SETS ((source_dataset), (data_tier), ())
+""")
+
 
 class CacheRepository:
     """
@@ -47,7 +147,30 @@ class CacheRepository:
     """
 
     def __init__(self) -> None:
-        self._has_postgis = True  # Assume PostGIS is available
+        self._has_postgis = True  # Assume PostGIS is available until detected
+        # find_by_id() results by cache ID: (cached at, entry)
+        self._id_cache: OrderedDict[int, tuple[float, dict[str, Any]]] = OrderedDict()
+
+    async def detect_postgis(self, session: AsyncSession | None = None) -> bool:
+        """
+        Check once whether the PostGIS extension is installed.
+
+        Lookups and saves then pick the PostGIS or plain-column queries
+        directly. If the check itself fails, the current setting is kept.
+
+        Args:
+            session: Optional existing database session
+
+        Returns:
+            Whether PostGIS queries will be used
+        """
+        try:
+            async with db.session_scope(session) as s:
+                result = await s.execute(_POSTGIS_INSTALLED_QUERY)
+                self._has_postgis = bool(result.scalar())
+        except Exception as e:
+            logger.warning(f"PostGIS detection failed, assuming available: {e}")
+        return self._has_postgis
 
     async def find_nearby(
         self,
@@ -77,11 +200,8 @@ class CacheRepository:
         start_time = time.perf_counter()
 
         try:
-            if session:
-                result = await self._find_nearby_impl(session, lat, lon, radius_km)
-            else:
-                async with db.session() as session:
-                    result = await self._find_nearby_impl(session, lat, lon, radius_km)
+            async with db.session_scope(session) as s:
+                result = await self._find_nearby_impl(s, lat, lon, radius_km)
 
             latency_ms = (time.perf_counter() - start_time) * 1000
             hit = result is not None
@@ -116,17 +236,9 @@ class CacheRepository:
         radius_km: float,
     ) -> dict[str, Any] | None:
         """Internal implementation of find_nearby."""
-
-        # Try PostGIS query first
+        # Capability is detected once at startup (detect_postgis)
         if self._has_postgis:
-            try:
-                return await self._find_with_postgis(session, lat, lon, radius_km)
-            except Exception as e:
-                if "geometry" in str(e).lower() or "st_" in str(e).lower():
-                    logger.warning(f"PostGIS not available, falling back to bbox: {e}")
-                    self._has_postgis = False
-                else:
-                    raise
+            return await self._find_with_postgis(session, lat, lon, radius_km)
 
         # Fallback to bounding box search
         return await self._find_with_bbox(session, lat, lon, radius_km)
@@ -140,39 +252,9 @@ class CacheRepository:
     ) -> dict[str, Any] | None:
         """Find nearby location using PostGIS ST_DWithin."""
 
-        # Convert km to degrees (approximate at equator: 1° ≈ 111km)
-        # More accurate conversion considering latitude
-        radius_km / (111.32 * abs(lat) / 90 + 111.32 * (90 - abs(lat)) / 90)
-
         # Use raw SQL for PostGIS query (more reliable across different setups)
-        query = text("""
-            SELECT
-                id,
-                latitude,
-                longitude,
-                interpolation_model,
-                data_tier,
-                source_dataset,
-                country_code,
-                cache_ttl_days,
-                created_at,
-                ST_Distance(
-                    geom::geography,
-                    ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography
-                ) / 1000 as distance_km
-            FROM cached_locations
-            WHERE ST_DWithin(
-                geom::geography,
-                ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography,
-                :radius_m
-            )
-            AND created_at > NOW() - INTERVAL '1 day' * :ttl_days
-            ORDER BY distance_km ASC
-            LIMIT 1
-        """)
-
         result = await session.execute(
-            query,
+            _FIND_NEARBY_QUERY,
             {
                 "lat": lat,
                 "lon": lon,
@@ -211,12 +293,8 @@ class CacheRepository:
         Less accurate than PostGIS but works without PostGIS extension.
         """
         # Convert radius to approximate degree bounds
-        # 1 degree latitude ≈ 111 km
-        # 1 degree longitude ≈ 111 km * cos(latitude)
-        import math
-
-        lat_offset = radius_km / 111.0
-        lon_offset = radius_km / (111.0 * math.cos(math.radians(lat)))
+        lon_scale = cos_lat(lat)
+        lat_offset, lon_offset = bbox_offsets(lat, radius_km)
 
         min_lat = lat - lat_offset
         max_lat = lat + lat_offset
@@ -228,11 +306,12 @@ class CacheRepository:
             .where(
                 CachedLocation.latitude.between(min_lat, max_lat),
                 CachedLocation.longitude.between(min_lon, max_lon),
+                ~CachedLocation.expired,
             )
             .order_by(
-                # Approximate distance sorting
-                func.abs(CachedLocation.latitude - lat) +
-                func.abs(CachedLocation.longitude - lon)
+                # Equirectangular distance, squared (same order, no sqrt)
+                func.pow(CachedLocation.latitude - lat, 2) +
+                func.pow((CachedLocation.longitude - lon) * lon_scale, 2)
             )
             .limit(1)
         )
@@ -240,11 +319,10 @@ class CacheRepository:
         result = await session.execute(query)
         cached = result.scalar_one_or_none()
 
-        if cached and not cached.is_expired():
-            # Calculate approximate distance
-            distance_km = (
-                ((cached.latitude - lat) ** 2 +
-                 (cached.longitude - lon) ** 2) ** 0.5 * 111.0
+        if cached:
+            # Equirectangular approximation, accurate over cache radii
+            distance_km = KM_PER_DEGREE * math.hypot(
+                cached.latitude - lat, (cached.longitude - lon) * lon_scale
             )
 
             return {
@@ -291,17 +369,13 @@ class CacheRepository:
         start_time = time.perf_counter()
 
         try:
-            if session:
+            async with db.session_scope(session) as s:
                 result = await self._save_impl(
-                    session, lat, lon, interpolation_model,
+                    s, lat, lon, interpolation_model,
                     source_dataset, data_tier, country_code
                 )
-            else:
-                async with db.session() as session:
-                    result = await self._save_impl(
-                        session, lat, lon, interpolation_model,
-                        source_dataset, data_tier, country_code
-                    )
+            # The upsert may have rewritten a row find_by_id() has cached
+            self._id_cache.clear()
 
             latency_ms = (time.perf_counter() - start_time) * 1000
             logger.info(
@@ -327,67 +401,25 @@ class CacheRepository:
         country_code: str | None,
     ) -> int:
         """Internal implementation of save."""
-        import json
-
-        model_json = json.dumps(interpolation_model)
+        # orjson: several times faster than json on float-heavy models
+        model_json = orjson.dumps(interpolation_model, option=orjson.OPT_SERIALIZE_NUMPY).decode()
 
         # Use raw SQL to handle PostGIS geometry
         # Note: asyncpg uses $1, $2, etc. placeholders, but SQLAlchemy text()
-        # with bindparams converts :name to $ placeholders automatically
-        if self._has_postgis:
-            query = text("""
-                INSERT INTO cached_locations
-                    (latitude, longitude, geom, interpolation_model,
-                     source_dataset, data_tier, country_code, cache_ttl_days,
-                     created_at, updated_at)
-                VALUES
-                    (:lat, :lon, ST_SetSRID(ST_MakePoint(:lon, :lat), 4326),
-                     CAST(:model AS jsonb), :source, :tier, :country, :ttl,
-                     NOW(), NOW())
-                ON CONFLICT (latitude, longitude)
-                DO UPDATE SET
-                    interpolation_model = CAST(EXCLUDED.interpolation_model AS jsonb),
-                    source_dataset = EXCLUDED.source_dataset,
-                    data_tier = EXCLUDED.data_tier,
-                    updated_at = NOW()
-                RETURNING id
-            """).bindparams(
-                lat=lat,
-                lon=lon,
-                model=model_json,
-                source=source_dataset,
-                tier=data_tier,
-                country=country_code,
-                ttl=settings.DB_CACHE_TTL_DAYS,
-            )
-        else:
-            # Fallback without PostGIS geometry
-            query = text("""
-                INSERT INTO cached_locations
-                    (latitude, longitude, interpolation_model,
-                     source_dataset, data_tier, country_code, cache_ttl_days,
-                     created_at, updated_at)
-                VALUES
-                    (:lat, :lon, CAST(:model AS jsonb), :source, :tier, :country, :ttl,
-                     NOW(), NOW())
-                ON CONFLICT (latitude, longitude)
-                DO UPDATE SET
-                    interpolation_model = CAST(EXCLUDED.interpolation_model AS jsonb),
-                    source_dataset = EXCLUDED.source_dataset,
-                    data_tier = EXCLUDED.data_tier,
-                    updated_at = NOW()
-                RETURNING id
-            """).bindparams(
-                lat=lat,
-                lon=lon,
-                model=model_json,
-                source=source_dataset,
-                tier=data_tier,
-                country=country_code,
-                ttl=settings.DB_CACHE_TTL_DAYS,
-            )
-
-        result = await session.execute(query)
+        # converts :name parameters to $ placeholders automatically
+        query = _UPSERT_QUERY if self._has_postgis else _UPSERT_WITHOUT_GEOM_QUERY
+        result = await session.execute(
+            query,
+            {
+                "lat": lat,
+                "lon": lon,
+                "model": model_json,
+                "source": source_dataset,
+                "tier": data_tier,
+                "country": country_code,
+                "ttl": settings.DB_CACHE_TTL_DAYS,
+            },
+        )
         row = result.fetchone()
         return row.id if row else None
 
@@ -402,11 +434,10 @@ class CacheRepository:
             Number of deleted entries
         """
         try:
-            if session:
-                return await self._delete_expired_impl(session)
-            else:
-                async with db.session() as session:
-                    return await self._delete_expired_impl(session)
+            async with db.session_scope(session) as s:
+                count = await self._delete_expired_impl(s)
+            self._id_cache.clear()
+            return count
         except Exception as e:
             logger.error(f"Cache cleanup error: {e}")
             return 0
@@ -414,13 +445,7 @@ class CacheRepository:
     async def _delete_expired_impl(self, session: AsyncSession) -> int:
         """Internal implementation of delete_expired."""
 
-        query = text("""
-            DELETE FROM cached_locations
-            WHERE created_at < NOW() - INTERVAL '1 day' * cache_ttl_days
-            RETURNING id
-        """)
-
-        result = await session.execute(query)
+        result = await session.execute(_DELETE_EXPIRED_QUERY)
         deleted = result.fetchall()
         count = len(deleted)
 
@@ -440,59 +465,26 @@ class CacheRepository:
             Dict with cache stats (count, oldest, newest, by source, etc.)
         """
         try:
-            if session:
-                return await self._get_stats_impl(session)
-            else:
-                async with db.session() as session:
-                    return await self._get_stats_impl(session)
+            async with db.session_scope(session) as s:
+                return await self._get_stats_impl(s)
         except Exception as e:
             logger.error(f"Cache stats error: {e}")
             return {"error": str(e)}
 
     async def _get_stats_impl(self, session: AsyncSession) -> dict[str, Any]:
         """Internal implementation of get_stats."""
-
-        # Total count and date range
-        count_query = text("""
-            SELECT
-                COUNT(*) as total,
-                MIN(created_at) as oldest,
-                MAX(created_at) as newest
-            FROM cached_locations
-        """)
-
-        result = await session.execute(count_query)
-        row = result.fetchone()
-
-        # Count by source
-        source_query = text("""
-            SELECT source_dataset, COUNT(*) as count
-            FROM cached_locations
-            GROUP BY source_dataset
-        """)
-
-        source_result = await session.execute(source_query)
-        sources = {r.source_dataset: r.count for r in source_result.fetchall()}
-
-        # Count by tier
-        tier_query = text("""
-            SELECT data_tier, COUNT(*) as count
-            FROM cached_locations
-            GROUP BY data_tier
-        """)
-
-        tier_result = await session.execute(tier_query)
-        tiers = {r.data_tier: r.count for r in tier_result.fetchall()}
-
-        # Expired count
-        expired_query = text("""
-            SELECT COUNT(*) as count
-            FROM cached_locations
-            WHERE created_at < NOW() - INTERVAL '1 day' * cache_ttl_days
-        """)
-
-        expired_result = await session.execute(expired_query)
-        expired_row = expired_result.fetchone()
+        result = await session.execute(_STATS_QUERY)
+
+        row = None
+        sources: dict[str, int] = {}
+        tiers: dict[str, int] = {}
+        for r in result.fetchall():
+            if not r.all_sources:
+                sources[r.source_dataset] = r.total
+            elif not r.all_tiers:
+                tiers[r.data_tier] = r.total
+            else:
+                row = r
 
         return {
             "total_entries": row.total if row else 0,
@@ -500,7 +492,7 @@ class CacheRepository:
             "newest_entry": row.newest.isoformat() if row and row.newest else None,
             "by_source": sources,
             "by_tier": tiers,
-            "expired_entries": expired_row.count if expired_row else 0,
+            "expired_entries": row.expired if row else 0,
             "ttl_days": settings.DB_CACHE_TTL_DAYS,
         }
 
@@ -512,6 +504,9 @@ class CacheRepository:
         """
         Find a cached entry by ID.
 
+        Found entries are kept in process for _ID_CACHE_TTL_SECONDS, so
+        repeated lookups of a hot ID skip the database.
+
         Args:
             cache_id: The cache entry ID
             session: Optional existing database session
@@ -519,16 +514,28 @@ class CacheRepository:
         Returns:
             Cached entry dict or None
         """
+        now = time.monotonic()
+        hit = self._id_cache.get(cache_id)
+        if hit is not None:
+            if now - hit[0] < _ID_CACHE_TTL_SECONDS:
+                self._id_cache.move_to_end(cache_id)
+                return dict(hit[1])
+            del self._id_cache[cache_id]
+
         try:
-            if session:
-                return await self._find_by_id_impl(session, cache_id)
-            else:
-                async with db.session() as session:
-                    return await self._find_by_id_impl(session, cache_id)
+            async with db.session_scope(session) as s:
+                entry = await self._find_by_id_impl(s, cache_id)
         except Exception as e:
             logger.error(f"Cache find_by_id error: {e}")
             return None
 
+        if entry is not None:
+            self._id_cache[cache_id] = (now, entry)
+            while len(self._id_cache) > _ID_CACHE_MAX:
+                self._id_cache.popitem(last=False)
+            return dict(entry)
+        return None
+
     async def _find_by_id_impl(
         self,
         session: AsyncSession,
@@ -550,7 +557,7 @@ class CacheRepository:
                 "source_dataset": cached.source_dataset,
                 "country_code": cached.country_code,
                 "cached_at": cached.created_at.isoformat() if cached.created_at else None,
-                "is_expired": cached.is_expired(),
+                "is_expired": cached.expired,
             }
 
         return None
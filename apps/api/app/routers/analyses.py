@@ -5,7 +5,7 @@ Provides access to historical solar analyses for authenticated API users.
 """
 
 import logging
-from datetime import UTC, date, datetime
+from datetime import UTC, date, datetime, timedelta
 from typing import Any
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Query
@@ -14,6 +14,8 @@ from sqlalchemy import and_, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.core.geo import bbox_offsets
+from app.middleware.rate_limit import enforce_api_key_limit
 from app.models.solar_analysis import SolarAnalysis
 from app.repositories.api_keys_repository import api_keys_repository
 
@@ -47,6 +49,23 @@ class AnalysisSummary(BaseModel):
         from_attributes = True
 
 
+# Columns read for an AnalysisSummary, as plain rows rather than ORM objects
+_SUMMARY_COLUMNS = (
+    SolarAnalysis.request_id,
+    SolarAnalysis.latitude,
+    SolarAnalysis.longitude,
+    SolarAnalysis.area_m2,
+    SolarAnalysis.tilt,
+    SolarAnalysis.orientation,
+    SolarAnalysis.annual_generation_kwh,
+    SolarAnalysis.data_tier,
+    SolarAnalysis.confidence_score,
+    SolarAnalysis.status,
+    SolarAnalysis.country_code,
+    SolarAnalysis.created_at,
+)
+
+
 class AnalysisDetail(AnalysisSummary):
     """Full details of a solar analysis."""
 
@@ -90,16 +109,18 @@ async def get_current_api_key(
     x_api_key: str = Header(..., alias="X-API-Key"),
 ) -> dict[str, Any]:
     """Validate API key and return key info."""
-    is_valid, key_info = await api_keys_repository.validate(x_api_key)
+    key_info = await api_keys_repository.authenticate(x_api_key)
 
-    if not is_valid:
+    if key_info is None:
         raise HTTPException(
             status_code=401,
             detail="Invalid or expired API key",
         )
 
+    await enforce_api_key_limit(key_info["id"], key_info["rate_limit_per_minute"])
+
     # Record usage
-    await api_keys_repository.record_usage(x_api_key)
+    api_keys_repository.record_usage(x_api_key)
 
     return key_info
 
@@ -150,9 +171,7 @@ async def list_analyses(
 
     # Geographic filter using bounding box approximation
     if lat is not None and lon is not None:
-        # 1 degree ≈ 111 km at equator
-        lat_offset = radius_km / 111.0
-        lon_offset = radius_km / (111.0 * abs(lat) / 90 + 0.001)  # Avoid div by zero
+        lat_offset, lon_offset = bbox_offsets(lat, radius_km)
 
         conditions.append(
             and_(
@@ -161,29 +180,33 @@ async def list_analyses(
             )
         )
 
-    # Count total
-    count_stmt = select(func.count(SolarAnalysis.id)).where(and_(*conditions))
-    total_result = await db.execute(count_stmt)
-    total_count = total_result.scalar() or 0
-
-    # Get paginated items
+    # One query: the window count sees every matching row before LIMIT/OFFSET
     items_stmt = (
-        select(SolarAnalysis)
+        select(*_SUMMARY_COLUMNS, func.count().over().label("total_count"))
         .where(and_(*conditions))
         .order_by(SolarAnalysis.created_at.desc())
         .limit(limit)
         .offset(offset)
     )
 
-    items_result = await db.execute(items_stmt)
-    analyses = items_result.scalars().all()
+    rows = (await db.execute(items_stmt)).all()
+
+    if rows:
+        total_count = rows[0].total_count
+    elif offset:
+        # Paged past the end: no row carried the total, so count separately
+        count_stmt = select(func.count(SolarAnalysis.id)).where(and_(*conditions))
+        total_count = (await db.execute(count_stmt)).scalar() or 0
+    else:
+        total_count = 0
 
     return PaginatedAnalysesResponse(
         total_count=total_count,
         limit=limit,
         offset=offset,
         items=[
-            AnalysisSummary(
+            # Column types already match the model, so skip re-validation
+            AnalysisSummary.model_construct(
                 request_id=a.request_id,
                 latitude=a.latitude,
                 longitude=a.longitude,
@@ -197,7 +220,7 @@ async def list_analyses(
                 country_code=a.country_code,
                 created_at=a.created_at.isoformat() if a.created_at else "",
             )
-            for a in analyses
+            for a in rows
         ],
     )
 
@@ -218,80 +241,50 @@ async def get_analyses_stats(
     """
     api_key_id = api_key.get("id")
     now = datetime.now(UTC)
+    mine = SolarAnalysis.api_key_id == api_key_id
+    complete = SolarAnalysis.status == "complete"
 
-    # Total count
-    total_result = await db.execute(
-        select(func.count(SolarAnalysis.id)).where(SolarAnalysis.api_key_id == api_key_id)
-    )
-    total = total_result.scalar() or 0
-
-    # Status counts
-    status_result = await db.execute(
-        select(SolarAnalysis.status, func.count(SolarAnalysis.id))
-        .where(SolarAnalysis.api_key_id == api_key_id)
-        .group_by(SolarAnalysis.status)
-    )
-    status_counts = {row[0]: row[1] for row in status_result.fetchall()}
-
-    # Average generation
-    avg_result = await db.execute(
-        select(func.avg(SolarAnalysis.annual_generation_kwh)).where(
-            and_(
-                SolarAnalysis.api_key_id == api_key_id,
-                SolarAnalysis.status == "complete",
-                SolarAnalysis.annual_generation_kwh.isnot(None),
-            )
-        )
-    )
-    avg_generation = avg_result.scalar()
-
-    # Most common country
-    country_result = await db.execute(
-        select(SolarAnalysis.country_code, func.count(SolarAnalysis.id).label("cnt"))
-        .where(
-            and_(
-                SolarAnalysis.api_key_id == api_key_id,
-                SolarAnalysis.country_code.isnot(None),
-            )
-        )
+    # Most common country, evaluated inside the same statement
+    top_country = (
+        select(SolarAnalysis.country_code)
+        .where(mine, SolarAnalysis.country_code.isnot(None))
         .group_by(SolarAnalysis.country_code)
-        .order_by(func.count(SolarAnalysis.id).desc())
+        .order_by(func.count().desc())
         .limit(1)
+        .scalar_subquery()
     )
-    country_row = country_result.fetchone()
-    most_common_country = country_row[0] if country_row else None
-
-    # Last 24h
-    last_24h_result = await db.execute(
-        select(func.count(SolarAnalysis.id)).where(
-            and_(
-                SolarAnalysis.api_key_id == api_key_id,
-                SolarAnalysis.created_at >= now - func.make_interval(hours=24),
-            )
-        )
-    )
-    last_24h = last_24h_result.scalar() or 0
 
-    # Last 7d
-    last_7d_result = await db.execute(
-        select(func.count(SolarAnalysis.id)).where(
-            and_(
-                SolarAnalysis.api_key_id == api_key_id,
-                SolarAnalysis.created_at >= now - func.make_interval(days=7),
-            )
-        )
+    # Every figure in one round-trip; FILTER scopes each aggregate
+    stats_result = await db.execute(
+        select(
+            func.count().label("total"),
+            func.count().filter(complete).label("complete"),
+            func.count().filter(SolarAnalysis.status == "error").label("error"),
+            func.count()
+            .filter(SolarAnalysis.status.in_(("pending", "processing")))
+            .label("pending"),
+            func.avg(SolarAnalysis.annual_generation_kwh).filter(complete).label("avg_kwh"),
+            func.count()
+            .filter(SolarAnalysis.created_at >= now - timedelta(hours=24))
+            .label("last_24h"),
+            func.count()
+            .filter(SolarAnalysis.created_at >= now - timedelta(days=7))
+            .label("last_7d"),
+            top_country.label("top_country"),
+        ).where(mine)
     )
-    last_7d = last_7d_result.scalar() or 0
+    stats = stats_result.one()
+    avg_generation = stats.avg_kwh
 
     return AnalysesStatsResponse(
-        total_analyses=total,
-        successful_analyses=status_counts.get("complete", 0),
-        failed_analyses=status_counts.get("error", 0),
-        pending_analyses=status_counts.get("pending", 0) + status_counts.get("processing", 0),
+        total_analyses=stats.total,
+        successful_analyses=stats.complete,
+        failed_analyses=stats.error,
+        pending_analyses=stats.pending,
         avg_generation_kwh=round(avg_generation, 2) if avg_generation else None,
-        most_common_country=most_common_country,
-        analyses_last_24h=last_24h,
-        analyses_last_7d=last_7d,
+        most_common_country=stats.top_country,
+        analyses_last_24h=stats.last_24h,
+        analyses_last_7d=stats.last_7d,
     )
 
 
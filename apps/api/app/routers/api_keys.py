@@ -3,7 +3,7 @@
 from datetime import datetime
 from typing import Any
 
-from fastapi import APIRouter, Header, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query
 from pydantic import BaseModel, EmailStr, Field
 
 from app.repositories.api_keys_repository import api_keys_repository
@@ -133,20 +133,35 @@ async def create_api_key(
 @router.get("", response_model=list[KeyResponse])
 async def list_api_keys(
     include_inactive: bool = False,
+    limit: int = Query(100, ge=1, le=500),
+    after: datetime | None = Query(
+        None, description="created_at of the last key on the previous page"
+    ),
+    after_id: int | None = Query(None, description="id of the last key on the previous page"),
     x_admin_key: str | None = Header(default=None, alias="X-Admin-Key"),
 ) -> list[KeyResponse]:
     """
-    List all API keys.
+    List API keys, newest first.
 
     Args:
         include_inactive: Whether to include deactivated keys
+        limit: Page size
+        after: Keyset cursor for the next page, given with after_id
+        after_id: Cursor tie-breaker for keys sharing a created_at
 
     Returns:
         List of API keys (without full key values)
     """
     await verify_admin(x_admin_key)
 
-    keys = await api_keys_repository.list_all(include_inactive=include_inactive)
+    if (after is None) != (after_id is None):
+        raise HTTPException(status_code=400, detail="after and after_id must be given together")
+
+    keys = await api_keys_repository.list_all(
+        include_inactive=include_inactive,
+        limit=limit,
+        after=(after, after_id) if after is not None else None,
+    )
     return [KeyResponse(**k) for k in keys]
 
 
@@ -253,22 +268,22 @@ async def validate_api_key(
 
     This endpoint can be used by services to validate keys.
     """
-    is_valid, key_info = await api_keys_repository.validate(x_api_key)
+    key_info = await api_keys_repository.authenticate(x_api_key)
 
-    if not is_valid:
+    if key_info is None:
         raise HTTPException(
             status_code=401,
             detail="Invalid or expired API key",
         )
 
     # Record usage
-    await api_keys_repository.record_usage(x_api_key)
+    api_keys_repository.record_usage(x_api_key)
 
     return {
         "valid": True,
         "key_info": {
-            "name": key_info["name"] if key_info else None,
-            "rate_limit_per_minute": key_info["rate_limit_per_minute"] if key_info else None,
+            "name": key_info["name"],
+            "rate_limit_per_minute": key_info["rate_limit_per_minute"],
         },
     }
 
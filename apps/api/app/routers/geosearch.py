@@ -5,7 +5,7 @@ import logging
 import httpx
 from fastapi import APIRouter, Query
 
-from app.core.cache import cache
+from app.core.cache import cache, make_geosearch_key
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +28,7 @@ async def search_location(
     Results are cached for 7 days.
     """
     # Check cache
-    cache_key = f"geo:{q.lower()}"
+    cache_key = make_geosearch_key(q)
     cached = await cache.get(cache_key)
     if cached:
         import json
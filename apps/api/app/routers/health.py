@@ -4,6 +4,7 @@ from datetime import UTC, datetime
 from typing import Any
 
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy import text
 
@@ -11,6 +12,7 @@ from app.core.circuit_breaker import get_all_breakers
 from app.core.config import settings
 from app.core.database import db
 from app.core.metrics import metrics
+from app.core.migrations import MigrationStatus, migration_state
 from app.middleware.rate_limit import get_all_rate_limiters, get_all_semaphores
 from app.repositories.cache_repository import cache_repository
 
@@ -85,7 +87,7 @@ async def health_check() -> HealthResponse:
 
     services: dict[str, Any] = {
         "database": db_status,
-        "cache": "healthy" if settings.UPSTASH_REDIS_REST_URL else "not_configured",
+        "cache": "healthy" if settings.REDIS_URL else "not_configured",
         "copernicus": (
             breaker_status.get("copernicus", "healthy")
             if settings.COPERNICUS_API_KEY else "not_configured"
@@ -97,10 +99,14 @@ async def health_check() -> HealthResponse:
         ),
     }
 
+    migration_status = migration_state["status"]
+    if migration_status != MigrationStatus.SKIPPED:
+        services["migrations"] = migration_status.value
+
     # Overall status logic
     overall_status = "healthy"
 
-    if db_status.startswith("unhealthy"):
+    if db_status.startswith("unhealthy") or migration_status == MigrationStatus.FAILED:
         overall_status = "degraded"
     elif any(s == "circuit_open" for s in breaker_status.values()):
         overall_status = "degraded"
@@ -144,7 +150,7 @@ async def get_metrics() -> MetricsResponse:
     }
 
     # Get rate limiter status
-    rate_limiter_status = get_all_rate_limiters()
+    rate_limiter_status = await get_all_rate_limiters()
 
     # Get semaphore status
     semaphore_status = get_all_semaphores()
@@ -162,6 +168,15 @@ async def get_metrics() -> MetricsResponse:
     )
 
 
+@router.get("/metrics/prometheus", include_in_schema=False)
+async def get_prometheus_metrics() -> StreamingResponse:
+    """Stream counters in Prometheus text format for scrapers."""
+    return StreamingResponse(
+        metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 @router.post("/circuit-breakers/{breaker_name}/reset")
 async def reset_circuit_breaker(breaker_name: str) -> dict[str, Any]:
     """
@@ -209,7 +224,7 @@ async def get_cache_stats() -> dict[str, Any]:
     return {
         "postgresql_cache": stats,
         "redis_cache": {
-            "configured": bool(settings.UPSTASH_REDIS_REST_URL),
+            "configured": bool(settings.REDIS_URL),
             "ttl_seconds": settings.REDIS_TTL_SECONDS,
         },
         "config": {
@@ -9,7 +9,14 @@ Implements layered caching strategy for solar interpolation models:
 
 import logging
 
-from app.core.cache import cache, get_cached_model, set_cached_model
+from app.core.cache import (
+    cache,
+    get_model_or_lock,
+    make_model_key,
+    release_model_lock,
+    set_cached_model,
+    single_flight,
+)
 from app.repositories.cache_repository import cache_repository
 from app.services.interpolation import InterpolationModel, generate_interpolation_model
 from app.services.solar_data import solar_data_service
@@ -41,14 +48,43 @@ async def get_or_create_model(
     Returns:
         InterpolationModel ready for use
     """
-    # Layer 1: Redis (hot cache) - exact match
-    cached_data = await get_cached_model(lat, lon, radius_km=5.0)
+    # Concurrent requests for the same cell in this process share one lookup
+    # and, on a miss, one fill; each then scales the result to its own area
+    model = await single_flight(
+        f"model:{make_model_key(lat, lon)}",
+        lambda: _load_model(lat, lon, area_m2, panel_efficiency),
+    )
+    return _maybe_scale_model(model, area_m2)
+
+
+async def _load_model(
+    lat: float,
+    lon: float,
+    area_m2: float,
+    panel_efficiency: float,
+) -> InterpolationModel:
+    """Read a model from Redis, or fill it while holding the cross-worker lock."""
+    # Layer 1: Redis (hot cache) - exact match. A miss claims the fill lock,
+    # so other workers wait for our write instead of refilling.
+    cached_data = await get_model_or_lock(lat, lon)
 
     if cached_data:
         logger.info(f"Redis cache HIT for ({lat}, {lon})")
-        cached_model = InterpolationModel(**cached_data)
-        return _maybe_scale_model(cached_model, area_m2)
+        return InterpolationModel(**cached_data)
 
+    try:
+        return await _fill_model(lat, lon, area_m2, panel_efficiency)
+    finally:
+        await release_model_lock(lat, lon)
+
+
+async def _fill_model(
+    lat: float,
+    lon: float,
+    area_m2: float,
+    panel_efficiency: float,
+) -> InterpolationModel:
+    """Load a model from PostgreSQL or the external APIs and cache it."""
     # Layer 2: PostgreSQL (warm cache) - proximity search
     pg_cached = await cache_repository.find_nearby(lat, lon)
 
@@ -63,8 +99,7 @@ async def get_or_create_model(
         # Warm Redis with this result
         await set_cached_model(lat, lon, model_data)
 
-        cached_model = InterpolationModel(**model_data)
-        return _maybe_scale_model(cached_model, area_m2)
+        return InterpolationModel(**model_data)
 
     # Layer 3: External APIs (cache miss)
     logger.info(f"Cache MISS for ({lat}, {lon}), fetching from external APIs")
@@ -142,6 +177,9 @@ def _scale_model(
 
 async def invalidate_cache(lat: float, lon: float) -> bool:
     """Invalidate cache for a specific location."""
-    cache_key = cache._make_cache_key(lat, lon)
-    return await cache.delete(cache_key)
+    deleted = [
+        await cache.delete(cache._make_cache_key(lat, lon, precision, prefix="model"))
+        for precision in (2, 1)
+    ]
+    return all(deleted)
 
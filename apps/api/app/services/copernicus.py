@@ -17,6 +17,7 @@ References:
 
 import asyncio
 import logging
+import time
 from dataclasses import dataclass
 from datetime import datetime
 from io import StringIO
@@ -28,7 +29,7 @@ import pandas as pd
 from app.core.circuit_breaker import CircuitOpenError, copernicus_breaker
 from app.core.config import settings
 from app.core.metrics import metrics, track_external_call
-from app.middleware.rate_limit import copernicus_rate_limiter, copernicus_semaphore
+from app.middleware.rate_limit import copernicus_gate
 
 logger = logging.getLogger(__name__)
 
@@ -187,25 +188,34 @@ class CopernicusService:
             logger.warning("Copernicus circuit breaker is OPEN, using mock data")
             raise CircuitOpenError("copernicus", copernicus_breaker.recovery_timeout)
 
-        # Acquire rate limit and semaphore
-        await copernicus_rate_limiter.acquire()
-
-        async with copernicus_semaphore:
+        # Acquire rate limit, then a concurrency permit
+        async with copernicus_gate:
             # Build and execute request with circuit breaker
             params = self._build_request_params(lat, lon, year)
 
             logger.info(f"Fetching CAMS data for ({lat}, {lon}) year {year}")
 
             async with track_external_call("copernicus"):
+                started = time.perf_counter()
                 try:
                     result = await copernicus_breaker.call(
                         self._do_fetch, params, lat, lon, year
                     )
+                    copernicus_gate.report_success((time.perf_counter() - started) * 1000)
                     return result
                 except CircuitOpenError:
                     # Circuit opened during call, propagate
                     raise
                 except Exception as e:
+                    # A 429 or an unreachable service halves concurrency;
+                    # a 429 also gates retries until Retry-After
+                    if isinstance(e, httpx.HTTPStatusError):
+                        copernicus_gate.report_failure(
+                            e.response.status_code,
+                            e.response.headers.get("Retry-After"),
+                        )
+                    else:
+                        copernicus_gate.report_failure()
                     logger.error(f"Copernicus API error: {e}")
                     raise
 
@@ -17,6 +17,7 @@ References:
 """
 
 import logging
+import time
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Any
@@ -25,7 +26,7 @@ import httpx
 
 from app.core.circuit_breaker import CircuitOpenError, pvgis_breaker
 from app.core.metrics import track_external_call
-from app.middleware.rate_limit import pvgis_rate_limiter, pvgis_semaphore
+from app.middleware.rate_limit import pvgis_gate
 
 logger = logging.getLogger(__name__)
 
@@ -164,21 +165,30 @@ class PVGISService:
 
         database = self._select_database(lat, lon)
 
-        # Acquire rate limit and semaphore
-        await pvgis_rate_limiter.acquire()
-
-        async with pvgis_semaphore:
+        # Acquire rate limit, then a concurrency permit
+        async with pvgis_gate:
             logger.info(f"Fetching PVGIS data for ({lat}, {lon}) using {database}")
 
             async with track_external_call("pvgis"):
+                started = time.perf_counter()
                 try:
                     result = await pvgis_breaker.call(
                         self._do_fetch, lat, lon, year, database
                     )
+                    pvgis_gate.report_success((time.perf_counter() - started) * 1000)
                     return result
                 except CircuitOpenError:
                     raise
                 except Exception as e:
+                    # A 429 or an unreachable service halves concurrency;
+                    # a 429 also gates retries until Retry-After
+                    if isinstance(e, httpx.HTTPStatusError):
+                        pvgis_gate.report_failure(
+                            e.response.status_code,
+                            e.response.headers.get("Retry-After"),
+                        )
+                    else:
+                        pvgis_gate.report_failure()
                     logger.error(f"PVGIS API error: {e}")
                     raise
 
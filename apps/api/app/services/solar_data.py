@@ -20,7 +20,13 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Any
 
-from app.core.cache import get_cached_model, set_cached_model
+from app.core.cache import (
+    get_model_or_lock,
+    make_model_key,
+    release_model_lock,
+    set_cached_model,
+    single_flight,
+)
 from app.core.metrics import log_solar_request
 from app.repositories.cache_repository import cache_repository
 from app.services.copernicus import SolarRadiationData, copernicus_service
@@ -104,20 +110,34 @@ class SolarDataService:
         Returns:
             Tuple of (UnifiedSolarData, cache_info_dict)
         """
-        import time
-        start_time = time.perf_counter()
-
         if year is None:
             year = datetime.now().year - 1
 
+        # Concurrent requests for the same cell and year share one lookup and fill
+        data, cache_info = await single_flight(
+            f"solar_data:{make_model_key(lat, lon)}:{year}",
+            lambda: self._fetch_with_cache(lat, lon, year),
+        )
+        return data, dict(cache_info)
+
+    async def _fetch_with_cache(
+        self,
+        lat: float,
+        lon: float,
+        year: int,
+    ) -> tuple[UnifiedSolarData, dict[str, Any]]:
+        """Internal implementation of fetch_with_cache."""
+        import time
+        start_time = time.perf_counter()
+
         cache_info = {
             "layer": "miss",
             "source": "unknown",
             "cached": False,
         }
 
-        # Layer 1: Redis (hot cache)
-        redis_data = await get_cached_model(lat, lon)
+        # Layer 1: Redis (hot cache); a miss claims the fill lock for this cell
+        redis_data = await get_model_or_lock(lat, lon)
         if redis_data:
             cache_info["layer"] = "redis"
             cache_info["cached"] = True
@@ -125,46 +145,49 @@ class SolarDataService:
             log_solar_request(lat, lon, "redis", True, latency_ms)
             return self._from_cached_model(redis_data, lat, lon, year), cache_info
 
-        # Layer 2: PostgreSQL (warm cache with proximity search)
-        pg_data = await self.pg_cache.find_nearby(lat, lon)
-        if pg_data:
-            cache_info["layer"] = "postgresql"
-            cache_info["cached"] = True
-            cache_info["distance_km"] = pg_data.get("distance_km", 0)
-
-            # Warm Redis cache with this result
-            model = pg_data.get("interpolation_model", {})
-            await set_cached_model(lat, lon, model)
+        try:
+            # Layer 2: PostgreSQL (warm cache with proximity search)
+            pg_data = await self.pg_cache.find_nearby(lat, lon)
+            if pg_data:
+                cache_info["layer"] = "postgresql"
+                cache_info["cached"] = True
+                cache_info["distance_km"] = pg_data.get("distance_km", 0)
+
+                # Warm Redis cache with this result
+                model = pg_data.get("interpolation_model", {})
+                await set_cached_model(lat, lon, model)
+
+                latency_ms = (time.perf_counter() - start_time) * 1000
+                log_solar_request(lat, lon, "postgresql", True, latency_ms)
+                return self._from_cached_model(pg_data, lat, lon, year), cache_info
+
+            # Layer 3: External APIs (cache miss)
+            data = await self.fetch_solar_radiation(lat, lon, year)
+            cache_info["layer"] = "external"
+            cache_info["source"] = data.source
+
+            # Cache the result in both layers
+            model_data = self._to_cached_model(data)
+
+            # Redis (hot cache)
+            await set_cached_model(lat, lon, model_data)
+
+            # PostgreSQL (warm cache)
+            await self.pg_cache.save(
+                lat=lat,
+                lon=lon,
+                interpolation_model=model_data,
+                source_dataset=data.source.split()[0],  # e.g., "PVGIS-SARAH2"
+                data_tier=data.data_tier,
+                country_code=None,  # TODO: detect country
+            )
 
             latency_ms = (time.perf_counter() - start_time) * 1000
-            log_solar_request(lat, lon, "postgresql", True, latency_ms)
-            return self._from_cached_model(pg_data, lat, lon, year), cache_info
-
-        # Layer 3: External APIs (cache miss)
-        data = await self.fetch_solar_radiation(lat, lon, year)
-        cache_info["layer"] = "external"
-        cache_info["source"] = data.source
-
-        # Cache the result in both layers
-        model_data = self._to_cached_model(data)
-
-        # Redis (hot cache)
-        await set_cached_model(lat, lon, model_data)
-
-        # PostgreSQL (warm cache)
-        await self.pg_cache.save(
-            lat=lat,
-            lon=lon,
-            interpolation_model=model_data,
-            source_dataset=data.source.split()[0],  # e.g., "PVGIS-SARAH2"
-            data_tier=data.data_tier,
-            country_code=None,  # TODO: detect country
-        )
-
-        latency_ms = (time.perf_counter() - start_time) * 1000
-        log_solar_request(lat, lon, data.source, False, latency_ms)
+            log_solar_request(lat, lon, data.source, False, latency_ms)
 
-        return data, cache_info
+            return data, cache_info
+        finally:
+            await release_model_lock(lat, lon)
 
     def _from_cached_model(
         self,
@@ -0,0 +1,113 @@
+"""Tests for the analyses history endpoints."""
+
+from datetime import UTC, datetime
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from sqlalchemy.dialects import postgresql
+
+from app.routers.analyses import AnalysisSummary, get_analyses_stats, list_analyses
+
+
+class FakeDb:
+    """Session stand-in returning queued results in order."""
+
+    def __init__(self, *results: Any) -> None:
+        self.results = list(results)
+        self.statements: list[object] = []
+
+    async def execute(self, statement: object) -> Any:
+        self.statements.append(statement)
+        result = self.results.pop(0)
+        return SimpleNamespace(all=lambda: result, scalar=lambda: result, one=lambda: result)
+
+
+def analysis_row(request_id: str, total_count: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        request_id=request_id, latitude=-33.45, longitude=-70.65, area_m2=15.0, tilt=30.0,
+        orientation="N", annual_generation_kwh=4200.0, data_tier="standard",
+        confidence_score=0.9, status="complete", country_code="CL",
+        created_at=datetime(2026, 10, 1, tzinfo=UTC), total_count=total_count,
+    )
+
+
+async def list_page(db: FakeDb, offset: int = 0) -> Any:
+    return await list_analyses(
+        limit=2, offset=offset, from_date=None, to_date=None, status=None,
+        lat=None, lon=None, radius_km=10, db=db, api_key={"id": 1},  # type: ignore[arg-type]
+    )
+
+
+@pytest.mark.asyncio
+async def test_geo_filter_scales_longitude_by_latitude() -> None:
+    """Test the box spans ~radius east-west at the equator, not 90x more."""
+    db = FakeDb([])
+
+    await list_analyses(
+        limit=2, offset=0, from_date=None, to_date=None, status=None,
+        lat=0.0, lon=0.0, radius_km=11.1, db=db, api_key={"id": 1},  # type: ignore[arg-type]
+    )
+
+    params = db.statements[0].compile().params
+    lon_bounds = [v for k, v in params.items() if k.startswith("longitude")]
+    assert lon_bounds == pytest.approx([-0.1, 0.1])
+
+
+@pytest.mark.asyncio
+async def test_list_counts_with_window_function() -> None:
+    """Test the page and its total come from one query."""
+    db = FakeDb([analysis_row("a", 5), analysis_row("b", 5)])
+
+    page = await list_page(db)
+
+    assert len(db.statements) == 1
+    assert "count(*) OVER ()" in str(db.statements[0])
+    assert page.total_count == 5
+    assert [item.request_id for item in page.items] == ["a", "b"]
+    assert page.items[0].created_at == "2026-10-01T00:00:00+00:00"
+
+
+@pytest.mark.asyncio
+async def test_list_selects_only_summary_columns() -> None:
+    """Test the page query projects the summary fields, not whole rows."""
+    db = FakeDb([])
+
+    await list_page(db)
+
+    selected = [c.name for c in db.statements[0].selected_columns]
+    assert selected == [*AnalysisSummary.model_fields, "total_count"]
+
+
+@pytest.mark.asyncio
+async def test_list_past_the_end_falls_back_to_count() -> None:
+    """Test an empty page beyond the first still reports the total."""
+    db = FakeDb([], 5)
+
+    page = await list_page(db, offset=10)
+
+    assert len(db.statements) == 2
+    assert page.total_count == 5
+    assert page.items == []
+
+
+@pytest.mark.asyncio
+async def test_stats_come_from_one_aggregate_query() -> None:
+    """Test every stats figure is read from a single FILTER-aggregated row."""
+    row = SimpleNamespace(
+        total=10, complete=6, error=1, pending=3, avg_kwh=4200.456,
+        last_24h=2, last_7d=9, top_country="CL",
+    )
+    db = FakeDb(row)
+
+    stats = await get_analyses_stats(db=db, api_key={"id": 1})  # type: ignore[arg-type]
+
+    assert len(db.statements) == 1
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+    assert sql.count("FILTER (WHERE") == 6
+    assert "LIMIT" in sql  # top country as a scalar subquery
+    assert stats.total_analyses == 10
+    assert stats.pending_analyses == 3
+    assert stats.avg_generation_kwh == 4200.46
+    assert stats.most_common_country == "CL"
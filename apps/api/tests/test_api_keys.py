@@ -0,0 +1,412 @@
+"""Tests for the API key model and usage tracking."""
+
+import asyncio
+import re
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.core.database import db
+from app.core.metrics import metrics
+from app.models.api_keys import ApiKey, hash_api_key
+from app.repositories.api_keys_repository import ApiKeysRepository, generate_api_key
+
+# Well-formed keys, as issued by generate_api_key()
+KEY = "sk_" + "a" * 43
+OTHER_KEY = "sk_" + "b" * 43
+
+
+def test_is_valid_checks_active_and_expiry() -> None:
+    """Test inactive or expired keys are rejected."""
+    key = ApiKey(key="k", name="test", is_active=True)
+    assert key.is_valid()
+
+    key.expires_at = datetime.now(UTC) + timedelta(hours=1)
+    assert key.is_valid()
+
+    key.is_active = False
+    assert not key.is_valid()
+
+
+def test_is_valid_follows_changed_expiry() -> None:
+    """Test the cached expiry timestamp is refreshed when expires_at changes."""
+    key = ApiKey(key="k", name="test", is_active=True)
+    key.expires_at = datetime.now(UTC) + timedelta(hours=1)
+    assert key.is_valid()
+
+    key.expires_at = datetime.now(UTC) - timedelta(seconds=1)
+    assert not key.is_valid()
+
+
+class FakeSession:
+    """Records executed statements."""
+
+    def __init__(self, fail: bool = False, row: object = None) -> None:
+        self.fail = fail
+        self.row = row
+        self.statements: list[object] = []
+        self.params: list[object] = []
+
+    async def execute(self, statement: object, params: object = None) -> SimpleNamespace:
+        if self.fail:
+            raise RuntimeError("db down")
+        self.statements.append(statement)
+        self.params.append(params)
+        return SimpleNamespace(
+            rowcount=2,
+            scalar_one_or_none=lambda: self.row,
+            one_or_none=lambda: self.row,
+            one=lambda: self.row,
+        )
+
+
+class ListingSession(FakeSession):
+    """Returns the given rows as the result of any statement."""
+
+    def __init__(self, rows: list[SimpleNamespace]) -> None:
+        super().__init__()
+        self.rows = rows
+
+    async def execute(self, statement: object, params: object = None) -> list[SimpleNamespace]:
+        self.statements.append(statement)
+        return self.rows
+
+
+def use_session(monkeypatch: pytest.MonkeyPatch, session: FakeSession) -> None:
+    @asynccontextmanager
+    async def fake_session() -> AsyncIterator[FakeSession]:
+        yield session
+
+    monkeypatch.setattr(db, "session", fake_session)
+
+
+@pytest.mark.asyncio
+async def test_usage_flushed_in_one_update(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test uses are aggregated per key and written by a single UPDATE."""
+    repository = ApiKeysRepository()
+    session = FakeSession()
+    use_session(monkeypatch, session)
+
+    for key in ("a", "b", "a", "a"):
+        repository.record_usage(key)
+
+    assert await repository.flush_usage() == 2
+    assert len(session.statements) == 1
+    params = session.statements[0].compile().params
+    assert sorted(v for v in params.values() if isinstance(v, int)) == [1, 3]
+    assert await repository.flush_usage() == 0
+
+
+@pytest.mark.asyncio
+async def test_usage_kept_when_flush_fails(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test counts from a failed flush are merged into the next one."""
+    repository = ApiKeysRepository()
+    use_session(monkeypatch, FakeSession(fail=True))
+    repository.record_usage("a")
+    assert await repository.flush_usage() == 0
+
+    repository.record_usage("a")
+    session = FakeSession()
+    use_session(monkeypatch, session)
+    await repository.flush_usage()
+
+    params = session.statements[0].compile().params
+    assert [v for v in params.values() if isinstance(v, int)] == [2]
+
+
+@pytest.mark.asyncio
+async def test_usage_kept_when_flush_cancelled(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test a flush cancelled mid-write leaves its counts for the shutdown flush."""
+    repository = ApiKeysRepository()
+    started = asyncio.Event()
+
+    class BlockingSession(FakeSession):
+        async def execute(self, statement: object, params: object = None) -> SimpleNamespace:
+            started.set()
+            await asyncio.Event().wait()
+            raise AssertionError("unreachable")
+
+    use_session(monkeypatch, BlockingSession())
+    repository.record_usage("a")
+    task = asyncio.create_task(repository.flush_usage())
+    await started.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    session = FakeSession()
+    use_session(monkeypatch, session)
+    assert await repository.flush_usage() == 2
+    params = session.statements[0].compile().params
+    assert [v for v in params.values() if isinstance(v, int)] == [1]
+
+
+def test_usage_flush_requested_after_enough_events(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test reaching API_KEY_USAGE_FLUSH_EVENTS wakes the flush task early."""
+    monkeypatch.setattr(settings, "API_KEY_USAGE_FLUSH_EVENTS", 3)
+    repository = ApiKeysRepository()
+
+    repository.record_usage("a")
+    repository.record_usage("b")
+    assert not repository._flush_requested.is_set()
+    repository.record_usage("a")
+    assert repository._flush_requested.is_set()
+
+
+def test_to_dict_reads_every_column() -> None:
+    """Test to_dict maps each table column to its value."""
+    key = ApiKey(key="k", name="test", is_active=True, total_requests=3)
+    data = key.to_dict()
+
+    assert list(data) == [c.name for c in ApiKey.__table__.columns]
+    assert data["key"] == "k"
+    assert data["total_requests"] == 3
+    assert data["expires_at"] is None
+
+
+@pytest.mark.asyncio
+async def test_validate_looks_up_key_hash(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test auth matches on the key's SHA-256 digest, not the key string."""
+    session = FakeSession()
+    use_session(monkeypatch, session)
+
+    assert await ApiKeysRepository().validate(KEY) == (False, None)
+
+    params = session.statements[0].compile().params
+    assert list(params.values()) == [hash_api_key(KEY)]
+    assert len(hash_api_key(KEY)) == 32
+
+
+@pytest.mark.asyncio
+async def test_malformed_keys_skip_the_database(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test keys that cannot have been issued are rejected without a query."""
+    session = FakeSession()
+    use_session(monkeypatch, session)
+    repository = ApiKeysRepository()
+
+    for key in ("", "sk_short", KEY + "x", KEY.replace("a", "!", 1), "pk" + KEY[2:]):
+        assert await repository.authenticate(key) is None
+        assert await repository.validate(key) == (False, None)
+        assert await repository.get_by_key(key) is None
+    assert session.statements == []
+    assert not repository._auth_cache
+@pytest.mark.asyncio
+async def test_authenticate_reads_only_auth_columns(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test auth selects the narrow column set and rejects expired keys."""
+    row = SimpleNamespace(
+        id=3, name="k", rate_limit_per_minute=60, is_active=True, expires_at=None
+    )
+    session = FakeSession(row=row)
+    use_session(monkeypatch, session)
+    repository = ApiKeysRepository()
+
+    assert await repository.authenticate(KEY) == {
+        "id": 3, "name": "k", "rate_limit_per_minute": 60
+    }
+    columns = [c.name for c in session.statements[0].selected_columns]
+    assert columns == ["id", "name", "rate_limit_per_minute", "is_active", "expires_at"]
+    assert session.params[0] == {"key_hash": hash_api_key(KEY)}
+
+    row.expires_at = datetime.now(UTC) - timedelta(seconds=1)
+    repository.clear_cache()
+    assert await repository.authenticate(KEY) is None
+
+
+@pytest.mark.asyncio
+async def test_authenticate_caches_results(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test repeated auth skips the query until the TTL passes or keys change."""
+    row = SimpleNamespace(
+        id=3, name="k", rate_limit_per_minute=60, is_active=True, expires_at=None
+    )
+    session = FakeSession(row=row)
+    use_session(monkeypatch, session)
+    repository = ApiKeysRepository()
+
+    first = await repository.authenticate(KEY)
+    assert await repository.authenticate(KEY) == first
+    assert await repository.authenticate(OTHER_KEY) == first  # same fake row
+    assert len(session.statements) == 2
+    assert all(isinstance(digest, bytes) for digest in repository._auth_cache)
+
+    await repository.delete(3)
+    await repository.authenticate(KEY)
+    assert len(session.statements) == 4
+
+    monkeypatch.setattr(settings, "API_KEY_CACHE_TTL_SECONDS", 0)
+    await repository.authenticate(KEY)
+    assert len(session.statements) == 5
+
+
+@pytest.mark.asyncio
+async def test_authenticate_serves_stale_result_on_db_error(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test an expired cache entry answers auth while the database is down."""
+    row = SimpleNamespace(
+        id=3, name="k", rate_limit_per_minute=60, is_active=True, expires_at=None
+    )
+    session = FakeSession(row=row)
+    use_session(monkeypatch, session)
+    repository = ApiKeysRepository()
+    first = await repository.authenticate(KEY)
+
+    async def unreachable(statement: object, params: object = None) -> None:
+        raise OperationalError("SELECT", {}, ConnectionRefusedError())
+
+    monkeypatch.setattr(session, "execute", unreachable)
+    monkeypatch.setattr(settings, "API_KEY_CACHE_TTL_SECONDS", 0)
+    served = metrics._stale_auth_served
+
+    assert await repository.authenticate(KEY) == first
+    assert metrics._stale_auth_served == served + 1
+
+    with pytest.raises(OperationalError):
+        await repository.authenticate(OTHER_KEY)
+
+    monkeypatch.setattr(settings, "API_KEY_STALE_WHILE_ERROR_SECONDS", 0)
+    with pytest.raises(OperationalError):
+        await repository.authenticate(KEY)
+    assert not repository._auth_cache
+@pytest.mark.asyncio
+async def test_usage_matched_by_key_hash(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test pending usage holds key digests and the flush matches on key_hash."""
+    repository = ApiKeysRepository()
+    session = FakeSession()
+    use_session(monkeypatch, session)
+
+    repository.record_usage("sk_test")
+    assert list(repository._pending_usage) == [hash_api_key("sk_test")]
+
+    await repository.flush_usage()
+    sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    assert "FROM (VALUES" in sql
+    assert "WHERE api_keys.key_hash = usage.key_hash" in sql
+
+
+@pytest.mark.asyncio
+async def test_stats_aggregated_in_sql(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test key stats come from one aggregate query, not loaded rows."""
+    session = FakeSession(row=(5, 3, 1, 420))
+    use_session(monkeypatch, session)
+
+    assert await ApiKeysRepository().get_stats() == {
+        "total_keys": 5,
+        "active_keys": 3,
+        "inactive_keys": 2,
+        "expired_keys": 1,
+        "total_requests": 420,
+    }
+    sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    assert sql.count("FILTER (WHERE") == 2
+
+
+@pytest.mark.asyncio
+async def test_update_returns_row_in_one_statement(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test update reads the changed row back with RETURNING, not a second query."""
+    updated = ApiKey(id=4, key="sk_test_updated", name="renamed", is_active=False)
+    session = FakeSession(row=updated)
+    use_session(monkeypatch, session)
+
+    result = await ApiKeysRepository().deactivate(4)
+
+    assert result is True
+    assert len(session.statements) == 1
+    sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE api_keys SET") and "RETURNING" in sql
+
+
+@pytest.mark.asyncio
+async def test_list_all_maps_plain_rows(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test listing builds dicts from Core rows, sharing one clock reading."""
+    now = datetime.now(UTC)
+    rows = [
+        SimpleNamespace(
+            id=i, key=f"sk_{i:012d}", name=f"k{i}", description=None, owner_email=None,
+            rate_limit_per_minute=100, rate_limit_per_day=10000, is_active=True,
+            last_used_at=None, total_requests=0, created_at=now, updated_at=now,
+            expires_at=now - timedelta(days=1) if i else None,
+        )
+        for i in range(2)
+    ]
+    session = ListingSession(rows)
+    use_session(monkeypatch, session)
+
+    listed = await ApiKeysRepository().list_all()
+
+    assert [k["is_valid"] for k in listed] == [True, False]
+    assert listed[0]["key_prefix"] == "sk_000000000..."
+    assert listed[1]["created_at"] == now.isoformat()
+
+
+@pytest.mark.asyncio
+async def test_list_all_pages_by_created_at_and_id(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test listing continues from a (created_at, id) cursor, so ties are not skipped."""
+    session = ListingSession([])
+    use_session(monkeypatch, session)
+
+    await ApiKeysRepository().list_all(limit=20, after=(datetime.now(UTC), 7))
+
+    sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    assert "WHERE api_keys.is_active AND (api_keys.created_at, api_keys.id) < (" in sql
+    assert "ORDER BY api_keys.created_at DESC, api_keys.id DESC \n LIMIT " in sql
+
+
+@pytest.mark.asyncio
+async def test_create_inserts_with_returning(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test creation is one INSERT ... RETURNING with no ORM flush."""
+    now = datetime.now(UTC)
+    session = FakeSession(row=(7, now))
+    use_session(monkeypatch, session)
+
+    created = await ApiKeysRepository().create(name="onboarding", rate_limit_per_day=50)
+
+    sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("INSERT INTO api_keys")
+    assert sql.endswith("RETURNING api_keys.id, api_keys.created_at")
+    params = session.statements[0].compile().params
+    assert params["key_hash"] == hash_api_key(created["key"])
+    assert created["id"] == 7
+    assert created["created_at"] == now.isoformat()
+    assert created["rate_limit_per_day"] == 50
+
+@pytest.mark.asyncio
+async def test_validate_many_uses_one_query(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test bulk validation issues one IN query and aligns rows to input keys."""
+    now = datetime.now(UTC)
+    row = SimpleNamespace(
+        id=1, key=KEY, key_hash=hash_api_key(KEY), name="k", description=None,
+        owner_email=None, rate_limit_per_minute=100, rate_limit_per_day=10000,
+        is_active=False, last_used_at=None, total_requests=0, created_at=now,
+        updated_at=now, expires_at=None,
+    )
+    session = ListingSession([row])
+    use_session(monkeypatch, session)
+    repository = ApiKeysRepository()
+
+    results = await repository.validate_many([KEY, OTHER_KEY, "garbage"])
+
+    assert len(session.statements) == 1
+    assert results[KEY][0] is False and results[KEY][1]["id"] == 1
+    assert results[OTHER_KEY] == (False, None)
+    assert results["garbage"] == (False, None)
+
+    row.is_active = True
+    assert (await repository.get_many_by_ids([1, 1, 2]))[1]["is_valid"] is True
+    assert "IN (__[POSTCOMPILE_id_1])" in str(session.statements[1])
+    assert await repository.get_many_by_ids([]) == {}
+    assert len(session.statements) == 2
+
+def test_generated_keys_are_prefixed_url_safe_tokens() -> None:
+    """Test generated keys keep the sk_ prefix and unpadded url-safe body."""
+    key = generate_api_key()
+
+    assert key.startswith("sk_")
+    assert len(key) == 3 + 43
+    assert re.fullmatch(r"[A-Za-z0-9_-]+", key[3:])
+    assert generate_api_key() != key
@@ -0,0 +1,451 @@
+"""Tests for Redis cache manager."""
+
+import asyncio
+import json
+import logging
+from collections.abc import Iterator
+from types import SimpleNamespace
+
+import msgpack
+import pytest
+from redis.exceptions import NoScriptError
+
+from app.core import cache as cache_module
+from app.core.cache import (
+    CacheManager,
+    get_cached_solar_data,
+    get_model_or_lock,
+    make_geosearch_key,
+    make_model_key,
+    make_solar_key,
+    release_model_lock,
+    set_cached_model,
+    set_cached_solar_data,
+)
+from app.core.config import settings
+
+
+def encode(value: str | bytes) -> bytes:
+    """Store values as bytes, like a client with decode_responses=False."""
+    return value.encode() if isinstance(value, str) else value
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for redis.asyncio.Redis."""
+
+    def __init__(self, data: dict[str, str | bytes] | None = None, fail: bool = False) -> None:
+        self.data = {key: encode(value) for key, value in (data or {}).items()}
+        self.fail = fail
+        self.calls: list[str] = []
+        self.flush_scripts = False
+
+    async def get(self, key: str) -> bytes | None:
+        self.calls.append("get")
+        if self.fail:
+            raise ConnectionError("redis down")
+        return self.data.get(key)
+
+    async def setex(self, key: str, ex: int, value: str | bytes) -> bool:
+        self.calls.append("setex")
+        self.data[key] = encode(value)
+        return True
+
+    async def delete(self, key: str) -> int:
+        self.calls.append("delete")
+        return int(self.data.pop(key, None) is not None)
+
+    async def exists(self, key: str) -> int:
+        self.calls.append("exists")
+        return int(key in self.data)
+
+    async def ttl(self, key: str) -> int:
+        self.calls.append("ttl")
+        return 60 if key in self.data else -2
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args: object) -> object:
+        """Emulate the model scripts: get-or-lock (two keys) or lock release (one)."""
+        self.calls.append("eval")
+        return self._run_script(numkeys, *keys_and_args)
+
+    async def evalsha(self, sha: str, numkeys: int, *keys_and_args: object) -> object:
+        self.calls.append("evalsha")
+        if self.flush_scripts:
+            self.flush_scripts = False
+            raise NoScriptError("No matching script. Please use EVAL.")
+        return self._run_script(numkeys, *keys_and_args)
+
+    def _run_script(self, numkeys: int, *keys_and_args: object) -> object:
+        if self.fail:
+            raise ConnectionError("redis down")
+        if numkeys == 1:
+            lock_key, token = keys_and_args
+            if self.data.get(lock_key) == encode(str(token)):
+                del self.data[lock_key]
+                return 1
+            return 0
+        data_key, lock_key = keys_and_args[:numkeys]
+        if data_key in self.data:
+            return self.data[data_key]
+        if lock_key in self.data:
+            return 0
+        self.data[lock_key] = encode(str(keys_and_args[numkeys]))
+        return 1
+
+    async def aclose(self) -> None:
+        self.calls.append("aclose")
+
+
+@pytest.fixture(autouse=True)
+def clear_l0() -> Iterator[None]:
+    """Isolate in-process state: fake models and lock tokens must not leak."""
+    cache_module._L0.clear()
+    cache_module._fill_tokens.clear()
+    yield
+    cache_module._L0.clear()
+    cache_module._fill_tokens.clear()
+
+
+def make_manager(client: FakeRedis) -> CacheManager:
+    """Create a cache manager wired to a fake client."""
+    manager = CacheManager()
+    manager._client = client
+    manager._initialized = True
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_set_cached_model_writes_fine_grid(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test set_cached_model writes the key get_model_or_lock reads."""
+    client = FakeRedis()
+    monkeypatch.setattr(cache_module, "cache", make_manager(client))
+
+    assert await set_cached_model(-33.45, -70.65, {"grid": "fine"}) is True
+    assert client.calls == ["setex"]
+    assert set(client.data) == {"model2:-3345:-7065"}
+
+    cache_module._L0.clear()
+    assert await get_model_or_lock(-33.45, -70.65) == {"grid": "fine"}
+
+
+@pytest.mark.asyncio
+async def test_client_calls_are_awaited() -> None:
+    """Test every single-key operation awaits the async client."""
+    client = FakeRedis()
+    manager = make_manager(client)
+
+    assert await manager.set("a", "1", ex=60) is True
+    assert await manager.get("a") == b"1"
+    assert await manager.exists("a") is True
+    assert await manager.get_ttl("a") == 60
+    assert await manager.delete("a") is True
+    assert await manager.exists("a") is False
+    assert client.calls == ["setex", "get", "exists", "ttl", "delete", "exists"]
+
+
+@pytest.mark.asyncio
+async def test_init_and_close(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test init builds a pooled client and close resets the manager."""
+    monkeypatch.setattr(settings, "REDIS_URL", "redis://localhost:6379/0")
+    manager = CacheManager()
+
+    manager.init()
+    assert manager.is_initialized
+
+    await manager.close()
+    assert not manager.is_initialized
+    assert manager._client is None
+
+
+@pytest.mark.asyncio
+async def test_close_when_never_configured() -> None:
+    """Test close is safe when Redis was never initialized."""
+    manager = CacheManager()
+
+    await manager.close()
+    assert not manager.is_initialized
+
+
+def test_init_warns_on_legacy_upstash_settings(
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Test init warns when only the removed REST settings are present."""
+    monkeypatch.setattr(settings, "REDIS_URL", "")
+    monkeypatch.setattr(settings, "UPSTASH_REDIS_REST_URL", "https://xxx.upstash.io")
+    manager = CacheManager()
+
+    with caplog.at_level(logging.WARNING, logger="app.core.cache"):
+        manager.init()
+
+    assert not manager.is_initialized
+    assert "REDIS_URL" in caplog.text
+    assert "UPSTASH_REDIS_REST_URL" in caplog.text
+
+
+def test_grid_keys() -> None:
+    """Test grid keys use scaled integers and keep precisions apart."""
+    assert make_model_key(-33.45, -70.65) == "model2:-3345:-7065"
+    assert make_solar_key(0.29, 10.0, 2023) == "solar2:29:1000:2023"
+    assert cache_module.cache._make_cache_key(0.5, 0.5, 1, "model") != make_model_key(0.05, 0.05)
+
+
+def test_geosearch_keys_are_hashed() -> None:
+    """Test geosearch keys are fixed-length and normalize the query."""
+    key = make_geosearch_key("  Santiago, Chile ")
+
+    assert key == make_geosearch_key("santiago, chile")
+    assert len(key) == len("geo:") + 11
+    assert make_geosearch_key("x" * 500 + "a") != make_geosearch_key("x" * 500 + "b")
+
+
+@pytest.mark.asyncio
+async def test_l0_answers_repeat_lookups(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test a Redis hit is served from L0 on the next lookup."""
+    client = FakeRedis({"model2:-3345:-7065": json.dumps({"grid": "fine"})})
+    monkeypatch.setattr(cache_module, "cache", make_manager(client))
+
+    assert await get_model_or_lock(-33.45, -70.65) == {"grid": "fine"}
+    assert await get_model_or_lock(-33.45, -70.65) == {"grid": "fine"}
+    assert client.calls == ["eval"]
+
+
+@pytest.mark.asyncio
+async def test_l0_entries_expire(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test L0 entries older than the TTL fall through to Redis."""
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    client = FakeRedis()
+    monkeypatch.setattr(cache_module, "cache", make_manager(client))
+
+    await set_cached_solar_data(1.0, 2.0, 2023, {"ghi": 5})
+    assert await get_cached_solar_data(1.0, 2.0, 2023) == {"ghi": 5}
+    assert client.calls == ["setex"]
+
+    now[0] += cache_module._L0_TTL_SECONDS
+    assert await get_cached_solar_data(1.0, 2.0, 2023) == {"ghi": 5}
+    assert client.calls == ["setex", "get"]
+
+
+def test_l0_evicts_least_recently_used(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test L0 stays bounded and evicts the least recently used key."""
+    monkeypatch.setattr(cache_module, "_L0_MAX", 2)
+
+    cache_module._l0_put("a", b"1")
+    cache_module._l0_put("b", b"2")
+    assert cache_module._l0_get("a") == b"1"
+    cache_module._l0_put("c", b"3")
+
+    assert list(cache_module._L0) == ["a", "c"]
+
+
+@pytest.mark.asyncio
+async def test_delete_evicts_l0() -> None:
+    """Test deleting a key also drops its L0 entry."""
+    manager = make_manager(FakeRedis({"a": "1"}))
+    cache_module._l0_put("a", b"1")
+
+    assert await manager.delete("a") is True
+    assert cache_module._l0_get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_solar_data_round_trip(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test solar data survives serialization, including non-JSON types."""
+    client = FakeRedis()
+    monkeypatch.setattr(cache_module, "cache", make_manager(client))
+
+    await set_cached_solar_data(1.0, 2.0, 2023, {"ghi": 5.5, "source": {"copernicus"}})
+    cache_module._L0.clear()
+
+    assert await get_cached_solar_data(1.0, 2.0, 2023) == {"ghi": 5.5, "source": "{'copernicus'}"}
+
+
+@pytest.mark.asyncio
+async def test_get_model_or_lock_hit(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test a cached model is returned from the single EVAL round-trip."""
+    client = FakeRedis({"model2:-3345:-7065": json.dumps({"grid": "fine"})})
+    monkeypatch.setattr(cache_module, "cache", make_manager(client))
+
+    assert await get_model_or_lock(-33.45, -70.65) == {"grid": "fine"}
+    assert client.calls == ["eval"]
+
+
+@pytest.mark.asyncio
+async def test_get_model_or_lock_first_miss_claims(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test the first miss claims the fill lock and returns immediately."""
+    client = FakeRedis()
+    monkeypatch.setattr(cache_module, "cache", make_manager(client))
+
+    assert await get_model_or_lock(-33.45, -70.65) is None
+    assert "lock:model2:-3345:-7065" in client.data
+
+
+@pytest.mark.asyncio
+async def test_get_model_or_lock_waits_for_filler(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test a concurrent miss waits for the lock holder's write."""
+    client = FakeRedis({"lock:model2:-3345:-7065": "1"})
+    monkeypatch.setattr(cache_module, "cache", make_manager(client))
+
+    async def fill_later() -> None:
+        await asyncio.sleep(0.1)
+        client.data["model2:-3345:-7065"] = msgpack.packb({"grid": "filled"})
+
+    task = asyncio.create_task(fill_later())
+    assert await get_model_or_lock(-33.45, -70.65) == {"grid": "filled"}
+    await task
+
+
+@pytest.mark.asyncio
+async def test_get_model_or_lock_redis_down(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test an unavailable Redis falls through to the caller without waiting."""
+    client = FakeRedis(fail=True)
+    monkeypatch.setattr(cache_module, "cache", make_manager(client))
+
+    assert await get_model_or_lock(-33.45, -70.65) is None
+    assert client.calls == ["eval"]
+
+
+@pytest.mark.asyncio
+async def test_eval_reuses_loaded_script(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test scripts are sent once, then run by SHA, reloading after a flush."""
+    client = FakeRedis({"model2:-3345:-7065": json.dumps({"grid": "fine"})})
+    monkeypatch.setattr(cache_module, "cache", make_manager(client))
+
+    for _ in range(2):
+        cache_module._L0.clear()
+        assert await get_model_or_lock(-33.45, -70.65) == {"grid": "fine"}
+    assert client.calls == ["eval", "evalsha"]
+
+    client.flush_scripts = True
+    cache_module._L0.clear()
+    assert await get_model_or_lock(-33.45, -70.65) == {"grid": "fine"}
+    assert client.calls[2:] == ["evalsha", "eval"]
+
+
+@pytest.mark.asyncio
+async def test_get_model_or_lock_takes_over_abandoned_fill(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test a waiter claims the lock when the filler releases it without writing."""
+    client = FakeRedis()
+    monkeypatch.setattr(cache_module, "cache", make_manager(client))
+
+    assert await get_model_or_lock(-33.45, -70.65) is None
+    first_token = client.data["lock:model2:-3345:-7065"]
+
+    async def give_up_later() -> None:
+        await asyncio.sleep(0.1)
+        await release_model_lock(-33.45, -70.65)
+
+    task = asyncio.create_task(give_up_later())
+    assert await get_model_or_lock(-33.45, -70.65) is None
+    await task
+
+    assert client.data["lock:model2:-3345:-7065"] != first_token
+    await release_model_lock(-33.45, -70.65)
+    assert "lock:model2:-3345:-7065" not in client.data
+
+
+@pytest.mark.asyncio
+async def test_release_keeps_another_holders_lock(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test a filler that outlived its lock does not release the next holder's."""
+    client = FakeRedis()
+    monkeypatch.setattr(cache_module, "cache", make_manager(client))
+
+    assert await get_model_or_lock(-33.45, -70.65) is None
+    client.data["lock:model2:-3345:-7065"] = b"other-worker"
+
+    await release_model_lock(-33.45, -70.65)
+
+    assert client.data["lock:model2:-3345:-7065"] == b"other-worker"
+    assert cache_module._fill_tokens == {}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_lookup_and_fill(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test local callers for one cell join a single lock claim and fill."""
+    from app.services import cache_manager
+
+    client = FakeRedis()
+    monkeypatch.setattr(cache_module, "cache", make_manager(client))
+    fills = 0
+
+    async def fill(*args: object) -> SimpleNamespace:
+        nonlocal fills
+        fills += 1
+        await asyncio.sleep(0.01)
+        return SimpleNamespace(area_m2=15.0)
+
+    monkeypatch.setattr(cache_manager, "_fill_model", fill)
+
+    results = await asyncio.gather(
+        *(cache_manager.get_or_create_model(-33.45, -70.65) for _ in range(5))
+    )
+
+    assert fills == 1
+    assert len({id(r) for r in results}) == 1
+    assert client.calls == ["eval", "eval"]  # claim, then release
+    assert client.data == {}
+    assert cache_module._inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_errors() -> None:
+    """Test waiters see the leader's exception and the key is released."""
+    calls = 0
+
+    async def fetch() -> None:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(
+        cache_module.single_flight("k", fetch),
+        cache_module.single_flight("k", fetch),
+        return_exceptions=True,
+    )
+
+    assert calls == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert "k" not in cache_module._inflight
+
+
+@pytest.mark.asyncio
+async def test_debug_logging_is_gated(caplog: pytest.LogCaptureFixture) -> None:
+    """Test write paths only emit debug records when DEBUG is enabled."""
+    manager = make_manager(FakeRedis())
+
+    with caplog.at_level(logging.INFO, logger="app.core.cache"):
+        await manager.set("a", "1", ex=60)
+    assert not caplog.records
+
+    with caplog.at_level(logging.DEBUG, logger="app.core.cache"):
+        await manager.set("a", "1", ex=60)
+        await manager.delete("a")
+    assert [r.getMessage().split(":")[0] for r in caplog.records] == ["Cache SET", "Cache DELETE"]
+
+
+@pytest.mark.asyncio
+async def test_models_are_stored_as_msgpack(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test models are written as MessagePack and read back from Redis."""
+    client = FakeRedis()
+    monkeypatch.setattr(cache_module, "cache", make_manager(client))
+    model = {"monthly_values": [[[1.5, 2.25]]], "data_tier": "standard"}
+
+    await set_cached_model(-33.45, -70.65, model)
+    cache_module._L0.clear()
+
+    assert msgpack.unpackb(client.data["model2:-3345:-7065"]) == model
+    assert await get_model_or_lock(-33.45, -70.65) == model
+
+
+@pytest.mark.asyncio
+async def test_legacy_json_models_still_load(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test models cached as JSON before the MessagePack switch still hit."""
+    client = FakeRedis({"model2:-3345:-7065": json.dumps({"grid": "legacy"})})
+    monkeypatch.setattr(cache_module, "cache", make_manager(client))
+
+    assert await get_model_or_lock(-33.45, -70.65) == {"grid": "legacy"}
@@ -0,0 +1,141 @@
+"""Tests for the PostgreSQL warm cache repository."""
+
+from datetime import UTC, datetime
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from app.repositories.cache_repository import CacheRepository
+
+
+class RecordingSession:
+    """Session stand-in recording statements and parameters."""
+
+    def __init__(self, row: object = None) -> None:
+        self.row = row
+        self.calls: list[tuple[object, dict[str, Any] | None]] = []
+
+    async def execute(self, statement: object, params: dict[str, Any] | None = None) -> Any:
+        self.calls.append((statement, params))
+        return SimpleNamespace(
+            fetchone=lambda: self.row,
+            scalar_one_or_none=lambda: self.row,
+            scalar=lambda: self.row,
+            fetchall=lambda: self.row,
+        )
+
+
+@pytest.mark.asyncio
+async def test_statements_are_reused_across_calls() -> None:
+    """Test each call binds parameters to the same prebuilt statement."""
+    repository = CacheRepository()
+    writes = RecordingSession(row=SimpleNamespace(id=9))
+    lookups = RecordingSession()
+
+    for lat in (-33.45, 40.42):
+        assert await repository.save(lat, -70.65, {"a": 1}, session=writes) == 9
+        assert await repository.find_nearby(lat, -70.65, session=lookups) is None
+
+    (first_save, _), (second_save, params) = writes.calls
+    (first_lookup, _), (second_lookup, _) = lookups.calls
+    assert first_save is second_save
+    assert first_lookup is second_lookup
+    assert params["lat"] == 40.42
+    assert params["model"] == '{"a":1}'
+
+
+@pytest.mark.asyncio
+async def test_nearby_lookup_uses_geography_column_directly() -> None:
+    """Test the proximity query never casts the indexed geom column per row."""
+    session = RecordingSession()
+
+    await CacheRepository().find_nearby(60.0, 10.0, radius_km=5.0, session=session)
+
+    statement, params = session.calls[0]
+    assert "geom::" not in str(statement)
+    assert "ST_DWithin(\n        geom," in str(statement)
+    assert params["radius_m"] == 5000.0
+
+
+@pytest.mark.asyncio
+async def test_bbox_fallback_scales_longitude_by_latitude() -> None:
+    """Test fallback distances shrink longitude degrees by cos(latitude)."""
+    cached = SimpleNamespace(
+        id=1, latitude=60.0, longitude=10.1, interpolation_model={}, data_tier="standard",
+        source_dataset="PVGIS", country_code=None, created_at=None,
+    )
+    session = RecordingSession(row=cached)
+
+    repository = CacheRepository()
+    found = await repository._find_with_bbox(session, 60.0, 10.0, 10.0)  # type: ignore[arg-type]
+
+    # 0.1° of longitude at 60° is ~5.55 km, not the ~11.1 km an unscaled degree gives
+    assert found["distance_km"] == pytest.approx(5.55, abs=0.01)
+    assert "pow(" in str(session.calls[0][0])
+
+
+@pytest.mark.asyncio
+async def test_postgis_detected_once_then_dispatched_directly() -> None:
+    """Test lookups follow the startup probe instead of sniffing query errors."""
+    repository = CacheRepository()
+
+    assert await repository.detect_postgis(session=RecordingSession(row=False)) is False
+
+    session = RecordingSession()
+    await repository.find_nearby(-33.45, -70.65, session=session)
+    assert "FROM cached_locations" in str(session.calls[0][0])
+    assert "ST_DWithin" not in str(session.calls[0][0])
+
+    class BrokenSession(RecordingSession):
+        async def execute(
+            self, statement: object, params: dict[str, Any] | None = None
+        ) -> Any:
+            raise ConnectionError("db down")
+
+    assert await repository.detect_postgis(session=BrokenSession()) is False
+
+
+@pytest.mark.asyncio
+async def test_stats_come_from_one_grouping_sets_query() -> None:
+    """Test per-source, per-tier and total figures are unpacked from one result."""
+    oldest = datetime(2026, 1, 1, tzinfo=UTC)
+    rows = [
+        SimpleNamespace(all_sources=0, all_tiers=1, source_dataset="PVGIS", total=3),
+        SimpleNamespace(all_sources=0, all_tiers=1, source_dataset="CAMS", total=1),
+        SimpleNamespace(all_sources=1, all_tiers=0, data_tier="standard", total=4),
+        SimpleNamespace(
+            all_sources=1, all_tiers=1, total=4, oldest=oldest, newest=oldest, expired=2
+        ),
+    ]
+    session = RecordingSession(row=rows)
+
+    stats = await CacheRepository().get_stats(session=session)
+
+    assert len(session.calls) == 1
+    assert "GROUPING SETS" in str(session.calls[0][0])
+    assert stats["total_entries"] == 4
+    assert stats["by_source"] == {"PVGIS": 3, "CAMS": 1}
+    assert stats["by_tier"] == {"standard": 4}
+    assert stats["expired_entries"] == 2
+    assert stats["oldest_entry"] == oldest.isoformat()
+
+
+@pytest.mark.asyncio
+async def test_find_by_id_is_served_from_process_until_a_write() -> None:
+    """Test repeated ID lookups skip the database until save() invalidates them."""
+    cached = SimpleNamespace(
+        id=7, latitude=-33.45, longitude=-70.65, interpolation_model={}, data_tier="standard",
+        source_dataset="PVGIS", country_code="CL", created_at=None, expired=False,
+    )
+    session = RecordingSession(row=cached)
+    repository = CacheRepository()
+
+    first = await repository.find_by_id(7, session=session)
+    first["id"] = 0  # callers get copies
+    assert (await repository.find_by_id(7, session=session))["id"] == 7
+    assert len(session.calls) == 1
+
+    await repository.save(-33.45, -70.65, {}, session=RecordingSession(row=cached))
+    await repository.find_by_id(7, session=session)
+    assert len(session.calls) == 2
@@ -0,0 +1,26 @@
+"""Tests for the cached location model."""
+
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.models import CachedLocation
+
+
+def test_expired_on_instance() -> None:
+    """Test rows expire once created_at + cache_ttl_days has passed."""
+    fresh = CachedLocation(created_at=datetime.now(UTC) - timedelta(days=29), cache_ttl_days=30)
+    stale = CachedLocation(created_at=datetime.now(UTC) - timedelta(days=31), cache_ttl_days=30)
+
+    assert not fresh.expired
+    assert stale.expired
+
+
+def test_expired_compiles_to_sql_predicate() -> None:
+    """Test queries filter expired rows in the database, using each row's TTL."""
+    query = select(CachedLocation.id).where(~CachedLocation.expired)
+    sql = str(query.compile(dialect=postgresql.dialect()))
+
+    assert "cached_locations.created_at >= now() - INTERVAL '1 day'" in sql
+    assert "cached_locations.cache_ttl_days" in sql
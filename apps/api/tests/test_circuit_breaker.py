@@ -0,0 +1,150 @@
+"""Tests for circuit breaker."""
+
+from datetime import datetime
+
+import pytest
+
+from app.core import circuit_breaker as cb_module
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+
+
+class FakeClock:
+    """Controllable replacement for time.monotonic()."""
+
+    def __init__(self, start: float = 1000.0) -> None:
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    """Patch the circuit breaker's monotonic clock."""
+    fake = FakeClock()
+    monkeypatch.setattr(cb_module.time, "monotonic", fake)
+    return fake
+
+
+async def succeed() -> str:
+    return "ok"
+
+
+async def fail() -> None:
+    raise RuntimeError("boom")
+
+
+async def trip(breaker: CircuitBreaker) -> None:
+    """Fail enough calls to open the breaker."""
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(RuntimeError):
+            await breaker.call(fail)
+
+
+@pytest.mark.asyncio
+async def test_opens_after_threshold(clock: FakeClock) -> None:
+    """Test circuit opens after the failure threshold and rejects calls."""
+    breaker = CircuitBreaker(name="test", failure_threshold=2, recovery_timeout=30)
+
+    await trip(breaker)
+    assert breaker.is_open
+
+    clock.now += 10
+    with pytest.raises(CircuitOpenError) as exc_info:
+        await breaker.call(succeed)
+    assert exc_info.value.retry_after == 20
+    assert breaker.metrics.rejected_requests == 1
+
+
+@pytest.mark.asyncio
+async def test_recovers_after_timeout(clock: FakeClock) -> None:
+    """Test circuit goes half-open after the timeout and closes on success."""
+    breaker = CircuitBreaker(
+        name="test", failure_threshold=1, recovery_timeout=30, half_open_max_calls=1
+    )
+
+    await trip(breaker)
+    clock.now += 31
+
+    assert await breaker.call(succeed) == "ok"
+    assert breaker.state == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_status_renders_iso_timestamps(clock: FakeClock) -> None:
+    """Test monotonic timestamps are rendered as ISO strings in status."""
+    breaker = CircuitBreaker(name="test", failure_threshold=5)
+
+    await breaker.call(succeed)
+    status = breaker.get_status()
+
+    assert status["metrics"]["last_failure"] is None
+    datetime.fromisoformat(status["metrics"]["last_success"])
+
+
+@pytest.mark.asyncio
+async def test_closed_calls_skip_lock() -> None:
+    """Test calls on a closed circuit never touch the lock."""
+
+    class ExplodingLock:
+        async def __aenter__(self) -> None:
+            raise AssertionError("lock acquired on fast path")
+
+        async def __aexit__(self, *exc_info: object) -> None:
+            return None
+
+    breaker = CircuitBreaker(name="test", failure_threshold=5)
+    breaker._lock = ExplodingLock()  # type: ignore[assignment]
+
+    assert await breaker.call(succeed) == "ok"
+    with pytest.raises(RuntimeError):
+        await breaker.call(fail)
+    assert breaker.metrics.total_requests == 2
+
+
+@pytest.mark.asyncio
+async def test_lock_created_lazily(clock: FakeClock) -> None:
+    """Test the lock only exists once an open circuit is checked."""
+    breaker = CircuitBreaker(name="test", failure_threshold=1, recovery_timeout=30)
+    assert not hasattr(breaker, "__dict__")
+
+    await trip(breaker)
+    assert breaker._lock is None
+
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(succeed)
+    assert breaker._lock is not None
+
+
+@pytest.mark.asyncio
+async def test_retry_after_rounds_up(clock: FakeClock) -> None:
+    """Test retry_after counts down from the recovery deadline in whole seconds."""
+    breaker = CircuitBreaker(name="test", failure_threshold=1, recovery_timeout=30)
+    await trip(breaker)
+
+    clock.now += 10.5
+    with pytest.raises(CircuitOpenError) as exc_info:
+        await breaker.call(succeed)
+    assert exc_info.value.retry_after == 20
+
+    breaker.reset()
+    assert await breaker.call(succeed) == "ok"
+
+
+def test_registry_builds_service_breakers() -> None:
+    """Test every registered service gets a configured breaker."""
+    breakers = cb_module.get_all_breakers()
+
+    assert set(breakers) == {"copernicus", "pvgis", "gemini"}
+    assert breakers["pvgis"] is cb_module.pvgis_breaker
+    assert breakers["pvgis"].failure_threshold == 3
+    assert CircuitBreaker.for_service("copernicus").recovery_timeout == 60
+
+
+def test_unregistered_breaker_uses_settings_defaults() -> None:
+    """Test thresholds not passed explicitly come from the CIRCUIT_* settings."""
+    breaker = CircuitBreaker(name="test")
+
+    assert breaker.failure_threshold == cb_module.settings.CIRCUIT_FAILURE_THRESHOLD
+    assert breaker.recovery_timeout == cb_module.settings.CIRCUIT_RECOVERY_TIMEOUT
+    assert breaker.half_open_max_calls == cb_module.settings.CIRCUIT_HALF_OPEN_MAX_CALLS
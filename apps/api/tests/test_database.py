@@ -0,0 +1,169 @@
+"""Tests for database connection management."""
+
+import pytest
+
+from app.core.config import settings
+from app.core import database as database_module
+from app.core.database import DatabaseManager, get_connect_args, to_asyncpg_url
+
+
+class FakeConnection:
+    """Async connection that records the statements it runs."""
+
+    def __init__(self, engine: "FakeEngine") -> None:
+        self.engine = engine
+
+    async def __aenter__(self) -> "FakeConnection":
+        self.engine.opened += 1
+        if self.engine.fail_after is not None and self.engine.opened > self.engine.fail_after:
+            raise ConnectionError("too many connections")
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        return None
+
+    async def execute(self, statement: object) -> None:
+        self.engine.statements.append(str(statement))
+
+
+class FakeEngine:
+    """Stand-in for AsyncEngine exposing connect()."""
+
+    def __init__(self, fail_after: int | None = None, idle: int = 0) -> None:
+        self.fail_after = fail_after
+        self.opened = 0
+        self.statements: list[str] = []
+        self.pool = FakePool(idle)
+
+    def connect(self) -> FakeConnection:
+        return FakeConnection(self)
+
+
+class FakePool:
+    """Pool stand-in reporting a fixed number of idle connections."""
+
+    def __init__(self, idle: int) -> None:
+        self.idle = idle
+
+    def checkedin(self) -> int:
+        return self.idle
+
+
+@pytest.mark.asyncio
+async def test_warm_up_not_initialized() -> None:
+    """Test warm-up is a no-op without an engine."""
+    assert await DatabaseManager().warm_up() == 0
+
+
+@pytest.mark.asyncio
+async def test_warm_up_opens_pool_size_connections(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test warm-up pings one connection per pool slot."""
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 4)
+    engine = FakeEngine()
+    manager = DatabaseManager()
+    manager._engine = engine  # type: ignore[assignment]
+
+    assert await manager.warm_up() == 4
+    assert engine.statements == ["SELECT 1"] * 4
+
+
+@pytest.mark.asyncio
+async def test_warm_up_tolerates_failures(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test failed connections are counted out instead of raising."""
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 4)
+    manager = DatabaseManager()
+    manager._engine = FakeEngine(fail_after=3)  # type: ignore[assignment]
+
+    assert await manager.warm_up() == 3
+
+
+@pytest.mark.asyncio
+async def test_ping_idle_only_touches_idle_connections(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test the keep-alive ping checks out idle connections only."""
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 4)
+    engine = FakeEngine(idle=2)
+    manager = DatabaseManager()
+    manager._engine = engine  # type: ignore[assignment]
+
+    assert await manager.ping_idle() == 2
+    assert engine.statements == ["SELECT 1"] * 2
+
+
+def test_pool_settings_applied(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test the engine pool is sized from settings."""
+    monkeypatch.setattr(settings, "DATABASE_URL", "postgresql://u:p@localhost/db")
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 7)
+    monkeypatch.setattr(settings, "DB_POOL_TIMEOUT", 3)
+    manager = DatabaseManager()
+
+    manager.init()
+
+    assert manager._engine.pool.size() == 7
+    assert manager._engine.pool._timeout == 3
+    assert manager._engine.pool._pre_ping is False
+
+
+def test_statement_cache_size_applied(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test both asyncpg statement caches are sized from settings."""
+    monkeypatch.setattr(settings, "DATABASE_URL", "postgresql://u:p@x.supabase.co/db")
+    monkeypatch.setattr(settings, "DB_STATEMENT_CACHE_SIZE", 0)
+    captured: dict[str, object] = {}
+
+    def fake_create_async_engine(url: str, **kwargs: object) -> FakeEngine:
+        captured.update(kwargs)
+        return FakeEngine()
+
+    monkeypatch.setattr(database_module, "create_async_engine", fake_create_async_engine)
+    DatabaseManager().init()
+
+    connect_args = captured["connect_args"]
+    assert connect_args["statement_cache_size"] == 0
+    assert connect_args["prepared_statement_cache_size"] == 0
+    assert "ssl" in connect_args
+
+
+@pytest.mark.asyncio
+async def test_null_pool_skips_warm_up(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test NullPool mode builds an unpooled engine and skips warm-up."""
+    monkeypatch.setattr(settings, "DATABASE_URL", "postgresql://u:p@localhost/db")
+    monkeypatch.setattr(settings, "DB_USE_NULL_POOL", True)
+    manager = DatabaseManager()
+
+    manager.init()
+
+    assert type(manager._engine.pool).__name__ == "NullPool"
+    assert await manager.warm_up() == 0
+
+
+def test_to_asyncpg_url() -> None:
+    """Test scheme rewriting and libpq-only params are dropped."""
+    assert to_asyncpg_url("postgres://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+    assert to_asyncpg_url(
+        "postgresql://u:p@h/db?sslmode=require&channel_binding=require&application_name=sunny"
+    ) == "postgresql+asyncpg://u:p@h/db?application_name=sunny"
+    assert to_asyncpg_url("postgresql+asyncpg://u:p@h/db?sslmode=require") == (
+        "postgresql+asyncpg://u:p@h/db"
+    )
+    assert to_asyncpg_url("postgresql+psycopg://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+
+
+def test_ssl_context_is_shared() -> None:
+    """Test Neon/Supabase URLs reuse one SSL context and others get none."""
+    neon = get_connect_args("postgresql+asyncpg://u:p@ep-x.neon.tech/db")
+
+    assert neon["ssl"] is get_connect_args("postgresql://u:p@x.supabase.co/db")["ssl"]
+    assert get_connect_args("postgresql://u:p@localhost/db") == {}
+
+
+@pytest.mark.asyncio
+async def test_session_scope_reuses_callers_session() -> None:
+    """Test a provided session is used as is, without opening another."""
+    manager = DatabaseManager()
+    existing = object()
+
+    async with manager.session_scope(existing) as s:  # type: ignore[arg-type]
+        assert s is existing
+
+    with pytest.raises(RuntimeError, match="not initialized"):
+        async with manager.session_scope():
+            pass
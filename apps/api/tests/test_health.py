@@ -37,3 +37,30 @@ def test_root_endpoint(client: TestClient) -> None:
     assert "version" in data
     assert "docs" in data
 
+
+
+def test_cors_preflight_allows_api_key_header(client: TestClient) -> None:
+    """Test preflight from a Vercel preview accepts the headers the API reads."""
+    response = client.options(
+        "/api/health",
+        headers={
+            "Origin": "https://sunny-2-git-main.vercel.app",
+            "Access-Control-Request-Method": "POST",
+            "Access-Control-Request-Headers": "content-type, x-api-key",
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.headers["access-control-allow-origin"] == "https://sunny-2-git-main.vercel.app"
+    assert "x-api-key" in response.headers["access-control-allow-headers"].lower()
+
+
+def test_prometheus_metrics(client: TestClient) -> None:
+    """Test counters are exposed in Prometheus text format."""
+    client.get("/api/health")
+    response = client.get("/api/metrics/prometheus")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE sunny2_requests_total counter" in response.text
+    assert "sunny2_uptime_seconds " in response.text
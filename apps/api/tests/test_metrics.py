@@ -0,0 +1,187 @@
+"""Tests for metrics collection."""
+
+import asyncio
+import logging
+import queue
+import threading
+
+import orjson
+import pytest
+
+from app.core import metrics as metrics_module
+from app.core.metrics import JsonFormatter, MetricsCollector, log_cache_operation, metrics
+
+
+def test_cache_operation_counts_without_debug(caplog: pytest.LogCaptureFixture) -> None:
+    """Test cache counters stay exact while debug lines are skipped."""
+    hits = metrics._cache_hits["test"]
+    misses = metrics._cache_misses["test"]
+
+    with caplog.at_level(logging.INFO, logger="sunny2.metrics"):
+        log_cache_operation("test", "get", "key", True, 1.5)
+        log_cache_operation("test", "get", "key", False, 1.5)
+
+    assert metrics._cache_hits["test"] == hits + 1
+    assert metrics._cache_misses["test"] == misses + 1
+    assert not caplog.records
+
+
+def test_cache_operation_logs_at_debug(caplog: pytest.LogCaptureFixture) -> None:
+    """Test the per-operation line is emitted when DEBUG is enabled."""
+    with caplog.at_level(logging.DEBUG, logger="sunny2.metrics"):
+        log_cache_operation("test", "get", "key", True, 1.5)
+
+    assert "op=get" in caplog.text
+    assert "latency=1.50ms" in caplog.text
+
+
+def test_latency_history_is_bounded() -> None:
+    """Test latency buffers keep only the most recent samples."""
+    collector = MetricsCollector()
+
+    for i in range(150):
+        collector.record_external_call("svc", True, float(i))
+
+    latencies = collector._external_latencies["svc"]
+    assert len(latencies) == 100
+    assert latencies[0] == 50.0
+    assert collector.get_metrics_summary()["external_services"]["svc"]["total_calls"] == 150
+
+
+def test_p95_matches_sorted_rank() -> None:
+    """Test p95 selection picks the same sample as a full sort."""
+    collector = MetricsCollector()
+    samples = [float((i * 37) % 100) for i in range(100)]
+    for sample in samples:
+        collector.record_external_call("svc", True, sample)
+
+    p95 = collector.get_metrics_summary()["external_services"]["svc"]["p95_latency_ms"]
+
+    assert p95 == sorted(samples)[95]
+
+
+def test_request_log_is_rendered_lazily(
+    caplog: pytest.LogCaptureFixture, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test request logs keep their format while deferring interpolation."""
+    monkeypatch.setattr(metrics_module.settings, "REQUEST_LOG_SAMPLE_RATE", 1.0)
+    collector = MetricsCollector()
+
+    with caplog.at_level(logging.INFO, logger="sunny2.metrics"):
+        collector.record_request("/api/health", "GET", 200, 1.234)
+        collector.record_external_call("pvgis", False, 5.0, error="timeout")
+
+    assert caplog.records[0].args == ("GET", "/api/health", 200, 1.234)
+    assert caplog.messages == [
+        "REQUEST | GET /api/health | status=200 | latency=1.23ms",
+        "EXTERNAL | pvgis | success=False | latency=5.00ms | error=timeout",
+    ]
+
+
+def test_json_formatter_includes_extra_fields() -> None:
+    """Test structured fields passed via `extra` land in the JSON line."""
+    record = logging.LogRecord("sunny2.metrics", logging.INFO, __file__, 1, "SOLAR %s", ("x",), None)
+    record.event = "solar_request"
+    record.latency_ms = 1.5
+
+    entry = orjson.loads(JsonFormatter().format(record))
+
+    assert entry["msg"] == "SOLAR x"
+    assert entry["level"] == "INFO"
+    assert entry["event"] == "solar_request"
+    assert entry["latency_ms"] == 1.5
+    assert "args" not in entry
+
+
+def test_queue_handler_defers_formatting() -> None:
+    """Test records are queued with their args untouched."""
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    handler = metrics_module._DeferredQueueHandler(log_queue)
+    record = logging.LogRecord("t", logging.INFO, __file__, 1, "value=%d", (3,), None)
+
+    handler.emit(record)
+
+    queued = log_queue.get_nowait()
+    assert queued.msg == "value=%d"
+    assert queued.args == (3,)
+
+
+def test_uptime_uses_monotonic_clock(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test uptime is measured on the monotonic clock."""
+    collector = MetricsCollector()
+    start = collector._start_time
+    monkeypatch.setattr(metrics_module.time, "monotonic", lambda: start + 42.9)
+
+    summary = collector.get_metrics_summary()
+
+    assert summary["uptime_seconds"] == 42
+    assert summary["started_at"].endswith("+00:00")
+
+
+def test_concurrent_threads_lose_no_updates() -> None:
+    """Test counters stay exact when many threads record at once."""
+    collector = MetricsCollector()
+
+    def record() -> None:
+        for _ in range(500):
+            collector.record_cache_hit("l0")
+            collector.record_external_call("pvgis", True, 1.0)
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    summary = collector.get_metrics_summary()
+    assert summary["cache"]["l0"]["hits"] == 4000
+    assert summary["external_services"]["pvgis"]["total_calls"] == 4000
+
+
+def test_request_logs_are_sampled(
+    caplog: pytest.LogCaptureFixture, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test sampled-out requests still count and errors are always logged."""
+    monkeypatch.setattr(metrics_module.settings, "REQUEST_LOG_SAMPLE_RATE", 0.0)
+    collector = MetricsCollector()
+
+    with caplog.at_level(logging.INFO, logger="sunny2.metrics"):
+        collector.record_request("/api/health", "GET", 200, 1.0)
+        collector.record_request("/api/health", "GET", 503, 1.0)
+
+    assert [r.levelno for r in caplog.records] == [logging.WARNING]
+    assert collector.get_metrics_summary()["requests"]["GET:/api/health"]["total"] == 2
+
+
+@pytest.mark.asyncio
+async def test_periodic_summary_logs_totals(caplog: pytest.LogCaptureFixture) -> None:
+    """Test the background task logs an aggregate line each interval."""
+    with caplog.at_level(logging.INFO, logger="sunny2.metrics"):
+        task = asyncio.create_task(metrics_module.log_metrics_periodically(0.01))
+        await asyncio.sleep(0.03)
+        task.cancel()
+
+    summaries = [r for r in caplog.records if getattr(r, "event", None) == "metrics_summary"]
+    assert summaries
+    assert summaries[0].getMessage().startswith("METRICS | requests=")
+
+
+def test_request_keys_are_reused() -> None:
+    """Test the same route always maps to the same key object."""
+    key = metrics_module._request_key("GET", "/api/health")
+
+    assert key == "GET:/api/health"
+    assert metrics_module._request_key("GET", "/api/health") is key
+
+
+@pytest.mark.asyncio
+async def test_prometheus_rendering_escapes_labels() -> None:
+    """Test request counters render with escaped labels."""
+    collector = MetricsCollector()
+    collector.record_request('/api/"x"', "GET", 500, 1.0)
+
+    body = b"".join([chunk async for chunk in collector.render_prometheus()]).decode()
+
+    assert 'sunny2_requests_total{method="GET",endpoint="/api/\\"x\\""} 1' in body
+    assert 'sunny2_request_errors_total{method="GET",endpoint="/api/\\"x\\""} 1' in body
+    assert body.endswith("sunny2_rate_limits_triggered_total 0\n")
@@ -0,0 +1,78 @@
+"""Tests for startup migrations."""
+
+import asyncio
+from collections.abc import Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import migrations
+from app.core.migrations import MigrationStatus, migration_state, start_migrations
+from app.main import app
+
+
+@pytest.fixture(autouse=True)
+def reset_state() -> Iterator[None]:
+    """Restore the module-level migration state after each test."""
+    saved = dict(migration_state)
+    yield
+    migration_state.update(saved)
+
+
+@pytest.mark.asyncio
+async def test_sync_mode_blocks_until_done(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test sync mode finishes migrating before returning."""
+    calls: list[str] = []
+    monkeypatch.setattr(migrations, "_upgrade_head", lambda: calls.append("upgrade"))
+
+    await start_migrations("sync")
+
+    assert calls == ["upgrade"]
+    assert migration_state["status"] == MigrationStatus.SUCCEEDED
+
+
+@pytest.mark.asyncio
+async def test_async_mode_runs_in_background(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test async mode returns immediately and migrates in a task."""
+    monkeypatch.setattr(migrations, "_upgrade_head", lambda: None)
+
+    await start_migrations("async")
+    assert migration_state["status"] == MigrationStatus.PENDING
+
+    await asyncio.wait_for(migrations._migration_task, timeout=5)
+    assert migration_state["status"] == MigrationStatus.SUCCEEDED
+
+
+@pytest.mark.asyncio
+async def test_failure_is_recorded(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test a failed upgrade is recorded instead of raised."""
+
+    def fail() -> None:
+        raise RuntimeError("relation already exists")
+
+    monkeypatch.setattr(migrations, "_upgrade_head", fail)
+
+    await start_migrations("sync")
+
+    assert migration_state["status"] == MigrationStatus.FAILED
+    assert "already exists" in migration_state["error"]
+
+
+@pytest.mark.asyncio
+async def test_skip_mode_does_nothing(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test skip mode never touches Alembic."""
+    monkeypatch.setattr(migrations, "_upgrade_head", lambda: pytest.fail("migrated"))
+
+    await start_migrations("skip")
+
+    assert migration_state["status"] == MigrationStatus.SKIPPED
+
+
+def test_health_reports_failed_migrations() -> None:
+    """Test /api/health surfaces migration status and degrades on failure."""
+    migration_state["status"] = MigrationStatus.FAILED
+
+    data = TestClient(app).get("/api/health").json()
+
+    assert data["services"]["migrations"] == "failed"
+    assert data["status"] == "degraded"
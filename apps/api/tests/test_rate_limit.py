@@ -0,0 +1,487 @@
+"""Tests for internal rate limiters and semaphores."""
+
+import asyncio
+import logging
+import time
+
+import orjson
+import pytest
+from fastapi import HTTPException
+from slowapi.errors import RateLimitExceeded
+from starlette.requests import Request
+
+from app.middleware import rate_limit as rl_module
+from app.middleware.auth import get_api_key_or_ip
+from app.middleware.rate_limit import InternalRateLimiter, rate_limit_exceeded_handler
+from app.models.api_keys import hash_api_key
+
+
+class FakeClock:
+    """Controllable replacement for time.monotonic()."""
+
+    def __init__(self, start: float = 1000.0) -> None:
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    """Patch the rate limiter's monotonic clock."""
+    fake = FakeClock()
+    monkeypatch.setattr(rl_module.time, "monotonic", fake)
+    return fake
+
+
+@pytest.mark.asyncio
+async def test_try_acquire_sliding_window(clock: FakeClock) -> None:
+    """Test calls are refused at the limit and admitted as the window slides."""
+    limiter = InternalRateLimiter(name="test", max_calls=2, window_seconds=60)
+
+    assert await limiter.try_acquire()
+    clock.now += 30
+    assert await limiter.try_acquire()
+    assert not await limiter.try_acquire()
+
+    clock.now += 30
+    assert await limiter.try_acquire()
+    assert limiter.get_status()["current_calls"] == 2
+
+
+@pytest.mark.asyncio
+async def test_status_prunes_expired_calls(clock: FakeClock) -> None:
+    """Test status only counts calls inside the window."""
+    limiter = InternalRateLimiter(name="test", max_calls=3, window_seconds=10)
+    await limiter.acquire()
+    await limiter.acquire()
+
+    clock.now += 11
+    status = limiter.get_status()
+
+    assert status["current_calls"] == 0
+    assert status["remaining"] == 3
+
+
+@pytest.mark.asyncio
+async def test_acquire_never_exceeds_limit() -> None:
+    """Test concurrent waiters are admitted one per freed slot."""
+    limiter = InternalRateLimiter(name="test", max_calls=2, window_seconds=0.1)  # type: ignore[arg-type]
+    admitted: list[float] = []
+
+    async def call() -> None:
+        await limiter.acquire()
+        admitted.append(time.monotonic())
+
+    await asyncio.gather(*(call() for _ in range(6)))
+
+    assert len(admitted) == 6
+    assert limiter.get_status()["waiting"] == 0
+    # No sliding window of 0.1s ever held more than two admissions
+    for i in range(2, len(admitted)):
+        assert admitted[i] - admitted[i - 2] >= 0.1 - 1e-3
+
+
+def make_request(headers: dict[str, str]) -> Request:
+    """Build a bare Starlette request with the given headers."""
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/estimate",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": ("10.0.0.9", 1234),
+        "query_string": b"",
+        "server": ("testserver", 80),
+        "scheme": "http",
+    })
+
+
+def test_identifier_cached_per_request() -> None:
+    """Test the rate limit identifier is computed once per request."""
+    request = make_request({"X-Forwarded-For": "203.0.113.7, 10.0.0.1"})
+
+    assert get_api_key_or_ip(request) == "ip:203.0.113.7"
+    request.state.rate_limit_identifier = "ip:cached"
+    assert get_api_key_or_ip(request) == "ip:cached"
+
+    keyed = get_api_key_or_ip(make_request({"X-API-Key": "abc"}))
+    assert keyed == f"key:{hash_api_key('abc').hex()}"
+    assert "abc" not in keyed
+    assert get_api_key_or_ip(make_request({})) == "ip:10.0.0.9"
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_handler_returns_problem_json() -> None:
+    """Test the 429 handler body and headers."""
+
+    class Limit:
+        error_message = None
+        limit = "5 per 1 minute"
+
+    response = await rate_limit_exceeded_handler(
+        make_request({"X-API-Key": "abc"}), RateLimitExceeded(Limit())
+    )
+
+    assert response.status_code == 429
+    assert response.headers["content-type"] == "application/json"
+    body = orjson.loads(response.body)
+    assert body["status"] == 429
+    assert body["retry_after"] == int(response.headers["Retry-After"])
+
+
+@pytest.mark.asyncio
+async def test_shared_limiter_waits_for_redis_window(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test the shared limiter sleeps for the wait the window reports."""
+    replies = iter([20, 0])
+    calls: list[list[str]] = []
+
+    async def fake_eval(script: str, keys: list[str], args: list[int]) -> int:
+        calls.append(keys)
+        return next(replies)
+
+    monkeypatch.setattr(rl_module.cache, "eval", fake_eval)
+    limiter = rl_module.SharedRateLimiter(name="shared", max_calls=2, window_seconds=60)
+
+    start = time.monotonic()
+    await limiter.acquire()
+
+    assert time.monotonic() - start >= 0.02
+    assert calls == [["ratelimit:window:shared"], ["ratelimit:window:shared"]]
+    assert limiter.get_status()["current_calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_shared_limiter_falls_back_without_redis(clock: FakeClock) -> None:
+    """Test the shared limiter uses the local window when Redis is down."""
+    limiter = rl_module.SharedRateLimiter(name="shared", max_calls=1, window_seconds=60)
+
+    assert await limiter.try_acquire() is True
+    assert await limiter.try_acquire() is False
+
+
+def test_rate_limit_string_follows_identifier() -> None:
+    """Test anonymous and keyed requests get their tier's limit."""
+    anonymous = rl_module.get_rate_limit_string(make_request({}))
+    keyed = rl_module.get_rate_limit_string(make_request({"X-API-Key": "abc"}))
+
+    assert anonymous == f"{rl_module.settings.RATE_LIMIT_ANONYMOUS}/minute"
+    assert keyed == f"{rl_module.settings.RATE_LIMIT_PER_MINUTE}/minute"
+    assert rl_module.get_rate_limit_for_key("key:abc") is rl_module.get_rate_limit_for_key("key:x")
+
+
+@pytest.mark.asyncio
+async def test_admission_skips_condition_lock(clock: FakeClock) -> None:
+    """Test calls under the limit never take the condition's lock."""
+
+    class ExplodingCondition:
+        async def __aenter__(self) -> None:
+            raise AssertionError("condition acquired on fast path")
+
+        async def __aexit__(self, *exc_info: object) -> None:
+            return None
+
+    limiter = InternalRateLimiter(name="test", max_calls=2, window_seconds=60)
+    limiter._cond = ExplodingCondition()  # type: ignore[assignment]
+
+    await limiter.acquire()
+    assert await limiter.try_acquire() is True
+    assert await limiter.try_acquire() is False
+
+
+@pytest.mark.asyncio
+async def test_semaphore_counts_active_and_waiting() -> None:
+    """Test counters track holders and waiters, including cancelled waiters."""
+    manager = rl_module.SemaphoreManager(name="test", max_concurrent=1)
+
+    await manager.acquire()
+    waiter = asyncio.create_task(manager.acquire())
+    await asyncio.sleep(0)
+    assert manager.get_status()["waiting"] == 1
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    status = manager.get_status()
+    assert (status["active"], status["waiting"], status["available"]) == (1, 0, 0)
+
+    await manager.release()
+    async with manager:
+        assert manager.get_status()["active"] == 1
+    assert manager.get_status()["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_semaphore_hands_permits_to_waiters_in_order() -> None:
+    """Test released permits go to the oldest waiter, never to a newcomer."""
+    manager = rl_module.SemaphoreManager(name="test", max_concurrent=1)
+    order: list[int] = []
+
+    async def worker(n: int) -> None:
+        async with manager:
+            order.append(n)
+
+    await manager.acquire()
+    waiters = [asyncio.create_task(worker(n)) for n in range(3)]
+    await asyncio.sleep(0)
+
+    await manager.release()
+    assert manager.get_status()["available"] == 0
+    await asyncio.gather(*waiters)
+
+    assert order == [0, 1, 2]
+    assert manager.get_status()["available"] == 1
+
+
+@pytest.mark.asyncio
+async def test_semaphore_cancelled_after_handoff_returns_permit() -> None:
+    """Test a waiter cancelled after receiving a permit passes it back."""
+    manager = rl_module.SemaphoreManager(name="test", max_concurrent=1)
+
+    await manager.acquire()
+    waiter = asyncio.create_task(manager.acquire())
+    await asyncio.sleep(0)
+
+    await manager.release()
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert manager.get_status()["available"] == 1
+    assert manager.get_status()["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_semaphore_cancelled_waiter_popped_by_release() -> None:
+    """Test a waiter cancelled before a release still raises CancelledError."""
+    manager = rl_module.SemaphoreManager(name="test", max_concurrent=1)
+
+    await manager.acquire()
+    waiter = asyncio.create_task(manager.acquire())
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    await manager.release()  # pops the cancelled future before the task resumes
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert manager.get_status()["active"] == 0
+    assert manager.get_status()["waiting"] == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_status_includes_shared_usage(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test shared usage for every limiter comes from a single script call."""
+    calls: list[list[str]] = []
+
+    async def fake_eval(script: str, keys: list[str], args: list[int]) -> list[int]:
+        calls.append(keys)
+        return [3, 7]
+
+    monkeypatch.setattr(rl_module.cache, "eval", fake_eval)
+
+    status = await rl_module.get_all_rate_limiters()
+
+    assert calls == [["ratelimit:window:copernicus", "ratelimit:window:pvgis"]]
+    assert status["copernicus"]["shared_calls"] == 3
+    assert status["pvgis"]["shared_calls"] == 7
+
+
+@pytest.mark.asyncio
+async def test_semaphore_adapts_limit_aimd() -> None:
+    """Test slow calls and 429s halve the limit and fast calls grow it back."""
+    manager = rl_module.SemaphoreManager(
+        name="test", max_concurrent=4, min_concurrent=1, latency_target_ms=100
+    )
+
+    manager.report_latency(500)
+    assert manager.current_limit == 2
+    manager.report_error(429)
+    manager.report_error(429)
+    assert manager.current_limit == 1
+
+    await manager.acquire()
+    waiter = asyncio.create_task(manager.acquire())
+    await asyncio.sleep(0)
+    assert manager.get_status()["waiting"] == 1
+
+    # Growing the limit admits the queued caller without a release
+    manager.report_latency(50)
+    manager.report_latency(50)
+    await waiter
+    assert manager.get_status()["active"] == 2
+
+    for _ in range(10):
+        manager.report_latency(50)
+    assert manager.current_limit == 4
+
+
+def test_semaphore_limit_fixed_without_target() -> None:
+    """Test the limit ignores signals when no latency target is set."""
+    manager = rl_module.SemaphoreManager(name="test", max_concurrent=4)
+
+    manager.report_latency(10_000)
+    manager.report_error(429)
+
+    assert manager.current_limit == 4
+
+
+def test_parse_retry_after() -> None:
+    """Test Retry-After parses seconds and falls back on bad values."""
+    assert rl_module.parse_retry_after("7", default=60) == 7
+    assert rl_module.parse_retry_after(None, default=60) == 60
+    assert rl_module.parse_retry_after("soon", default=60) == 60
+    assert rl_module.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", default=60) == 0
+
+
+@pytest.mark.asyncio
+async def test_throttle_gates_retries_until_success() -> None:
+    """Test one caller probes after a 429 and peers drain once it succeeds."""
+    limiter = InternalRateLimiter(name="test", max_calls=100, window_seconds=60)
+    limiter.throttle(0.01)
+    assert await limiter.try_acquire() is False
+    assert 0 < limiter.retry_after <= 0.01
+
+    await limiter.acquire()  # the probe
+    peers = [asyncio.create_task(limiter.acquire()) for _ in range(3)]
+    await asyncio.sleep(0.05)
+    assert not any(peer.done() for peer in peers)
+
+    limiter.report_success()
+    await asyncio.wait_for(asyncio.gather(*peers), timeout=1)
+    assert limiter.retry_after == 0
+    assert await limiter.try_acquire() is True
+
+
+@pytest.mark.asyncio
+async def test_window_ring_reuses_slots(clock: FakeClock) -> None:
+    """Test the timestamp ring keeps a fixed size as calls roll through it."""
+    limiter = InternalRateLimiter(name="test", max_calls=3, window_seconds=10)
+
+    for _ in range(9):
+        assert await limiter.try_acquire() is True
+        clock.now += 4
+    assert len(limiter._slots) == 3
+
+    # Calls at +4s and +8s are still in the window
+    assert await limiter.try_acquire() is True
+    assert await limiter.try_acquire() is False
+    assert limiter.get_status()["current_calls"] == 3
+
+
+@pytest.mark.asyncio
+async def test_semaphore_burst_release_wakes_all_waiters_at_once() -> None:
+    """Test a burst of releases readies every fitting waiter in one iteration."""
+    manager = rl_module.SemaphoreManager(name="test", max_concurrent=50)
+    for _ in range(50):
+        await manager.acquire()
+    started: list[int] = []
+
+    async def worker(n: int) -> None:
+        async with manager:
+            started.append(n)
+            await asyncio.sleep(0.01)
+
+    tasks = [asyncio.create_task(worker(n)) for n in range(50)]
+    await asyncio.sleep(0)
+
+    for _ in range(50):
+        await manager.release()
+    assert not manager._waiters
+
+    await asyncio.sleep(0)
+    assert started == list(range(50))
+    await asyncio.gather(*tasks)
+
+
+@pytest.mark.asyncio
+async def test_api_key_limit_counts_atomically(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test a key over its per-minute limit gets 429 with the window's TTL."""
+    counts: dict[str, int] = {}
+
+    async def fake_eval(script: str, keys: list[str], args: list[int]) -> list[int]:
+        counts[keys[0]] = counts.get(keys[0], 0) + 1
+        return [counts[keys[0]], 42]
+
+    monkeypatch.setattr(rl_module.cache, "eval", fake_eval)
+
+    await rl_module.enforce_api_key_limit(7, limit_per_minute=2)
+    await rl_module.enforce_api_key_limit(7, limit_per_minute=2)
+    with pytest.raises(HTTPException) as exc_info:
+        await rl_module.enforce_api_key_limit(7, limit_per_minute=2)
+
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.headers == {"Retry-After": "42"}
+    assert list(counts) == ["ratelimit:apikey:7"]
+
+
+@pytest.mark.asyncio
+async def test_api_key_limit_skipped_without_redis(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test keys are only held to the global limits when Redis is unavailable."""
+
+    async def no_redis(script: str, keys: list[str], args: list[int]) -> None:
+        return None
+
+    monkeypatch.setattr(rl_module.cache, "eval", no_redis)
+    await rl_module.enforce_api_key_limit(7, limit_per_minute=0)
+
+
+@pytest.mark.asyncio
+async def test_slow_semaphore_waits_are_logged(
+    caplog: pytest.LogCaptureFixture, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test queued time past SEMAPHORE_WAIT_LOG_MS is logged with the semaphore name."""
+    monkeypatch.setattr(rl_module.settings, "SEMAPHORE_WAIT_LOG_MS", 5)
+    manager = rl_module.SemaphoreManager(name="test", max_concurrent=1)
+
+    async def hold() -> None:
+        async with manager:
+            await asyncio.sleep(0.02)
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    with caplog.at_level(logging.WARNING, logger="sunny2.metrics"):
+        async with manager:
+            pass
+
+    await holder
+    (record,) = [r for r in caplog.records if getattr(r, "event", None) == "semaphore_wait"]
+    assert record.semaphore == "test"
+    assert record.wait_ms >= 15
+
+
+@pytest.mark.asyncio
+async def test_combined_gate_enters_both_limits() -> None:
+    """Test the gate records the call, holds a permit and routes outcome reports."""
+    limiter = InternalRateLimiter(name="test", max_calls=5, window_seconds=60)
+    semaphore = rl_module.SemaphoreManager(
+        name="test", max_concurrent=4, latency_target_ms=1000
+    )
+    gate = rl_module.CombinedGate(limiter, semaphore)
+
+    async with gate:
+        assert limiter.get_status()["current_calls"] == 1
+        assert semaphore.get_status()["active"] == 1
+        gate.report_failure(status_code=429, retry_after="30")
+    assert semaphore.get_status()["active"] == 0
+
+    assert semaphore.current_limit == 2
+    assert 29 < limiter.retry_after <= 30
+    gate.report_success(50.0)
+    assert limiter.retry_after == 0
+
+
+def test_combined_gate_backs_off_when_unreachable() -> None:
+    """Test status-less failures lower the limit, however fast they fail."""
+    limiter = InternalRateLimiter(name="test", max_calls=5, window_seconds=60)
+    semaphore = rl_module.SemaphoreManager(
+        name="test", max_concurrent=8, latency_target_ms=1000
+    )
+    gate = rl_module.CombinedGate(limiter, semaphore)
+
+    gate.report_failure()
+    gate.report_failure()
+    assert semaphore.current_limit == 2
+
+    gate.report_failure(status_code=500)
+    assert semaphore.current_limit == 2
+    assert limiter.retry_after == 0